@@ -55,21 +55,18 @@ class MarkManagementSystem:
         self.students = []
         self.courses = []
         self.marks = {} # Dictionary: {course_id: {student_id: mark}}
+        # ID indexes kept next to the lists for O(1) lookups and duplicate checks
+        self.students_by_id = {} # {student_id: Student}
+        self.courses_by_id = {}  # {course_id: Course}
 
     # --- Helper Methods ---
     def find_student_by_id(self, student_id):
         """Finds and returns a Student object by ID, or None if not found."""
-        for student in self.students:
-            if student.id == student_id:
-                return student
-        return None
+        return self.students_by_id.get(student_id)
 
     def find_course_by_id(self, course_id):
         """Finds and returns a Course object by ID, or None if not found."""
-        for course in self.courses:
-            if course.id == course_id:
-                return course
-        return None
+        return self.courses_by_id.get(course_id)
 
     # --- Input Methods ---
     def input_students(self):
@@ -88,12 +85,14 @@ class MarkManagementSystem:
         for i in range(num_students):
             print(f"\nEnter details for student {i+1}:")
             student_id = input("  Enter student ID: ")
-            if any(s.id == student_id for s in self.students):
+            if student_id in self.students_by_id:
                  print(f"  Error: Student ID '{student_id}' already exists. Skipping this student.")
                  continue
             name = input("  Enter student name: ")
             dob = input("  Enter student Date of Birth (dd/mm/yyyy): ")
-            self.students.append(Student(student_id, name, dob))
+            student = Student(student_id, name, dob)
+            self.students.append(student)
+            self.students_by_id[student_id] = student
         print("Student information input complete.")
 
 
@@ -113,13 +112,15 @@ class MarkManagementSystem:
         for i in range(num_courses):
             print(f"\nEnter details for course {i+1}:")
             course_id = input("  Enter course ID: ")
-            if any(c.id == course_id for c in self.courses):
+            if course_id in self.courses_by_id:
                  print(f"  Error: Course ID '{course_id}' already exists. Skipping this course.")
                  continue
             name = input("  Enter course name: ")
             # Add credits input
             credits = input("  Enter course credits: ")
-            self.courses.append(Course(course_id, name, credits)) # Pass credits to constructor
+            course = Course(course_id, name, credits) # Pass credits to constructor
+            self.courses.append(course)
+            self.courses_by_id[course_id] = course
         print("Course information input complete.")
 
     def select_course(self):
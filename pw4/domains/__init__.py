@@ -2,4 +2,5 @@
 # This makes it easier to import classes from the domains package
 
 from .student import Student
-from .course import Course
\ No newline at end of file
+from .course import Course
+from .tables import StudentTable, CourseTable # Optional columnar storage
\ No newline at end of file
@@ -21,57 +21,103 @@ import numpy as np
 from .domains import Student, Course
 from . import input as data_input # Alias to avoid conflicts with built-in input
 from . import output as ui # Alias for clarity
+from . import gpa_engine
+from .repository import EntityStore
+from .mark_store import MarkStore, mark_to_tenths
 
 class Application:
-    def __init__(self):
-        self.students = []
-        self.courses = []
-        self.marks = {} # {course_id: {student_id: mark}}
+    def __init__(self, mark_store_class=MarkStore):
+        self.mark_store_class = mark_store_class # MarkStore, or SparseMarkStore for wide, sparsely enrolled catalogs
+        self.students = EntityStore() # Students in insertion order, indexed by ID
+        self.courses = EntityStore()
+        self.marks = self.mark_store_class() # Course-major and student-major views of the marks
+        self.gpa_tracker = gpa_engine.GpaTracker() # Running GPA totals per student
 
     # --- Data Manipulation Methods ---
     def find_student_by_id(self, student_id):
-        for student in self.students:
-            if student.id == student_id:
-                return student
-        return None
+        return self.students.get(student_id) # O(1) index lookup
 
     def find_course_by_id(self, course_id):
-        for course in self.courses:
-            if course.id == course_id:
-                return course
-        return None
+        return self.courses.get(course_id)
 
     def add_student(self, student_id, name, dob):
         # Basic check here, though primary validation might happen during input phase
         if not self.find_student_by_id(student_id):
-             self.students.append(Student(student_id, name, dob))
-             self._invalidate_gpas() # Invalidate GPAs when student list changes
+             self.students.add(Student(student_id, name, dob))
+             self.gpa_tracker.mark_dirty(student_id) # Only the new student needs computing
              return True
         return False
 
     def add_course(self, course_id, name, credits):
          if not self.find_course_by_id(course_id):
-              self.courses.append(Course(course_id, name, credits))
-              self._invalidate_gpas() # Invalidate if course credits change logic applied
+              self.courses.add(Course(course_id, name, credits))
+              # Marks already entered for this course start counting now
+              for student_id in self.marks.marks_for_course(course_id): self.gpa_tracker.mark_dirty(student_id)
               return True
          return False
 
     def add_mark(self, course_id, student_id, mark):
-         if course_id not in self.marks:
-              self.marks[course_id] = {}
-         self.marks[course_id][student_id] = mark
-         self._invalidate_gpas() # Marks changed, GPAs need recalculation
+         tenths = mark_to_tenths(mark) # Stored and summed as integer tenths
+         old_tenths = self.marks.set_tenths(course_id, student_id, tenths) # Updates both views
+         self._update_student_gpa(course_id, student_id, old_tenths, tenths) # O(1) instead of invalidating everyone
 
     def get_student_ids(self):
-         return {s.id for s in self.students}
+         return self.students.ids() # Live view, stays current as students are added
 
     def get_course_ids(self):
-         return {c.id for c in self.courses}
+         return self.courses.ids()
+
+    # --- Bulk imports (one validation pass, one GPA invalidation per call) ---
+    # Rows are iterables of tuples; column arrays can be passed as zip(ids, names, dobs).
+    # Each method returns (number_added, errors) with errors as [(row_index, message), ...].
+    def add_students_bulk(self, rows):
+         valid, errors = data_input.validate_student_rows(rows, self.students.ids())
+         for student_id, name, dob in valid:
+              self.students.add(Student(student_id, name, dob))
+         self._invalidate_students(student_id for student_id, _, _ in valid)
+         return len(valid), errors
+
+    def add_courses_bulk(self, rows):
+         valid, errors = data_input.validate_course_rows(rows, self.courses.ids())
+         affected = set()
+         for course_id, name, credits in valid:
+              self.courses.add(Course(course_id, name, credits))
+              affected.update(self.marks.marks_for_course(course_id)) # Marks already entered start counting now
+         self._invalidate_students(affected)
+         return len(valid), errors
+
+    def add_marks_bulk(self, rows):
+         valid, errors = data_input.validate_mark_rows(rows) # Marks may be strings or numbers
+         for course_id, student_id, tenths in valid:
+              self.marks.set_tenths(course_id, student_id, tenths)
+         self._invalidate_students(student_id for _, student_id, _ in valid)
+         return len(valid), errors
+
+    def _invalidate_students(self, student_ids):
+         """Flags a batch of students for recomputation by the next calculate_all_gpas()."""
+         student_ids = set(student_ids)
+         if not student_ids: return
+         self.gpa_tracker.invalidate_students(student_ids, len(self.students))
+         if self.gpa_tracker.all_dirty:
+              for student in self.students: student.gpa = None
+              return
+         for student_id in student_ids:
+              student = self.find_student_by_id(student_id)
+              if student: student.gpa = None
 
     # --- GPA and Sorting ---
+    def _update_student_gpa(self, course_id, student_id, old_tenths, new_tenths):
+         """Patches one student's running GPA totals after a mark change."""
+         course = self.find_course_by_id(course_id)
+         if not course: return # Mark only counts once its course exists
+         gpa = self.gpa_tracker.update_mark(student_id, course.credits, old_tenths, new_tenths)
+         student = self.find_student_by_id(student_id)
+         if student: student.gpa = gpa
+
     def _invalidate_gpas(self):
          for student in self.students:
               student.gpa = None
+         self.gpa_tracker.invalidate_all()
 
     def calculate_student_gpa(self, student_id):
         student = self.find_student_by_id(student_id)
@@ -80,18 +126,14 @@ class Application:
         student_marks_values = []
         corresponding_credits = []
 
-        for course_id, marks_dict in self.marks.items():
-            if student_id in marks_dict:
-                course = self.find_course_by_id(course_id)
-                if course:
-                    student_marks_values.append(marks_dict[student_id])
-                    corresponding_credits.append(course.credits)
+        for course, tenths in self.marks.transcript_tenths(student_id, self.courses): # Only this student's marks, as integer tenths
+            student_marks_values.append(tenths); corresponding_credits.append(course.credits)
 
         if not student_marks_values:
             student.gpa = 0.0
             return 0.0
 
-        marks_arr = np.array(student_marks_values)
+        marks_arr = np.array(student_marks_values, dtype=np.int64)
         credits_arr = np.array(corresponding_credits)
         total_credits = np.sum(credits_arr)
 
@@ -99,19 +141,31 @@ class Application:
             student.gpa = 0.0
             return 0.0
 
-        gpa = np.sum(marks_arr * credits_arr) / total_credits
+        gpa = np.sum(marks_arr * credits_arr) / (total_credits * 10) # Exact integer sum, one division
         student.gpa = gpa
         return gpa
 
     def calculate_all_gpas(self):
          if not self.students: return
-         for student in self.students:
-             self.calculate_student_gpa(student.id)
+         # Only dirty students are recomputed; a full matrix reduction happens after (re)loading
+         self.gpa_tracker.refresh(self.students, self.courses, self.marks)
 
     def get_sorted_students_by_gpa(self):
          self.calculate_all_gpas()
-         # Return a new sorted list, doesn't modify internal list directly unless intended
-         return sorted(self.students, key=lambda s: s.gpa if s.gpa is not None else -1, reverse=True)
+         # Ranking index is kept in order as GPAs change, no full re-sort here
+         return self.gpa_tracker.ranking.ordered()
+
+    def get_top_students(self, k):
+         self.calculate_all_gpas()
+         return self.gpa_tracker.ranking.top_k(k)
+
+    def get_bottom_students(self, k):
+         self.calculate_all_gpas()
+         return self.gpa_tracker.ranking.bottom_k(k)
+
+    def get_student_rank(self, student_id):
+         self.calculate_all_gpas()
+         return self.gpa_tracker.ranking.rank_of(student_id)
 
 
     # --- Curses Interaction Methods ---
@@ -149,7 +203,6 @@ class Application:
 
                 # If all details seem okay
                 self.add_student(s_id, s_name, s_dob)
-                existing_ids.add(s_id) # Update existing IDs for next check
                 ui.display_message(stdscr, f"Student {s_id} added.", wait=True, color_pair=1)
                 break # Move to next student
 
@@ -187,7 +240,6 @@ class Application:
 
                 # If all details okay
                 self.add_course(c_id, c_name, c_credits)
-                existing_ids.add(c_id)
                 ui.display_message(stdscr, f"Course {c_id} added.", wait=True, color_pair=1)
                 break # Move to next course
 
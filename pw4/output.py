@@ -90,7 +90,7 @@ def display_list(stdscr, title, header, items, get_info_func, start_y=2):
     stdscr.getch() # Wait for key press
 
 # Function to display marks (more complex table)
-def display_marks_table(stdscr, course, students, marks_dict, start_y=2):
+def display_marks_table(stdscr, course, students, mark_store, start_y=2):
     stdscr.clear()
     h, w = stdscr.getmaxyx()
     title = f"Mark Sheet for Course: {course.name} ({course.id})"
@@ -102,12 +102,12 @@ def display_marks_table(stdscr, course, students, marks_dict, start_y=2):
     stdscr.addstr(start_y + 1, 1, "-" * (w - 2))
 
     current_y = start_y + 2
+    course_marks = mark_store.marks_for_course(course.id) # {student_id: mark}, O(marks in this course)
     if not students:
          stdscr.addstr(current_y, 1, "No students registered.")
-    elif not marks_dict or course.id not in marks_dict or not marks_dict[course.id]:
+    elif not course_marks:
          stdscr.addstr(current_y, 1, f"No marks entered for this course yet.")
     else:
-        course_marks = marks_dict[course.id]
         for student in students:
              if current_y < h - 2:
                  mark = course_marks.get(student.id, "N/A")
@@ -0,0 +1,91 @@
+# pw4/ranking.py
+import bisect
+
+# GPA ranking index.
+# Students are kept ordered by GPA (descending) in a bisect-maintained sorted list,
+# so a GPA change moves one entry instead of re-sorting the whole population.
+# Ties keep the order in which students were added, like sorted(..., reverse=True) did.
+
+def _sort_key(gpa, order, student_id):
+    # Missing GPAs rank last, the same as the old "s.gpa if s.gpa is not None else -1"
+    return (-(gpa if gpa is not None else -1), order, student_id)
+
+class GpaRanking:
+    """Ordered GPA index supporting top_k, bottom_k and rank_of without full sorts."""
+    def __init__(self):
+        self._keys = []     # Sorted list of (-gpa, order, student_id)
+        self._key_of = {}   # {student_id: key currently in self._keys}
+        self._students = {} # {student_id: Student}
+        self._next_order = 0
+
+    def clear(self):
+        self._keys, self._key_of, self._students = [], {}, {}
+        self._next_order = 0
+
+    def rebuild(self, students):
+        """Re-creates the index from scratch (one sort), e.g. after loading data."""
+        self.clear()
+        for student in students:
+            if student.id in self._key_of: continue # Duplicate ID, first one wins
+            key = _sort_key(student.gpa, self._next_order, student.id)
+            self._next_order += 1
+            self._key_of[student.id] = key
+            self._students[student.id] = student
+            self._keys.append(key)
+        self._keys.sort()
+
+    def restore(self, students, order):
+        """Re-creates the index from a known ranking (positions in `students`, best first) without sorting."""
+        self.clear()
+        for position in order:
+            student = students[position]
+            key = _sort_key(student.gpa, position, student.id)
+            self._key_of[student.id] = key
+            self._students[student.id] = student
+            self._keys.append(key)
+        self._next_order = len(students)
+
+    def add(self, student):
+        """Registers a new student (ranked after existing ones with the same GPA)."""
+        if student.id in self._key_of:
+            self.update(student.id, student.gpa); return
+        key = _sort_key(student.gpa, self._next_order, student.id)
+        self._next_order += 1
+        self._key_of[student.id] = key
+        self._students[student.id] = student
+        bisect.insort(self._keys, key)
+
+    def update(self, student_id, gpa):
+        """Moves a student to the position matching its new GPA."""
+        old_key = self._key_of.get(student_id)
+        if old_key is None: return # Not ranked (e.g. marks for an unknown student)
+        new_key = _sort_key(gpa, old_key[1], student_id)
+        if new_key == old_key: return
+        del self._keys[bisect.bisect_left(self._keys, old_key)]
+        bisect.insort(self._keys, new_key)
+        self._key_of[student_id] = new_key
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, student_id):
+        return student_id in self._key_of
+
+    def top_k(self, k):
+        """Returns the k students with the highest GPA, best first."""
+        return [self._students[key[2]] for key in self._keys[:max(k, 0)]]
+
+    def bottom_k(self, k):
+        """Returns the k students with the lowest GPA, worst first."""
+        if k <= 0: return []
+        return [self._students[key[2]] for key in reversed(self._keys[-k:])]
+
+    def rank_of(self, student_id):
+        """Returns the 1-based rank of a student, or None if the student is not ranked."""
+        key = self._key_of.get(student_id)
+        if key is None: return None
+        return bisect.bisect_left(self._keys, key) + 1
+
+    def ordered(self):
+        """Returns every ranked student, best GPA first."""
+        return [self._students[key[2]] for key in self._keys]
@@ -0,0 +1,101 @@
+# pw4/repository.py
+from itertools import islice
+
+# Indexed entity store.
+# Keeps students/courses in insertion order (so menus and listings look the same)
+# plus a dict index by ID, so lookups, duplicate checks and membership tests are O(1)
+# instead of scanning the whole list.
+#
+# Entities are only ever appended, so snapshot() is O(1): a view of the first
+# len(store) items of the same list and index.
+
+class EntityStore:
+    """List-like container of entities (anything with an .id) indexed by ID."""
+    def __init__(self, items=()):
+        self._items = []
+        self._index = {} # {entity_id: position in self._items}
+        for item in items:
+            self.add(item) # Duplicate IDs in old data: first one wins, like find_*_by_id
+
+    def add(self, item):
+        """Appends an entity. Returns False (and stores nothing) if its ID already exists."""
+        if item.id in self._index:
+            return False
+        self._index[item.id] = len(self._items)
+        self._items.append(item)
+        return True
+
+    def get(self, entity_id, default=None):
+        position = self._index.get(entity_id)
+        return self._items[position] if position is not None else default
+
+    def has_id(self, entity_id):
+        return entity_id in self._index
+
+    def index_of(self, entity_id):
+        """Position of the entity in insertion order, or None."""
+        return self._index.get(entity_id)
+
+    def ids(self):
+        """Live, set-like view of all IDs (supports 'in' in O(1))."""
+        return self._index.keys()
+
+    def to_list(self):
+        """Plain list copy, used when persisting so the save format stays a list."""
+        return list(self._items)
+
+    def snapshot(self):
+        """Read-only view of the entities stored right now; later additions are not in it."""
+        return EntitySnapshot(self._items, self._index, len(self._items))
+
+    # --- List-like behaviour so existing UI code keeps working ---
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, position):
+        return self._items[position] # Supports slices too (returns a list)
+
+    def __repr__(self):
+        return f"EntityStore({self._items!r})"
+
+
+class EntitySnapshot:
+    """The first `length` entities of an EntityStore, with the same read interface."""
+    __slots__ = ('_items', '_index', '_length')
+
+    def __init__(self, items, index, length):
+        self._items, self._index, self._length = items, index, length
+
+    def get(self, entity_id, default=None):
+        position = self._index.get(entity_id)
+        return self._items[position] if position is not None and position < self._length else default
+
+    def has_id(self, entity_id):
+        return self.index_of(entity_id) is not None
+
+    def index_of(self, entity_id):
+        position = self._index.get(entity_id)
+        return position if position is not None and position < self._length else None
+
+    def to_list(self):
+        return self._items[:self._length]
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return islice(self._items, self._length) # No copy: later appends are past the end
+
+    def __getitem__(self, position):
+        if isinstance(position, slice): # Same as a list: returns a list
+            return [self._items[i] for i in range(*position.indices(self._length))]
+        if position < 0: position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError("EntitySnapshot index out of range")
+        return self._items[position]
+
+    def __repr__(self):
+        return f"EntitySnapshot({self.to_list()!r})"
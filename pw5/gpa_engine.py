@@ -0,0 +1,160 @@
+# pw5/gpa_engine.py
+import numpy as np
+
+from .ranking import GpaRanking
+
+# Vectorized GPA calculation.
+# Every mark is taken as a (student row, course column, tenths) coordinate and
+# all GPAs come out of one weighted reduction over the marks, so the cost is
+# O(number of marks) instead of O(students x courses) for a dense matrix.
+# Marks are integer tenths, so every sum is exact integer arithmetic and the
+# only float operation is the final division.
+
+def mark_coordinates(students, courses, marks):
+    """Returns (rows, cols, tenths, credits) for every mark whose student and course exist.
+
+    Rows follow the order of `students`; `credits` is the credits of each mark's course.
+    `marks` is a MarkStore or SparseMarkStore (anything with coo()).
+    Marks for unknown students or courses are ignored (same as the old loop).
+    """
+    student_rows = {}
+    for row, student in enumerate(students):
+        student_rows.setdefault(student.id, row) # First match wins, like find_student_by_id
+    course_credits = {}
+    for course in courses:
+        course_credits.setdefault(course.id, course.credits)
+
+    student_ids, course_ids, rows, cols, tenths = marks.coo()
+    row_map = np.array([student_rows.get(student_id, -1) for student_id in student_ids], dtype=np.int64)
+    col_credits = np.array([course_credits.get(course_id, 0) for course_id in course_ids], dtype=np.int64)
+    col_known = np.array([course_id in course_credits for course_id in course_ids], dtype=bool)
+    # Index arrays are used as they come (no dtype copies), so memory-mapped columns are read in place
+    rows = row_map[np.asarray(rows)]
+    cols, tenths = np.asarray(cols), np.asarray(tenths)
+    keep = (rows >= 0) & col_known[cols] # Course or student no longer exists
+    if not keep.all():
+        rows, cols, tenths = rows[keep], cols[keep], tenths[keep]
+    return rows, cols, tenths, col_credits[cols]
+
+def sparse_weighted_totals(rows, tenths, credits, n_rows):
+    """Returns (sum of tenths*credits, sum of credits) per row from mark coordinates (int64)."""
+    weighted_sum = np.zeros(n_rows, dtype=np.int64)
+    total_credits = np.zeros(n_rows, dtype=np.int64)
+    np.add.at(weighted_sum, rows, tenths * credits)
+    np.add.at(total_credits, rows, credits)
+    return weighted_sum, total_credits
+
+def gpas_from_totals(weighted_sum, total_credits):
+    """Turns (tenths*credits, credits) sums into GPAs, leaving 0.0 where there are no credits."""
+    gpas = np.zeros(len(total_credits), dtype=np.float64)
+    np.divide(weighted_sum, total_credits * 10, out=gpas, where=total_credits > 0)
+    return gpas
+
+def compute_gpa_totals(students, courses, marks):
+    """Returns the (weighted sum, credit sum) arrays for every student (same order as students)."""
+    rows, _, tenths, credits = mark_coordinates(students, courses, marks)
+    return sparse_weighted_totals(rows, tenths, credits, len(students))
+
+def compute_all_gpas(students, courses, marks):
+    """Computes the GPA of every student and returns them as an array (same order as students)."""
+    return gpas_from_totals(*compute_gpa_totals(students, courses, marks))
+
+
+class GpaTracker:
+    """Keeps per-student running totals so one mark change costs O(1).
+
+    Only students whose totals cannot be patched in place (new students,
+    marks that start counting because their course was added, freshly
+    loaded data) are flagged dirty and recomputed by refresh().
+    Every GPA change is also pushed into the ranking index.
+    """
+    def __init__(self):
+        self.weighted = {} # {student_id: sum of mark tenths * credits} (exact int)
+        self.credits = {}  # {student_id: sum of credits}
+        self.dirty = set()
+        self.all_dirty = True # Nothing computed yet
+        self.ranking = GpaRanking()
+
+    def invalidate_all(self):
+        self.weighted, self.credits, self.dirty = {}, {}, set()
+        self.all_dirty = True
+        self.ranking.clear()
+
+    def mark_dirty(self, student_id):
+        if not self.all_dirty: self.dirty.add(student_id)
+
+    def invalidate_students(self, student_ids, population):
+        """Flags a batch of students dirty in one go (used by the bulk imports).
+
+        When the batch touches at least half of the population it is cheaper to
+        drop everything and let refresh() do one full matrix reduction.
+        """
+        if self.all_dirty: return
+        student_ids = set(student_ids)
+        if len(student_ids) * 2 >= max(population, 1): self.invalidate_all()
+        else: self.dirty.update(student_ids)
+
+    def is_dirty(self, student_id):
+        return self.all_dirty or student_id in self.dirty
+
+    def gpa(self, student_id):
+        """Current GPA from the running totals, or None if the student needs a refresh."""
+        if self.is_dirty(student_id): return None
+        total_credits = self.credits.get(student_id, 0)
+        if total_credits == 0: return 0.0
+        return self.weighted[student_id] / (total_credits * 10)
+
+    def update_mark(self, student_id, credits, old_tenths, new_tenths):
+        """Patches the totals for one added/overwritten mark (in tenths) and returns the new GPA (None if dirty)."""
+        if self.is_dirty(student_id): return None
+        weighted = self.weighted.get(student_id, 0)
+        total_credits = self.credits.get(student_id, 0)
+        if old_tenths is not None:
+            weighted -= old_tenths * credits; total_credits -= credits
+        self.weighted[student_id] = weighted + new_tenths * credits
+        self.credits[student_id] = total_credits + credits
+        gpa = self.gpa(student_id)
+        self.ranking.update(student_id, gpa)
+        return gpa
+
+    def restore(self, students, weighted, credits, ranking):
+        """Adopts totals computed for exactly these students (derived_cache) instead of a full refresh().
+
+        `weighted`/`credits` follow the order of `students`; `ranking` lists their positions, best GPA first.
+        """
+        ids = [student.id for student in students]
+        weighted, credits = weighted.tolist(), credits.tolist()
+        self.weighted, self.credits = dict(zip(ids, weighted)), dict(zip(ids, credits))
+        for student, student_weighted, student_credits in zip(students, weighted, credits):
+            student.gpa = student_weighted / (student_credits * 10) if student_credits else 0.0
+        self.ranking.restore(students, ranking.tolist())
+        self.all_dirty = False; self.dirty = set()
+
+    def refresh(self, students, courses, marks):
+        """Recomputes dirty students and stores their GPA on the Student objects.
+
+        `students`/`courses` are the app's EntityStores, `marks` its mark store.
+        """
+        if self.all_dirty:
+            weighted, total_credits = compute_gpa_totals(students, courses, marks)
+            gpas = gpas_from_totals(weighted, total_credits).tolist()
+            self.weighted = {s.id: w for s, w in zip(students, weighted.tolist())}
+            self.credits = {s.id: c for s, c in zip(students, total_credits.tolist())}
+            for student, gpa in zip(students, gpas): student.gpa = gpa
+            self.ranking.rebuild(students)
+            self.all_dirty = False; self.dirty = set()
+            return
+        if not self.dirty: return
+        for student_id in self.dirty:
+            weighted = 0; total_credits = 0
+            for course, tenths in marks.transcript_tenths(student_id, courses): # O(marks of this student)
+                weighted += tenths * course.credits
+                total_credits += course.credits
+            self.weighted[student_id] = weighted; self.credits[student_id] = total_credits
+        dirty = self.dirty; self.dirty = set()
+        # Visit dirty students in list order so new ones rank in insertion order on ties
+        positions = [(students.index_of(student_id), student_id) for student_id in dirty]
+        for position, student_id in sorted(p for p in positions if p[0] is not None):
+            student = students[position]
+            student.gpa = self.gpa(student_id)
+            self.ranking.add(student) # New students are inserted, known ones just move
@@ -5,12 +5,19 @@ import time # For delays if needed
 import math # For input validation needing math.floor
 import numpy as np
 import os       # Needed for file operations (exists, remove)
+import io       # Text decoding of zip members
+import itertools
+import shutil
+import warnings
 import zipfile  # Needed for compression/decompression
 
 # Import classes and functions from our modules
 from .domains import Student, Course # Relative imports are correct
 from . import input as data_input
 from . import output as ui
+from . import gpa_engine
+from .repository import EntityStore
+from .mark_store import MarkStore, mark_to_tenths
 
 # --- Constants for filenames ---
 STUDENTS_FILE = "students.txt"
@@ -19,39 +26,54 @@ MARKS_FILE = "marks.txt"
 ARCHIVE_FILE = "students.dat"
 # --- Delimiter for text files ---
 DELIMITER = ";" # Using semicolon as CSV doesn't handle commas in names well easily
+MARKS_CHUNK_LINES = 65536 # Mark lines parsed per numpy pass while loading
+WRITE_BATCH_LINES = 4096  # Lines encoded and written to an archive member at a time
+SCREEN_SAVE_COMPRESSLEVEL = 1 # Per-screen saves favour speed; the save on exit recompresses at the default level
+EXPORT_TXT = os.environ.get("STUDENT_EXPORT_TXT") == "1" # Also write students.txt etc. on exit
+
+def _float_or_nan(text):
+    try:
+        return float(text)
+    except ValueError:
+        return math.nan
 
 class Application:
-    def __init__(self):
-        self.students = []
-        self.courses = []
-        self.marks = {} # {course_id: {student_id: mark}}
+    def __init__(self, mark_store_class=MarkStore):
+        self.mark_store_class = mark_store_class # MarkStore, or SparseMarkStore for wide, sparsely enrolled catalogs
+        self.students = EntityStore() # Students in insertion order, indexed by ID
+        self.courses = EntityStore()
+        self.marks = self.mark_store_class() # Course-major and student-major views of the marks
+        self.gpa_tracker = gpa_engine.GpaTracker() # Running GPA totals per student
         # Attempt to load data when the application starts
         self._decompress_and_load_data()
 
     # --- Data Persistence Methods ---
 
+    def _student_lines(self):
+        for student in self.students:
+            yield f"{student.id}{DELIMITER}{student.name}{DELIMITER}{student.dob}\n"
+
+    def _course_lines(self):
+        for course in self.courses:
+            yield f"{course.id}{DELIMITER}{course.name}{DELIMITER}{course.credits}\n"
+
+    def _mark_lines(self):
+        for course_id, student_id, mark in self.marks.iter_marks():
+            yield f"{course_id}{DELIMITER}{student_id}{DELIMITER}{mark}\n"
+
     def _save_students_to_txt(self):
-        """Saves the current student list to students.txt"""
+        """Saves the current student list to students.txt (plain-text export, see EXPORT_TXT)"""
         try:
             with open(STUDENTS_FILE, "w", encoding="utf-8") as f:
-                for student in self.students:
-                    # Use student attributes directly
-                    line = f"{student.id}{DELIMITER}{student.name}{DELIMITER}{student.dob}\n"
-                    f.write(line)
-            # Optional: display success message via curses UI
-            # ui.display_message(stdscr, "Students saved to students.txt", wait=True) # Needs stdscr passed
+                f.writelines(self._student_lines())
         except IOError as e:
-            # Optional: display error message via curses UI
-            # ui.display_message(stdscr, f"Error saving students: {e}", color_pair=2, wait=True)
             print(f"Error saving students: {e}") # Fallback print
 
     def _save_courses_to_txt(self):
         """Saves the current course list to courses.txt"""
         try:
             with open(COURSES_FILE, "w", encoding="utf-8") as f:
-                for course in self.courses:
-                    line = f"{course.id}{DELIMITER}{course.name}{DELIMITER}{course.credits}\n"
-                    f.write(line)
+                f.writelines(self._course_lines())
         except IOError as e:
             print(f"Error saving courses: {e}")
 
@@ -60,111 +82,158 @@ class Application:
         # Overwrites the file each time - simpler for loading
         try:
             with open(MARKS_FILE, "w", encoding="utf-8") as f:
-                for course_id, student_marks in self.marks.items():
-                    for student_id, mark in student_marks.items():
-                        line = f"{course_id}{DELIMITER}{student_id}{DELIMITER}{mark}\n"
-                        f.write(line)
+                f.writelines(self._mark_lines())
         except IOError as e:
             print(f"Error saving marks: {e}")
 
-    def _load_students_from_txt(self):
-        """Loads student data from students.txt"""
+    def _archive_members(self):
+        return ((STUDENTS_FILE, self._student_lines), (COURSES_FILE, self._course_lines), (MARKS_FILE, self._mark_lines))
+
+    def _write_member(self, zipf, name, lines):
+        with zipf.open(name, 'w') as member:
+            while True:
+                batch = "".join(itertools.islice(lines, WRITE_BATCH_LINES))
+                if not batch: break
+                member.write(batch.encode("utf-8"))
+
+    def _write_archive(self, only=None):
+        """Serializes students, courses and marks straight into the members of students.dat.
+
+        One pass per member, written in batches of WRITE_BATCH_LINES lines; the
+        archive is built next to the old one and renamed over it when complete.
+        With `only` (a member name) just that member is serialized, appended to a
+        copy of the archive: the loader reads the newest copy of each member.
+        """
+        temp_file = ARCHIVE_FILE + ".tmp"
+        members = self._archive_members()
+        if only is not None and self._can_append(only):
+            shutil.copyfile(ARCHIVE_FILE, temp_file) # Compressed bytes, far cheaper than re-serializing the marks
+            with warnings.catch_warnings(), zipfile.ZipFile(temp_file, 'a', compression=zipfile.ZIP_DEFLATED,
+                                                                    compresslevel=SCREEN_SAVE_COMPRESSLEVEL) as zipf:
+                warnings.simplefilter("ignore", UserWarning) # "Duplicate name" is expected here
+                self._write_member(zipf, only, dict(members)[only]())
+        else:
+            with zipfile.ZipFile(temp_file, 'w', compression=zipfile.ZIP_DEFLATED) as zipf:
+                for name, lines in members:
+                    self._write_member(zipf, name, lines())
+        os.replace(temp_file, ARCHIVE_FILE)
+
+    def _can_append(self, name):
+        """True if `name` can be appended to students.dat instead of rewriting it.
+
+        Needs all three members in place, and superseded copies taking up at most
+        twice the room of the live ones; otherwise a full rewrite compacts the archive.
+        """
+        try:
+            with zipfile.ZipFile(ARCHIVE_FILE, 'r') as zipf: infos = zipf.infolist()
+        except (OSError, zipfile.BadZipFile):
+            return False
+        live = {info.filename: info for info in infos} # Later copies win, as when loading
+        if not all(member in live for member, _ in self._archive_members()): return False
+        live_size = sum(info.compress_size for info in live.values())
+        stale_size = sum(info.compress_size for info in infos) - live_size
+        return stale_size + live[name].compress_size <= 2 * live_size
+
+    def _save_archive(self, member):
+        """Saves one input screen's changes (`member`) to students.dat without UI messages"""
+        try:
+            self._write_archive(only=member)
+        except (IOError, zipfile.BadZipFile) as e:
+            print(f"Error saving {ARCHIVE_FILE}: {e}")
+
+    def _load_students_from_txt(self, lines):
+        """Loads student data from the lines of students.txt (any iterable of text lines)"""
         try:
-            if not os.path.exists(STUDENTS_FILE):
-                return # File doesn't exist, nothing to load
-            with open(STUDENTS_FILE, "r", encoding="utf-8") as f:
-                self.students = [] # Clear existing list before loading
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        parts = line.split(DELIMITER)
-                        if len(parts) == 3:
-                            student_id, name, dob = parts
-                            # Avoid duplicates if loading multiple times (though we clear list first)
-                            if not any(s.id == student_id for s in self.students):
-                                self.students.append(Student(student_id, name, dob))
-                        else:
-                             print(f"Warning: Skipping malformed line in {STUDENTS_FILE}: {line}")
+            self.students = EntityStore() # Clear existing list before loading
+            for line in lines:
+                line = line.strip()
+                if line:
+                    parts = line.split(DELIMITER)
+                    if len(parts) >= 3:
+                        # ID first and DoB last: whatever lies between is the name, delimiters included
+                        student_id, name, dob = parts[0], DELIMITER.join(parts[1:-1]), parts[-1]
+                        # Duplicate IDs are skipped by the store's O(1) index check
+                        self.students.add(Student(student_id, name, dob))
+                    else:
+                         print(f"Warning: Skipping malformed line in {STUDENTS_FILE}: {line}")
         except IOError as e:
             print(f"Error loading students: {e}")
         except Exception as e:
             print(f"Error processing {STUDENTS_FILE}: {e}")
 
 
-    def _load_courses_from_txt(self):
-        """Loads course data from courses.txt"""
+    def _load_courses_from_txt(self, lines):
+        """Loads course data from the lines of courses.txt"""
         try:
-            if not os.path.exists(COURSES_FILE):
-                return
-            with open(COURSES_FILE, "r", encoding="utf-8") as f:
-                 self.courses = [] # Clear existing list
-                 for line in f:
-                     line = line.strip()
-                     if line:
-                         parts = line.split(DELIMITER)
-                         if len(parts) == 3:
-                             course_id, name, credits_str = parts
-                             if not any(c.id == course_id for c in self.courses):
-                                 # Let Course constructor handle credit validation
-                                 self.courses.append(Course(course_id, name, credits_str))
-                         else:
-                             print(f"Warning: Skipping malformed line in {COURSES_FILE}: {line}")
+            self.courses = EntityStore() # Clear existing list
+            for line in lines:
+                line = line.strip()
+                if line:
+                    parts = line.split(DELIMITER)
+                    if len(parts) >= 3:
+                        course_id, name, credits_str = parts[0], DELIMITER.join(parts[1:-1]), parts[-1]
+                        if not self.courses.has_id(course_id):
+                            # Let Course constructor handle credit validation
+                            self.courses.add(Course(course_id, name, credits_str))
+                    else:
+                        print(f"Warning: Skipping malformed line in {COURSES_FILE}: {line}")
         except IOError as e:
             print(f"Error loading courses: {e}")
         except Exception as e:
             print(f"Error processing {COURSES_FILE}: {e}")
 
 
-    def _load_marks_from_txt(self):
-        """Loads marks data from marks.txt"""
+    def _load_marks_from_txt(self, lines):
+        """Loads marks data from the lines of marks.txt, parsing the marks a chunk at a time"""
         try:
-            if not os.path.exists(MARKS_FILE):
-                return
-            with open(MARKS_FILE, "r", encoding="utf-8") as f:
-                 self.marks = {} # Clear existing marks
-                 for line in f:
-                     line = line.strip()
-                     if line:
-                         parts = line.split(DELIMITER)
-                         if len(parts) == 3:
-                             course_id, student_id, mark_str = parts
-                             try:
-                                 mark = float(mark_str)
-                                 if course_id not in self.marks:
-                                     self.marks[course_id] = {}
-                                 self.marks[course_id][student_id] = mark
-                             except ValueError:
-                                 print(f"Warning: Skipping invalid mark in {MARKS_FILE}: {line}")
-                         else:
-                             print(f"Warning: Skipping malformed line in {MARKS_FILE}: {line}")
+            self.marks = self.mark_store_class() # Clear existing marks
+            chunk = []
+            for line in lines:
+                line = line.strip()
+                if line:
+                    parts = line.split(DELIMITER)
+                    if len(parts) == 3:
+                        chunk.append((line, parts))
+                        if len(chunk) >= MARKS_CHUNK_LINES:
+                            self._store_mark_lines(chunk)
+                            chunk = []
+                    else:
+                        print(f"Warning: Skipping malformed line in {MARKS_FILE}: {line}")
+            self._store_mark_lines(chunk)
         except IOError as e:
             print(f"Error loading marks: {e}")
         except Exception as e:
             print(f"Error processing {MARKS_FILE}: {e}")
 
+    def _store_mark_lines(self, chunk):
+        """Parses the marks of [(line, [course_id, student_id, mark_str]), ...] in one numpy pass and stores them."""
+        if not chunk: return
+        mark_strs = [parts[2] for _, parts in chunk]
+        try:
+            marks = np.array(mark_strs, dtype=np.float64) # Same syntax as float()
+        except ValueError: # Some invalid marks: parse this chunk one by one
+            marks = np.array([_float_or_nan(mark_str) for mark_str in mark_strs], dtype=np.float64)
+        tenths = np.rint(marks * 10) # Rounds half to even, like mark_to_tenths()
+        valid = np.isfinite(tenths) & (np.abs(tenths) <= np.iinfo(np.int32).max)
+        tenths = np.where(valid, tenths, 0).astype(np.int64)
+        for (line, (course_id, student_id, _)), mark_tenths, ok in zip(chunk, tenths.tolist(), valid.tolist()):
+            if ok:
+                self.marks.set_tenths(course_id, student_id, mark_tenths)
+            else:
+                print(f"Warning: Skipping invalid mark in {MARKS_FILE}: {line}")
 
-    def _compress_data(self, stdscr=None):
-        """Compresses the data files into students.dat using zip."""
-        files_to_compress = [STUDENTS_FILE, COURSES_FILE, MARKS_FILE]
-        # Optional: Check if files exist before trying to compress
-        existing_files = [f for f in files_to_compress if os.path.exists(f)]
-
-        if not existing_files:
-             if stdscr: ui.display_message(stdscr, "No data files found to compress.", color_pair=3, wait=True)
-             else: print("No data files found to compress.")
-             return
 
+    def _compress_data(self, stdscr=None):
+        """Saves the data into students.dat (and the plain txt files if EXPORT_TXT is set)."""
         try:
             # Display message in curses if stdscr provided
             if stdscr: ui.display_message(stdscr, f"Compressing data to {ARCHIVE_FILE}...", wait=False)
 
-            with zipfile.ZipFile(ARCHIVE_FILE, 'w', compression=zipfile.ZIP_DEFLATED) as zipf:
-                for file in existing_files:
-                    zipf.write(file, arcname=os.path.basename(file)) # Use basename to avoid storing full path
-
-            # Optional: Remove the original .txt files after successful compression
-            # for file in existing_files:
-            #     os.remove(file)
+            self._write_archive()
+            if EXPORT_TXT: # Plain-text copies, only when asked for
+                self._save_students_to_txt()
+                self._save_courses_to_txt()
+                self._save_marks_to_txt()
 
             if stdscr: ui.display_message(stdscr, "Data compressed successfully. Press key.", wait=True) # Update message
             else: print("Data compressed successfully.")
@@ -184,19 +253,20 @@ class Application:
         """Checks for students.dat, decompresses, and loads data."""
         if os.path.exists(ARCHIVE_FILE):
             try:
-                if stdscr: ui.display_message(stdscr, f"Found {ARCHIVE_FILE}. Decompressing...", wait=False)
-                else: print(f"Found {ARCHIVE_FILE}. Decompressing...")
+                if stdscr: ui.display_message(stdscr, f"Found {ARCHIVE_FILE}. Loading data...", wait=False)
+                else: print(f"Found {ARCHIVE_FILE}. Loading data...")
 
+                # Each member is decompressed as it is parsed, line by line: nothing is
+                # extracted to disk and only one line (or marks chunk) is held at a time
                 with zipfile.ZipFile(ARCHIVE_FILE, 'r') as zipf:
-                    zipf.extractall() # Extract all files to current directory
-
-                if stdscr: ui.display_message(stdscr, "Decompression complete. Loading data...", wait=False)
-                else: print("Decompression complete. Loading data...")
-
-                # Load data from extracted files
-                self._load_students_from_txt()
-                self._load_courses_from_txt()
-                self._load_marks_from_txt()
+                    members = set(zipf.namelist())
+                    for name, load in ((STUDENTS_FILE, self._load_students_from_txt),
+                                       (COURSES_FILE, self._load_courses_from_txt),
+                                       (MARKS_FILE, self._load_marks_from_txt)):
+                        if name not in members: continue # Not saved yet, nothing to load
+                        with zipf.open(name) as member, io.TextIOWrapper(member, encoding="utf-8") as f:
+                            load(f)
+                self._invalidate_gpas() # Fresh data, GPAs need a full recompute
 
                 if stdscr: ui.display_message(stdscr, "Data loaded successfully. Press key.", wait=True)
                 else: print("Data loaded successfully.")
@@ -205,7 +275,7 @@ class Application:
                 if stdscr: ui.display_message(stdscr, f"Error: {ARCHIVE_FILE} is corrupted or not a zip file.", color_pair=2, wait=True)
                 else: print(f"Error: {ARCHIVE_FILE} is corrupted or not a zip file.")
             except FileNotFoundError as e:
-                 # This might happen if a file listed inside zip doesn't extract correctly
+                 # This might happen if the archive disappears between the check and the open
                  if stdscr: ui.display_message(stdscr, f"Error extracting file: {e}", color_pair=2, wait=True)
                  else: print(f"Error extracting file: {e}")
             except IOError as e:
@@ -223,30 +293,24 @@ class Application:
     # --- Helper Methods (Keep existing ones like find_*, get_*_ids) ---
     def find_student_by_id(self, student_id):
         # ... (keep existing code) ...
-        for student in self.students:
-            if student.id == student_id:
-                return student
-        return None
+        return self.students.get(student_id) # O(1) index lookup
 
     def find_course_by_id(self, course_id):
         # ... (keep existing code) ...
-        for course in self.courses:
-            if course.id == course_id:
-                return course
-        return None
+        return self.courses.get(course_id)
 
     def get_student_ids(self):
-         return {s.id for s in self.students}
+         return self.students.ids() # Live view, stays current as students are added
 
     def get_course_ids(self):
-         return {c.id for c in self.courses}
+         return self.courses.ids()
 
     # --- Data Manipulation Methods (Keep existing add_*, calculate_*, etc.) ---
     def add_student(self, student_id, name, dob):
         # ... (keep existing code, maybe call save?) ...
         if not self.find_student_by_id(student_id):
-             self.students.append(Student(student_id, name, dob))
-             self._invalidate_gpas() # Invalidate GPAs when student list changes
+             self.students.add(Student(student_id, name, dob))
+             self.gpa_tracker.mark_dirty(student_id) # Only the new student needs computing
              # Decide if save should happen here or after bulk input
              # self._save_students_to_txt() # SAVING HERE MIGHT BE INEFFICIENT
              return True
@@ -255,25 +319,72 @@ class Application:
     def add_course(self, course_id, name, credits):
          # ... (keep existing code, maybe call save?) ...
          if not self.find_course_by_id(course_id):
-              self.courses.append(Course(course_id, name, credits))
-              self._invalidate_gpas()
+              self.courses.add(Course(course_id, name, credits))
+              # Marks already entered for this course start counting now
+              for student_id in self.marks.marks_for_course(course_id): self.gpa_tracker.mark_dirty(student_id)
               # self._save_courses_to_txt() # SAVING HERE MIGHT BE INEFFICIENT
               return True
          return False
 
     def add_mark(self, course_id, student_id, mark):
          # ... (keep existing code, maybe call save?) ...
-         if course_id not in self.marks:
-              self.marks[course_id] = {}
-         self.marks[course_id][student_id] = mark
-         self._invalidate_gpas() # Marks changed, GPAs need recalculation
+         tenths = mark_to_tenths(mark) # Stored and summed as integer tenths
+         old_tenths = self.marks.set_tenths(course_id, student_id, tenths) # Updates both views
+         self._update_student_gpa(course_id, student_id, old_tenths, tenths) # O(1) instead of invalidating everyone
          # Save happens after *all* marks for a course are input
 
+    # --- Bulk imports (one validation pass, one GPA invalidation per call) ---
+    # Rows are iterables of tuples; column arrays can be passed as zip(ids, names, dobs).
+    # Each method returns (number_added, errors) with errors as [(row_index, message), ...].
+    def add_students_bulk(self, rows):
+         valid, errors = data_input.validate_student_rows(rows, self.students.ids())
+         for student_id, name, dob in valid:
+              self.students.add(Student(student_id, name, dob))
+         self._invalidate_students(student_id for student_id, _, _ in valid)
+         return len(valid), errors
+
+    def add_courses_bulk(self, rows):
+         valid, errors = data_input.validate_course_rows(rows, self.courses.ids())
+         affected = set()
+         for course_id, name, credits in valid:
+              self.courses.add(Course(course_id, name, credits))
+              affected.update(self.marks.marks_for_course(course_id)) # Marks already entered start counting now
+         self._invalidate_students(affected)
+         return len(valid), errors
+
+    def add_marks_bulk(self, rows):
+         valid, errors = data_input.validate_mark_rows(rows) # Marks may be strings or numbers
+         for course_id, student_id, tenths in valid:
+              self.marks.set_tenths(course_id, student_id, tenths)
+         self._invalidate_students(student_id for _, student_id, _ in valid)
+         return len(valid), errors
+
+    def _invalidate_students(self, student_ids):
+         """Flags a batch of students for recomputation by the next calculate_all_gpas()."""
+         student_ids = set(student_ids)
+         if not student_ids: return
+         self.gpa_tracker.invalidate_students(student_ids, len(self.students))
+         if self.gpa_tracker.all_dirty:
+              for student in self.students: student.gpa = None
+              return
+         for student_id in student_ids:
+              student = self.find_student_by_id(student_id)
+              if student: student.gpa = None
+
     # --- GPA and Sorting (Keep existing methods) ---
+    def _update_student_gpa(self, course_id, student_id, old_tenths, new_tenths):
+         """Patches one student's running GPA totals after a mark change."""
+         course = self.find_course_by_id(course_id)
+         if not course: return # Mark only counts once its course exists
+         gpa = self.gpa_tracker.update_mark(student_id, course.credits, old_tenths, new_tenths)
+         student = self.find_student_by_id(student_id)
+         if student: student.gpa = gpa
+
     def _invalidate_gpas(self):
          # ... (keep existing code) ...
          for student in self.students:
               student.gpa = None
+         self.gpa_tracker.invalidate_all()
 
     def calculate_student_gpa(self, student_id):
         # ... (keep existing code) ...
@@ -283,18 +394,14 @@ class Application:
         student_marks_values = []
         corresponding_credits = []
 
-        for course_id, marks_dict in self.marks.items():
-            if student_id in marks_dict:
-                course = self.find_course_by_id(course_id)
-                if course:
-                    student_marks_values.append(marks_dict[student_id])
-                    corresponding_credits.append(course.credits)
+        for course, tenths in self.marks.transcript_tenths(student_id, self.courses): # Only this student's marks, as integer tenths
+            student_marks_values.append(tenths); corresponding_credits.append(course.credits)
 
         if not student_marks_values:
             student.gpa = 0.0
             return 0.0
 
-        marks_arr = np.array(student_marks_values)
+        marks_arr = np.array(student_marks_values, dtype=np.int64)
         credits_arr = np.array(corresponding_credits)
         total_credits = np.sum(credits_arr)
 
@@ -302,7 +409,7 @@ class Application:
             student.gpa = 0.0
             return 0.0
 
-        gpa = np.sum(marks_arr * credits_arr) / total_credits
+        gpa = np.sum(marks_arr * credits_arr) / (total_credits * 10) # Exact integer sum, one division
         student.gpa = gpa
         return gpa
 
@@ -310,13 +417,26 @@ class Application:
     def calculate_all_gpas(self):
          # ... (keep existing code) ...
          if not self.students: return
-         for student in self.students:
-             self.calculate_student_gpa(student.id)
+         # Only dirty students are recomputed; a full matrix reduction happens after (re)loading
+         self.gpa_tracker.refresh(self.students, self.courses, self.marks)
 
     def get_sorted_students_by_gpa(self):
          # ... (keep existing code) ...
          self.calculate_all_gpas()
-         return sorted(self.students, key=lambda s: s.gpa if s.gpa is not None else -1, reverse=True)
+         # Ranking index is kept in order as GPAs change, no full re-sort here
+         return self.gpa_tracker.ranking.ordered()
+
+    def get_top_students(self, k):
+         self.calculate_all_gpas()
+         return self.gpa_tracker.ranking.top_k(k)
+
+    def get_bottom_students(self, k):
+         self.calculate_all_gpas()
+         return self.gpa_tracker.ranking.bottom_k(k)
+
+    def get_student_rank(self, student_id):
+         self.calculate_all_gpas()
+         return self.gpa_tracker.ranking.rank_of(student_id)
 
     # --- Curses Interaction Methods ---
     # Modify these to call save methods *after* the input loops finish
@@ -356,7 +476,6 @@ class Application:
 
                 # If all details seem okay
                 if self.add_student(s_id, s_name, s_dob):
-                     existing_ids.add(s_id) # Update existing IDs for next check
                      added_count += 1
                      # ui.display_message(stdscr, f"Student {s_id} added.", wait=True, color_pair=1) # Message per student might be too much
                 else:
@@ -365,7 +484,7 @@ class Application:
                 break # Move to next student
         # --- Save AFTER the loop ---
         if added_count > 0:
-             self._save_students_to_txt()
+             self._save_archive(STUDENTS_FILE)
              ui.display_message(stdscr, f"{added_count} student(s) added and saved. Press key.", wait=True)
         else:
              ui.display_message(stdscr, "No new students added. Press key.", wait=True)
@@ -407,14 +526,13 @@ class Application:
 
                 # If all details okay
                 if self.add_course(c_id, c_name, c_credits):
-                    existing_ids.add(c_id)
                     added_count += 1
                 else:
                      ui.display_message(stdscr, f"Failed to add course {c_id}. Might already exist.", wait=True, color_pair=2)
                 break # Move to next course
         # --- Save AFTER the loop ---
         if added_count > 0:
-            self._save_courses_to_txt()
+            self._save_archive(COURSES_FILE)
             ui.display_message(stdscr, f"{added_count} course(s) added and saved. Press key.", wait=True)
         else:
              ui.display_message(stdscr, "No new courses added. Press key.", wait=True)
@@ -470,7 +588,7 @@ class Application:
 
          # --- Save AFTER the loop ---
          if marks_entered:
-             self._save_marks_to_txt() # Overwrites marks file with current state
+             self._save_archive(MARKS_FILE) # Replaces the marks member with the current state
              ui.display_message(stdscr, f"Marks input complete for {selected_course.id} and saved. Press key.", wait=True)
          else:
               ui.display_message(stdscr, f"No marks were entered for {selected_course.id}. Press key.", wait=True)
@@ -556,9 +674,6 @@ class Application:
                 # --- EXIT LOGIC ---
                 elif action_row == len(menu_options) - 1: # Exit
                     ui.display_message(stdscr, "Saving data before exiting...", wait=False)
-                    self._save_students_to_txt()
-                    self._save_courses_to_txt()
-                    self._save_marks_to_txt()
                     # Pass stdscr so compress can show messages
                     self._compress_data(stdscr)
                     # Short delay before final exit message
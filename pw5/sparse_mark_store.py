@@ -0,0 +1,253 @@
+# pw5/sparse_mark_store.py
+import numpy as np
+
+from .mark_store import mark_to_tenths
+
+# Sparse (CSR/CSC) mark store.
+# Students usually take a handful of a large catalog of courses, so the marks
+# are kept as compressed sparse rows: one row per student, with sorted course
+# column indices and mark tenths in flat arrays. A course-major (CSC) view is
+# derived from it on demand for per-course slices (mark sheets).
+# Same interface as MarkStore, so the apps and the GPA engine can use either.
+#
+# Overwriting an existing mark patches the values array in place. New marks are
+# buffered; reads combine the buffer with the arrays, and the buffer is merged
+# (one sort) only once it grows past a fraction of the stored marks, so entering
+# marks one by one does not re-sort everything on each screen refresh. The buffer
+# is indexed both by row and by column, so a student's or a course's pending
+# marks are found without scanning the others.
+#
+# snapshot() shares the arrays with a read-only store. Merges always build new
+# arrays; the one in-place write (overwriting a mark) copies the values array
+# first if a snapshot may still be reading it.
+
+_MIN_MERGE = 1024 # Pending marks tolerated before merging, at least
+
+class SparseMarkStore:
+    """Marks stored as CSR arrays (student rows x course columns) with a lazy CSC view."""
+    def __init__(self):
+        self._student_ids = []  # Row -> student ID
+        self._student_rows = {} # {student_id: row}
+        self._course_ids = []   # Column -> course ID
+        self._course_cols = {}  # {course_id: column}
+        # CSR arrays: marks of row r are at positions indptr[r]:indptr[r + 1], sorted by column
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._cols = np.zeros(0, dtype=np.int32)
+        self._tenths = np.zeros(0, dtype=np.int32)
+        # Marks not merged into the arrays yet, indexed both ways
+        self._pending_rows = {} # {row: {col: tenths}}
+        self._pending_cols = {} # {col: {row: tenths}}
+        self._pending_count = 0
+        self._csc = None   # (indptr, rows, csr_positions) course-major view, rebuilt after merges
+        self._shared = False # True while a snapshot shares self._tenths
+
+    @classmethod
+    def from_dict(cls, marks_dict):
+        """Builds a store from the {course_id: {student_id: mark}} save format in one pass."""
+        store = cls()
+        rows, cols, tenths = [], [], []
+        for course_id, course_marks in marks_dict.items():
+            col = store._col_for(course_id)
+            for student_id, mark in course_marks.items():
+                rows.append(store._row_for(student_id))
+                cols.append(col)
+                tenths.append(mark_to_tenths(mark))
+        store._build(np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int32), np.array(tenths, dtype=np.int32))
+        return store
+
+    @classmethod
+    def from_csr(cls, student_ids, course_ids, indptr, cols, tenths):
+        """Adopts CSR arrays as they are, without copying (e.g. memory-mapped columns).
+
+        Columns must be sorted within each row and `cols`/`tenths` writable
+        (copy-on-write maps are), since overwriting a mark patches them in place.
+        """
+        store = cls()
+        for student_id in student_ids: store._row_for(student_id)
+        for course_id in course_ids: store._col_for(course_id)
+        store._indptr, store._cols, store._tenths = indptr, cols, tenths
+        return store
+
+    def to_dict(self):
+        """Returns the marks in the {course_id: {student_id: mark}} save format (a fresh copy)."""
+        return {course_id: self.marks_for_course(course_id) for course_id in self._course_ids}
+
+    def snapshot(self):
+        """Returns a read-only store of the current marks, sharing the CSR arrays (no mark is copied)."""
+        snap = type(self).__new__(type(self))
+        snap._student_ids = list(self._student_ids)
+        snap._student_rows = self._student_rows # Only appended to; rows added later are not in the snapshot's arrays
+        snap._course_ids, snap._course_cols = list(self._course_ids), dict(self._course_cols)
+        snap._indptr, snap._cols, snap._tenths = self._indptr, self._cols, self._tenths
+        snap._pending_rows = {row: dict(marks) for row, marks in self._pending_rows.items()}
+        snap._pending_cols = {col: dict(marks) for col, marks in self._pending_cols.items()}
+        snap._pending_count = self._pending_count
+        snap._csc = self._csc
+        snap._shared = True
+        self._shared = True
+        return snap
+
+    # --- Internal layout ---
+    def _row_for(self, student_id):
+        row = self._student_rows.get(student_id)
+        if row is None:
+            row = self._student_rows[student_id] = len(self._student_ids)
+            self._student_ids.append(student_id)
+        return row
+
+    def _col_for(self, course_id):
+        col = self._course_cols.get(course_id)
+        if col is None:
+            col = self._course_cols[course_id] = len(self._course_ids)
+            self._course_ids.append(course_id)
+        return col
+
+    def _csr_rows(self):
+        """Row index of every stored mark (the COO form of the CSR arrays)."""
+        return np.repeat(np.arange(len(self._indptr) - 1, dtype=np.int64), np.diff(self._indptr))
+
+    def _build(self, rows, cols, tenths):
+        order = np.lexsort((cols, rows)) # By row, then column
+        self._cols, self._tenths = cols[order], tenths[order]
+        counts = np.bincount(rows, minlength=len(self._student_ids))
+        self._indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self._csc = None
+        self._shared = False
+
+    def _merge_pending(self):
+        if not self._pending_count: return
+        new_rows, new_cols, new_tenths = zip(*((row, col, tenths) for row, marks in self._pending_rows.items()
+                                               for col, tenths in marks.items()))
+        self._build(np.concatenate((self._csr_rows(), np.array(new_rows, dtype=np.int64))),
+                    np.concatenate((self._cols, np.array(new_cols, dtype=np.int32))),
+                    np.concatenate((self._tenths, np.array(new_tenths, dtype=np.int32))))
+        self._pending_rows, self._pending_cols, self._pending_count = {}, {}, 0
+
+    def _maybe_merge(self):
+        if self._pending_count > max(_MIN_MERGE, len(self._cols) // 64): self._merge_pending()
+
+    def _csc_view(self):
+        self._maybe_merge()
+        if self._csc is None:
+            csr_positions = np.lexsort((self._csr_rows(), self._cols)) # By column, then row
+            counts = np.bincount(self._cols, minlength=len(self._course_ids))
+            indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+            self._csc = (indptr, self._csr_rows()[csr_positions], csr_positions)
+        return self._csc
+
+    def _position(self, row, col):
+        """Position of (row, col) in the CSR arrays, or None. Binary search within the row."""
+        if row + 1 >= len(self._indptr): return None
+        start, end = self._indptr[row], self._indptr[row + 1]
+        position = start + int(np.searchsorted(self._cols[start:end], col))
+        return position if position < end and self._cols[position] == col else None
+
+    # --- MarkStore interface ---
+    def set_tenths(self, course_id, student_id, tenths):
+        """Adds or overwrites a mark (in tenths). Returns the previous tenths (or None)."""
+        row, col = self._row_for(student_id), self._col_for(course_id)
+        position = self._position(row, col)
+        if position is not None:
+            old_tenths = int(self._tenths[position])
+            if self._shared: # A snapshot still reads these values
+                self._tenths, self._shared = self._tenths.copy(), False
+            self._tenths[position] = tenths # CSC view reads values through CSR positions, stays valid
+            return old_tenths
+        row_marks = self._pending_rows.setdefault(row, {})
+        old_tenths = row_marks.get(col)
+        row_marks[col] = tenths
+        self._pending_cols.setdefault(col, {})[row] = tenths
+        if old_tenths is None: self._pending_count += 1
+        return old_tenths
+
+    def set(self, course_id, student_id, mark):
+        """Adds or overwrites a mark given as a float. Returns the previous tenths (or None)."""
+        return self.set_tenths(course_id, student_id, mark_to_tenths(mark))
+
+    def get_tenths(self, course_id, student_id, default=None):
+        row, col = self._student_rows.get(student_id), self._course_cols.get(course_id)
+        if row is None or col is None: return default
+        tenths = self._pending_rows.get(row, {}).get(col)
+        if tenths is not None: return tenths
+        position = self._position(row, col)
+        return int(self._tenths[position]) if position is not None else default
+
+    def get(self, course_id, student_id, default=None):
+        tenths = self.get_tenths(course_id, student_id)
+        return tenths / 10 if tenths is not None else default
+
+    def course_column(self, course_id):
+        """Returns (student IDs, tenths array) of one course: a slice of the CSC view."""
+        col = self._course_cols.get(course_id)
+        if col is None: return [], np.zeros(0, dtype=np.int32)
+        indptr, rows, csr_positions = self._csc_view()
+        if col + 1 < len(indptr):
+            start, end = indptr[col], indptr[col + 1]
+            rows, tenths = rows[start:end].tolist(), self._tenths[csr_positions[start:end]]
+        else: # Course only has pending marks
+            rows, tenths = [], np.zeros(0, dtype=np.int32)
+        pending = self._pending_cols.get(col)
+        if pending:
+            rows = rows + list(pending)
+            tenths = np.concatenate((tenths, np.array(list(pending.values()), dtype=np.int32)))
+        return [self._student_ids[row] for row in rows], tenths
+
+    def marks_for_course(self, course_id):
+        """Returns {student_id: mark} for one course."""
+        student_ids, tenths = self.course_column(course_id)
+        return {student_id: t / 10 for student_id, t in zip(student_ids, tenths.tolist())}
+
+    def _row_slice(self, student_id):
+        """Returns (course IDs, tenths list) of one student, in course registration order."""
+        self._maybe_merge()
+        row = self._student_rows.get(student_id)
+        if row is None: return [], []
+        entries = []
+        if row + 1 < len(self._indptr):
+            start, end = self._indptr[row], self._indptr[row + 1]
+            entries = list(zip(self._cols[start:end].tolist(), self._tenths[start:end].tolist()))
+        pending = self._pending_rows.get(row)
+        if pending: entries = sorted(entries + list(pending.items()))
+        return [self._course_ids[col] for col, _ in entries], [t for _, t in entries]
+
+    def marks_for_student(self, student_id):
+        """Returns {course_id: mark} for one student."""
+        course_ids, tenths = self._row_slice(student_id)
+        return {course_id: t / 10 for course_id, t in zip(course_ids, tenths)}
+
+    def transcript_tenths(self, student_id, courses):
+        """Returns [(course, tenths), ...] for one student; marks for unknown courses are left out."""
+        transcript = []
+        for course_id, tenths in zip(*self._row_slice(student_id)):
+            course = courses.get(course_id)
+            if course: transcript.append((course, tenths))
+        return transcript
+
+    def transcript(self, student_id, courses):
+        """Returns [(course, mark), ...] for one student, in course registration order."""
+        return [(course, tenths / 10) for course, tenths in self.transcript_tenths(student_id, courses)]
+
+    def iter_tenths(self):
+        """Yields (course_id, student_id, tenths) for every mark, course by course."""
+        for course_id in self._course_ids:
+            student_ids, tenths = self.course_column(course_id)
+            yield from ((course_id, student_id, t) for student_id, t in zip(student_ids, tenths.tolist()))
+
+    def iter_marks(self):
+        """Yields (course_id, student_id, mark) for every mark, course by course."""
+        for course_id, student_id, tenths in self.iter_tenths():
+            yield course_id, student_id, tenths / 10
+
+    def coo(self):
+        """Returns (student_ids, course_ids, rows, cols, tenths) without copying the mark arrays.
+
+        rows/cols index into the two ID lists; used by the GPA engine's O(nnz) reduction.
+        """
+        self._merge_pending()
+        return self._student_ids, self._course_ids, self._csr_rows(), self._cols, self._tenths
+
+    def course_ids(self):
+        return self._course_cols.keys()
+
+    def __len__(self):
+        return len(self._cols) + self._pending_count # Pending marks are always new entries
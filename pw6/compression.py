@@ -0,0 +1,152 @@
+# pw6/compression.py
+import io
+import os
+import sys
+import bz2
+import gzip
+import lzma
+import time
+import struct
+
+# Pluggable codec for the pickle save file.
+# A codec is written as "name" or "name:level": "none", "zlib:1" .. "zlib:9",
+# "bz2:1" .. "bz2:9" or "lzma:0" .. "lzma:9" (the app default is "zlib:9", what
+# gzip.open() always used). zlib saves are plain gzip files, as before: the gzip
+# magic bytes already identify them. The other codecs start with a small
+# header (magic, codec id, level), so loading detects the codec by itself.
+#
+# `python -m pw6.compression [save file]` compares every codec on that save.
+
+CODEC_IDS = {'none': 0, 'zlib': 1, 'bz2': 2, 'lzma': 3}
+CODEC_NAMES = {codec_id: name for name, codec_id in CODEC_IDS.items()}
+LEVELS = {'none': range(0, 1), 'zlib': range(1, 10), 'bz2': range(1, 10), 'lzma': range(0, 10)}
+DEFAULT_LEVELS = {'none': 0, 'zlib': 9, 'bz2': 9, 'lzma': 6}
+
+_MAGIC = b"PWSAVE\x01"
+_HEADER = struct.Struct(f'<{len(_MAGIC)}sBB') # Magic + version, codec id, level
+_GZIP_MAGIC = b"\x1f\x8b"
+
+# Codecs compared by the benchmark command
+BENCHMARK_CODECS = ("none", "zlib:1", "zlib:6", "zlib:9", "bz2:1", "bz2:9", "lzma:0", "lzma:6")
+
+def parse_codec(spec):
+    """Returns (name, level) for a codec spec like "bz2:9" or "lzma". Raises ValueError if unknown."""
+    name, _, level = spec.strip().lower().partition(':')
+    if name not in CODEC_IDS:
+        raise ValueError(f"Unknown codec {name!r} (expected one of {', '.join(CODEC_IDS)})")
+    try:
+        level = int(level) if level else DEFAULT_LEVELS[name]
+    except ValueError:
+        raise ValueError(f"Invalid level in codec {spec!r}") from None
+    if level not in LEVELS[name]:
+        raise ValueError(f"Level {level} out of range for codec {name}")
+    return name, level
+
+class _CodecStream:
+    """A codec stream over a raw file; closing it also closes the raw file if it was opened here."""
+    def __init__(self, stream, raw, owns_raw):
+        self._stream, self._raw, self._owns_raw = stream, raw, owns_raw
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        try:
+            if self._stream is not self._raw: self._stream.close()
+        finally:
+            if self._owns_raw: self._raw.close()
+
+def _wrap(raw, mode, name, level):
+    if name == 'zlib': return gzip.GzipFile(fileobj=raw, mode=mode) # Only read here: zlib saves are written by gzip_open
+    if name == 'bz2': return bz2.BZ2File(raw, mode, compresslevel=level)
+    if name == 'lzma': return lzma.LZMAFile(raw, mode, preset=level if 'w' in mode else None)
+    return raw
+
+def open_save(path, mode='rb', codec=('zlib', 9), gzip_open=gzip.open):
+    """Opens a save file: for reading with the codec detected, or for writing ('wb') with `codec`.
+
+    `path` may also be a binary file object. zlib saves are written with
+    gzip_open(path, 'wb', compresslevel=level), e.g. parallel_gzip.ParallelGzipFile.
+    """
+    owns_file = isinstance(path, (str, bytes, os.PathLike))
+    if mode == 'wb':
+        name, level = codec
+        if name == 'zlib':
+            return gzip_open(path, 'wb', compresslevel=level)
+        raw = open(path, 'wb') if owns_file else path
+        raw.write(_HEADER.pack(_MAGIC, CODEC_IDS[name], level))
+    elif mode == 'rb':
+        raw = open(path, 'rb') if owns_file else path
+        name, level = _read_header(raw)
+    else:
+        raise ValueError(f"Unsupported mode {mode!r}")
+    return _CodecStream(_wrap(raw, mode, name, level), raw, owns_file)
+
+def _read_header(raw):
+    """Reads the codec header (or recognizes a plain gzip file). Returns (name, level)."""
+    start = raw.tell()
+    head = raw.read(_HEADER.size)
+    if head[:len(_GZIP_MAGIC)] == _GZIP_MAGIC:
+        raw.seek(start)
+        return 'zlib', None
+    if len(head) == _HEADER.size:
+        magic, codec_id, level = _HEADER.unpack(head)
+        if magic == _MAGIC and codec_id in CODEC_NAMES:
+            return CODEC_NAMES[codec_id], level
+    raise ValueError("Not a save file (unknown compression header)")
+
+def detect_codec(path):
+    """Returns (name, level) of a save file; level is None for zlib (not recorded)."""
+    with open(path, 'rb') as raw:
+        return _read_header(raw)
+
+# --- Comparison harness ---
+def benchmark(payload, codecs=BENCHMARK_CODECS):
+    """Compresses and decompresses `payload` (bytes) with each codec.
+
+    Returns [(codec, compressed size, compress seconds, decompress seconds), ...].
+    """
+    results = []
+    for spec in codecs:
+        codec = parse_codec(spec)
+        buffer = io.BytesIO()
+        started = time.perf_counter()
+        with open_save(buffer, 'wb', codec) as f:
+            f.write(payload)
+        compress_seconds = time.perf_counter() - started
+        compressed = buffer.getvalue()
+        started = time.perf_counter()
+        with open_save(io.BytesIO(compressed)) as f:
+            restored = f.read()
+        decompress_seconds = time.perf_counter() - started
+        if restored != payload:
+            raise ValueError(f"Codec {spec} did not round-trip")
+        results.append((spec, len(compressed), compress_seconds, decompress_seconds))
+    return results
+
+def print_benchmark(path):
+    """Decompresses a save file and prints the comparison table for its pickled data."""
+    with open_save(path) as f:
+        payload = f.read() # The pickled checkpoint, exactly as a save writes it
+    name, level = detect_codec(path)
+    print(f"{path}: {os.path.getsize(path)} bytes on disk ({name}{'' if level is None else f':{level}'}), "
+          f"{len(payload)} bytes pickled")
+    print(f"{'Codec':<8} {'Size':>12} {'Ratio':>7} {'Compress':>10} {'MB/s':>8} {'Decompress':>11} {'MB/s':>8}")
+    megabytes = len(payload) / 1e6
+    for spec, size, compress_seconds, decompress_seconds in benchmark(payload):
+        print(f"{spec:<8} {size:>12} {len(payload) / max(size, 1):>7.2f} "
+              f"{compress_seconds:>9.3f}s {megabytes / max(compress_seconds, 1e-9):>8.1f} "
+              f"{decompress_seconds:>10.3f}s {megabytes / max(decompress_seconds, 1e-9):>8.1f}")
+
+if __name__ == "__main__":
+    save_path = sys.argv[1] if len(sys.argv) > 1 else "student_data.pkl.gz"
+    if not os.path.exists(save_path):
+        print(f"Save file {save_path} not found.")
+        sys.exit(1)
+    print_benchmark(save_path)
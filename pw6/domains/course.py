@@ -1,6 +1,8 @@
 # pw4/domains/course.py
 class Course:
     """Represents a course with ID, name, and credits."""
+    __slots__ = ('id', 'name', 'credits') # No per-instance __dict__
+
     def __init__(self, course_id, name, credits):
         self.id = course_id
         self.name = name
@@ -14,6 +16,13 @@ class Course:
             print(f"Warning: Invalid credits value for course {course_id}. Set to 1.")
             self.credits = 1
 
+    def __setstate__(self, state):
+        """Restores pickled courses, including files saved before __slots__ (plain __dict__ state)."""
+        if isinstance(state, tuple): # (__dict__ state, slots state)
+            state = {**(state[0] or {}), **(state[1] or {})}
+        for key, value in state.items():
+            if key in self.__slots__: setattr(self, key, value)
+
     def __str__(self):
         return f"ID: {self.id}, Name: {self.name}, Credits: {self.credits}"
 
@@ -0,0 +1,158 @@
+# pw4/domains/tables.py
+from array import array
+import math
+
+from .student import Student
+from .course import Course
+
+# Optional columnar (struct-of-arrays) storage for very large cohorts.
+# Each field lives in one list/typed array instead of one object per student;
+# rows are handed out as tiny views that behave like Student/Course objects.
+
+class StudentRow:
+    """Lightweight view of one row of a StudentTable (reads/writes go to the table)."""
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    @property
+    def id(self): return self._table.ids[self._row]
+
+    @property
+    def name(self): return self._table.names[self._row]
+
+    @property
+    def dob(self): return self._table.dobs[self._row]
+
+    @property
+    def gpa(self):
+        value = self._table.gpas[self._row]
+        return None if math.isnan(value) else value
+
+    @gpa.setter
+    def gpa(self, value):
+        self._table.gpas[self._row] = float(value) if value is not None else math.nan
+
+    # Same formatting as Student, so display code works unchanged
+    __str__ = Student.__str__
+    get_display_info = Student.get_display_info
+
+
+class StudentTable:
+    """Students stored column by column: IDs, names, DoBs and GPAs (NaN = not calculated)."""
+    def __init__(self):
+        self.ids = []
+        self.names = []
+        self.dobs = []
+        self.gpas = array('d') # 8 bytes per GPA, no float objects
+        self._index = {} # {student_id: row}
+
+    @classmethod
+    def from_students(cls, students):
+        table = cls()
+        for student in students:
+            table.append(student.id, student.name, student.dob, student.gpa)
+        return table
+
+    def append(self, student_id, name, dob, gpa=None):
+        """Adds a row and returns its view. Returns None if the ID already exists."""
+        if student_id in self._index: return None
+        self._index[student_id] = len(self.ids)
+        self.ids.append(student_id); self.names.append(name); self.dobs.append(dob)
+        self.gpas.append(float(gpa) if gpa is not None else math.nan)
+        return StudentRow(self, len(self.ids) - 1)
+
+    def get(self, student_id, default=None):
+        row = self._index.get(student_id)
+        return StudentRow(self, row) if row is not None else default
+
+    def to_students(self):
+        """Materializes full Student objects (e.g. for pickling in the classic save format)."""
+        students = []
+        for row in self:
+            student = Student(row.id, row.name, row.dob); student.gpa = row.gpa
+            students.append(student)
+        return students
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        if row < 0: row += len(self.ids)
+        if not 0 <= row < len(self.ids): raise IndexError("student row out of range")
+        return StudentRow(self, row)
+
+    def __iter__(self):
+        return (StudentRow(self, row) for row in range(len(self.ids)))
+
+
+class CourseRow:
+    """Lightweight view of one row of a CourseTable."""
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    @property
+    def id(self): return self._table.ids[self._row]
+
+    @property
+    def name(self): return self._table.names[self._row]
+
+    @property
+    def credits(self): return self._table.credits[self._row]
+
+    __str__ = Course.__str__
+    get_display_info = Course.get_display_info
+
+
+class CourseTable:
+    """Courses stored column by column: IDs, names and credits."""
+    def __init__(self):
+        self.ids = []
+        self.names = []
+        self.credits = array('I') # Credits are positive integers
+        self._index = {} # {course_id: row}
+
+    @classmethod
+    def from_courses(cls, courses):
+        table = cls()
+        for course in courses:
+            table.append(course.id, course.name, course.credits)
+        return table
+
+    def append(self, course_id, name, credits):
+        """Adds a row and returns its view. Returns None if the ID already exists."""
+        if course_id in self._index: return None
+        # Same clamping as Course.__init__, done before any column changes so a bad
+        # value can't leave a half-added row behind
+        try:
+            credits = int(credits)
+        except (TypeError, ValueError):
+            credits = 1
+        if credits <= 0: credits = 1
+        self.credits.append(credits) # First, so an OverflowError adds nothing
+        self._index[course_id] = len(self.ids)
+        self.ids.append(course_id); self.names.append(name)
+        return CourseRow(self, len(self.ids) - 1)
+
+    def get(self, course_id, default=None):
+        row = self._index.get(course_id)
+        return CourseRow(self, row) if row is not None else default
+
+    def to_courses(self):
+        return [Course(row.id, row.name, row.credits) for row in self]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        if row < 0: row += len(self.ids)
+        if not 0 <= row < len(self.ids): raise IndexError("course row out of range")
+        return CourseRow(self, row)
+
+    def __iter__(self):
+        return (CourseRow(self, row) for row in range(len(self.ids)))
@@ -0,0 +1,113 @@
+# pw6/fingerprint.py
+import os
+import json
+import hashlib
+import numpy as np
+
+# Content fingerprints of the saved state.
+# state_fingerprint() hashes a canonical serialization of a state: students and
+# courses in list order (the order the app shows), marks sorted by course and
+# student ID, so neither the mark store class nor insertion order changes it.
+# A checkpoint save writes the fingerprint of the state it holds to a small
+# sidecar, <checkpoint>.fingerprint, together with the signature (size and
+# mtime of each file) of the checkpoint it describes. Readers trust the sidecar
+# only while the checkpoint still has that signature, so nothing has to be
+# hashed to learn what is on disk.
+#
+# A partitioned save only rewrites its dirty segments, so its sidecar also keeps
+# a fingerprint per segment: the state's fingerprint is combined from them, and
+# a save only hashes the segments it writes (see partitions.state_fingerprint()).
+
+SIDECAR_SUFFIX = ".fingerprint"
+
+def sidecar_path(checkpoint_path):
+    return checkpoint_path + SIDECAR_SUFFIX
+
+def file_signature(path):
+    """[[relative path, size, mtime_ns], ...] of a file, or of every file in a directory ([] if missing)."""
+    if not os.path.isdir(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return []
+        return [['', stat.st_size, stat.st_mtime_ns]]
+    entries = []
+    for root, _, names in os.walk(path):
+        for name in names:
+            file_path = os.path.join(root, name)
+            stat = os.stat(file_path)
+            entries.append([os.path.relpath(file_path, path), stat.st_size, stat.st_mtime_ns])
+    return sorted(entries)
+
+def _update_repr(digest, values):
+    """Hashes repr() of a list: unambiguous (strings are quoted and escaped) and built in C."""
+    digest.update(repr(values).encode('utf-8', 'backslashreplace'))
+
+def state_fingerprint(students, courses, marks):
+    """Hex digest of a state's content (EntityStores or snapshots, and a mark store or its snapshot)."""
+    digest = hashlib.blake2b(digest_size=16)
+    _update_repr(digest, [(s.id, s.name, s.dob) for s in students])
+    _update_repr(digest, [(c.id, c.name, c.credits) for c in courses])
+    student_ids, course_ids, rows, cols, tenths = marks.coo()
+    rows, cols, tenths = (np.asarray(column, dtype=np.int64) for column in (rows, cols, tenths))
+    # Rank the IDs that have marks, so marks can be ordered by ID whatever the store's row order
+    student_rank, used_students = _id_ranks(student_ids, rows)
+    course_rank, used_courses = _id_ranks(course_ids, cols)
+    _update_repr(digest, used_students)
+    _update_repr(digest, used_courses)
+    rows, cols = student_rank[rows], course_rank[cols]
+    order = np.lexsort((rows, cols)) # By course, then student
+    for column in (cols, rows, tenths):
+        digest.update(column[order].astype('<i4').tobytes())
+    return digest.hexdigest()
+
+def value_fingerprint(value):
+    """Hex digest of a plain value (lists and tuples of strings and numbers)."""
+    digest = hashlib.blake2b(digest_size=16)
+    _update_repr(digest, value)
+    return digest.hexdigest()
+
+def combine_fingerprints(fingerprints):
+    """Hex digest of a {part name: fingerprint} dict, e.g. the segments of a partitioned save."""
+    return value_fingerprint(sorted(fingerprints.items()))
+
+def _id_ranks(ids, positions):
+    """Returns (rank of each ID among the IDs referenced by `positions`, those IDs sorted)."""
+    used = np.unique(positions)
+    used_ids = np.array([str(value) for value in ids], dtype=str)[used]
+    order = np.argsort(used_ids, kind='stable')
+    ranks = np.zeros(len(ids), dtype=np.int64)
+    ranks[used[order]] = np.arange(len(used))
+    return ranks, used_ids[order].tolist()
+
+def write_sidecar(checkpoint_path, content, segments=None):
+    """Records the content fingerprint (and per-segment fingerprints) of the checkpoint just written at `checkpoint_path`."""
+    path = sidecar_path(checkpoint_path)
+    temp_path = path + ".tmp"
+    data = {'content': content, 'signature': file_signature(checkpoint_path)}
+    if segments is not None: data['segments'] = segments
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+def _read_valid_sidecar(checkpoint_path):
+    try:
+        with open(sidecar_path(checkpoint_path), encoding='utf-8') as f:
+            data = json.load(f)
+        signature = file_signature(checkpoint_path)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or not signature or data.get('signature') != signature:
+        return None
+    return data
+
+def read_sidecar(checkpoint_path):
+    """Content fingerprint of the checkpoint on disk, or None if unknown (no sidecar, or the checkpoint changed since)."""
+    data = _read_valid_sidecar(checkpoint_path)
+    return data.get('content') if data else None
+
+def read_segment_sidecar(checkpoint_path):
+    """{segment name: fingerprint} recorded for the partitioned save on disk, or None if unknown."""
+    data = _read_valid_sidecar(checkpoint_path)
+    segments = data.get('segments') if data else None
+    return segments if isinstance(segments, dict) else None
@@ -7,79 +7,282 @@ import numpy as np
 import os
 # --- New/Changed Imports ---
 import pickle   # For serializing Python objects
-import gzip     # For compression
 
 # Import classes and functions from our modules
 from .domains import Student, Course # Relative imports are correct
 from . import input as data_input
 from . import output as ui
+from . import gpa_engine
+from .repository import EntityStore
+from .mark_store import MarkStore, mark_to_tenths
+from .sparse_mark_store import SparseMarkStore
+from .journal import MutationJournal, apply_record, write_checkpoint, read_checkpoint
+from .sqlite_store import SqliteStore, DB_FILE
+from . import columnar
+from . import compression
+from . import partitions
+from . import derived_cache
+from . import fingerprint
+from .autosave import SaveScheduler, AUTOSAVE_POLL_MS
 
 # --- New Save File Constant ---
 # Using .pkl.gz extension to indicate pickled and gzipped data
 SAVE_FILE = "student_data.pkl.gz"
+STORAGE_BACKEND = os.environ.get("STUDENT_STORAGE", "pickle") # "pickle", "sqlite", "columnar" or "partitioned"
+SAVE_CODEC = os.environ.get("STUDENT_SAVE_CODEC", "zlib:9") # SAVE_FILE codec: "none", "zlib:1".."zlib:9", "bz2:N" or "lzma:N"
+MARK_STORE = os.environ.get("STUDENT_MARK_STORE", "auto") # "dense" (MarkStore), "sparse" (SparseMarkStore) or "auto": sparse for columnar saves
+
+def default_mark_store_class(storage_backend, setting=MARK_STORE):
+    """Mark store for a backend. SparseMarkStore keeps columnar marks memory-mapped; MarkStore would copy every one."""
+    if setting == "auto": setting = "sparse" if storage_backend == "columnar" else "dense"
+    if setting not in ("dense", "sparse"):
+        raise ValueError(f"Unknown mark store {setting!r} (expected auto, dense or sparse)")
+    return SparseMarkStore if setting == "sparse" else MarkStore
 
 class Application:
-    def __init__(self):
-        self.students = []
-        self.courses = []
-        self.marks = {} # {course_id: {student_id: mark}}
+    def __init__(self, mark_store_class=None, storage_backend=STORAGE_BACKEND, save_codec=SAVE_CODEC):
+        # MarkStore, or SparseMarkStore for wide, sparsely enrolled catalogs (and the columnar backend, see MARK_STORE)
+        self.mark_store_class = mark_store_class or default_mark_store_class(storage_backend)
+        self.students = EntityStore() # Students in insertion order, indexed by ID
+        self.courses = EntityStore()
+        self.marks = self.mark_store_class() # Course-major and student-major views of the marks
+        self.gpa_tracker = gpa_engine.GpaTracker() # Running GPA totals per student
+        self.autosave = SaveScheduler() # Edit generations; says when a save is due
+        self.storage_backend = storage_backend
+        self.database = SqliteStore(DB_FILE) if storage_backend == "sqlite" else None
+        self.checkpoint_path = {"columnar": columnar.COLUMNAR_DIR, "partitioned": partitions.PARTITION_DIR}.get(storage_backend, SAVE_FILE)
+        # Edits are recorded through append()/append_many(): in the database, or in the checkpoint's journal
+        # (the partitioned journal also tracks which segments the edits dirty)
+        journal_class = partitions.PartitionedJournal if storage_backend == "partitioned" else MutationJournal
+        self.journal = self.database if self.database is not None else journal_class(self.checkpoint_path)
+        self.save_codec = compression.parse_codec(save_codec) # (name, level); loading detects the codec
+        self.disk_state = None # _disk_state() when memory last matched the saved data (after a load or save)
         # Attempt to load data using the new pickle method
         self._load_data_pickle()
 
     # --- NEW Pickle Persistence Methods ---
 
-    def _save_data_pickle(self, stdscr=None):
-        """Saves the current application state using pickle and gzip."""
-        # Bundle the data to be saved
-        data_to_save = {
-            'students': self.students,
-            'courses': self.courses,
-            'marks': self.marks
-        }
+    def _open_checkpoint(self, path, mode):
+        """Opens the pickle checkpoint with the configured codec (see compression.py)."""
+        return compression.open_save(path, mode, self.save_codec)
+
+    def _write_derived(self, state, content, segments=None):
+        """Saves the content fingerprint, GPA totals and ranking next to the checkpoint just written.
 
+        Only the shortcuts (skipped saves and reloads, warm starts) are lost if this fails.
+        """
         try:
-            if stdscr: ui.display_message(stdscr, f"Saving data to {SAVE_FILE}...", wait=False)
-            else: print(f"Saving data to {SAVE_FILE}...")
+            fingerprint.write_sidecar(self.checkpoint_path, content, segments)
+            if segments is None: # Partitioned saves skip the reduction over every mark
+                derived_cache.write_cache(self.checkpoint_path, derived_cache.compute(*state), content)
+        except Exception as e:
+            print(f"Warning: could not write the fingerprint or derived data of {self.checkpoint_path}: {e}", file=sys.stderr)
+
+    def _save_data_pickle(self, stdscr=None, wait=True):
+        """Saves the current application state using pickle and SAVE_CODEC (or commits to SQLite).
+
+        With wait=False (autosave) messages are shown without waiting for a key.
+        """
+        prompt = " Press key." if wait else ""
+        if not self.autosave.is_dirty():
+            msg = f"No changes since the last save.{prompt}"
+            if stdscr: ui.display_message(stdscr, msg, wait=wait)
+            else: print(msg)
+            return
+        self.autosave.begin() # Covers every edit so far
+        if self.database is not None:
+            # SQLite backend: every edit is already written, saving commits the transaction
+            try:
+                self.database.sync()
+                self.autosave.finish(True)
+                msg = f"Changes committed to {DB_FILE}.{prompt}"
+                if stdscr: ui.display_message(stdscr, msg, wait=wait)
+                else: print(msg)
+            except Exception as e:
+                self.autosave.finish(False)
+                msg = f"Error committing to {DB_FILE}: {e}"
+                if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=wait)
+                else: print(msg)
+            return
+
+        if not self.journal.needs_checkpoint():
+            # Every edit is already in the journal: saving just makes it durable
+            try:
+                self.journal.sync()
+                self.disk_state = self._disk_state()
+                self.autosave.finish(True)
+                msg = f"Changes saved to {self.journal.path}.{prompt}"
+                if stdscr: ui.display_message(stdscr, msg, wait=wait)
+                else: print(msg)
+            except OSError as e:
+                self.autosave.finish(False)
+                msg = f"Error writing journal {self.journal.path}: {e}"
+                if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=wait)
+                else: print(msg)
+            return
+
+        self.merge_external_changes() # The checkpoint must hold what other instances journaled so far
+        # Nothing to write if the checkpoint already holds exactly this state (its fingerprint sidecar says so)
+        state, segments = (self.students, self.courses, self.marks), None
+        if self.storage_backend == "partitioned":
+            # Only the dirty segments are copied and fingerprinted: no pass over the whole state
+            data_to_save = partitions.snapshot(*state, self.journal.take_dirty())
+            content, segments = partitions.state_fingerprint(self.checkpoint_path, state, data_to_save)
+        else:
+            content = fingerprint.state_fingerprint(*state)
+        unchanged = content == fingerprint.read_sidecar(self.checkpoint_path)
 
-            # Open a gzip-compressed file in binary write mode
-            with gzip.open(SAVE_FILE, 'wb') as f:
-                # Dump the data structure into the compressed file
-                pickle.dump(data_to_save, f, pickle.HIGHEST_PROTOCOL)
+        # Bundle the data to be saved
+        if unchanged:
+            data_to_save = None
+        elif self.storage_backend == "columnar":
+            data_to_save = columnar.snapshot(self.students, self.courses, self.marks)
+        elif self.storage_backend == "partitioned":
+            pass # The dirty segments, copied above
+        else:
+            data_to_save = {
+                'students': self.students.to_list(), # Saved as plain lists
+                'courses': self.courses.to_list(),
+                'marks': self.marks.to_dict()
+            }
 
-            if stdscr: ui.display_message(stdscr, "Data saved successfully. Press key.", wait=True)
-            else: print("Data saved successfully.")
+        try:
+            if unchanged: msg = "Saved data already up to date, nothing written."
+            else:
+                msg = "Data saved successfully."
+                if stdscr: ui.display_message(stdscr, f"Saving data to {self.checkpoint_path}...", wait=False)
+                else: print(f"Saving data to {self.checkpoint_path}...")
+
+            # Fold the journal into a new checkpoint (compressed pickle or columns, swapped in by rename)
+            with self.journal.locked(): # No other instance appends between the rotation and the carry-over
+                self.journal.rotate()
+                self._carry_over_external()
+            if data_to_save is not None:
+                if self.storage_backend == "columnar": columnar.write_columns(self.checkpoint_path, data_to_save)
+                elif self.storage_backend == "partitioned": partitions.write_partitions(self.checkpoint_path, data_to_save, self._open_checkpoint)
+                else: write_checkpoint(SAVE_FILE, data_to_save, self._open_checkpoint)
+                self._write_derived(state, content, segments)
+            self.journal.checkpoint_done()
+            self.disk_state = self._disk_state()
+            self.autosave.finish(True)
+
+            if stdscr: ui.display_message(stdscr, f"{msg}{prompt}", wait=wait)
+            else: print(msg)
 
         except pickle.PicklingError as e:
+            self.autosave.finish(False)
             msg = f"Error pickling data: {e}"
-            if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=True)
+            if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=wait)
             else: print(msg)
         except IOError as e:
+            self.autosave.finish(False)
             msg = f"Error writing save file {SAVE_FILE}: {e}"
-            if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=True)
+            if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=wait)
             else: print(msg)
         except Exception as e:
+            self.autosave.finish(False)
             msg = f"An unexpected error occurred during saving: {e}"
-            if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=True)
+            if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=wait)
             else: print(msg)
 
 
+    # --- Changes from Other Instances ---
+    def merge_external_changes(self):
+        """Applies the edits other instances journaled since the last call. Called periodically from the menu loop.
+
+        Only the entities those records touch change, and only the affected GPAs
+        are invalidated. Returns the number of records that changed something.
+        """
+        if self.database is not None: return 0
+        try:
+            records = self.journal.follow()
+        except OSError as e:
+            print(f"Error reading journal {self.journal.path}: {e}", file=sys.stderr)
+            return 0
+        return self._merge_records(records)
+
+    def _merge_records(self, records):
+        # Our own records come back too: they change nothing, so they cost no GPA
+        changed = [record for record in records if apply_record(record, self.students, self.courses, self.marks)]
+        if changed: self._invalidate_replayed(changed)
+        return len(changed)
+
+    def _carry_over_external(self):
+        """Re-journals records other instances appended between the last merge and the rotation.
+
+        They are not in the data being saved, and the rotated journal holding
+        them is deleted once the checkpoint is written.
+        """
+        try:
+            records = self.journal.follow()
+            if records: self.journal.append_many(records)
+        except OSError as e:
+            print(f"Error carrying journal records over to {self.journal.path}: {e}", file=sys.stderr)
+            return
+        self._merge_records(records)
+
     def _load_data_pickle(self, stdscr=None):
-        """Loads application state from a gzipped pickle file."""
+        """Loads application state from a compressed pickle file (or the SQLite database).
+
+        Nothing is read while the saved data is still what memory was loaded from or last saved.
+        """
+        disk_state = self._disk_state() # Taken first: a save by another instance meanwhile means the next load reads again
+        if self._saved_data_unchanged(disk_state): return # Memory already holds exactly the saved data
+        self.disk_state = None
+        self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class() # Reloads start over
+        self._invalidate_gpas()
+        if self.database is not None:
+            try:
+                self._load_data_sqlite()
+                if stdscr: ui.display_message(stdscr, f"Data loaded from {DB_FILE}. Press key.", wait=True)
+                else: print(f"Data loaded from {DB_FILE}.")
+            except Exception as e:
+                msg = f"Error loading data from {DB_FILE}: {e}"
+                if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=True)
+                else: print(msg)
+                self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class() # Start fresh
+            return
+        if self.storage_backend == "columnar":
+            try:
+                self._load_data_columnar()
+                self.disk_state = disk_state
+                if stdscr: ui.display_message(stdscr, f"Data loaded from {columnar.COLUMNAR_DIR}. Press key.", wait=True)
+                else: print(f"Data loaded from {columnar.COLUMNAR_DIR}.")
+            except Exception as e:
+                msg = f"Error loading data from {columnar.COLUMNAR_DIR}: {e}"
+                if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=True)
+                else: print(msg)
+                self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class() # Start fresh
+            return
+        if self.storage_backend == "partitioned":
+            try:
+                self._load_data_partitioned()
+                self.disk_state = disk_state
+                if stdscr: ui.display_message(stdscr, f"Data loaded from {partitions.PARTITION_DIR}. Press key.", wait=True)
+                else: print(f"Data loaded from {partitions.PARTITION_DIR}.")
+            except Exception as e:
+                msg = f"Error loading data from {partitions.PARTITION_DIR}: {e}"
+                if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=True)
+                else: print(msg)
+                self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class() # Start fresh
+            return
         if os.path.exists(SAVE_FILE):
             try:
                 if stdscr: ui.display_message(stdscr, f"Loading data from {SAVE_FILE}...", wait=False)
                 else: print(f"Loading data from {SAVE_FILE}...")
 
-                # Open the gzip-compressed file in binary read mode
-                with gzip.open(SAVE_FILE, 'rb') as f:
+                # Open the save file; its codec (gzip, bz2, lzma, none) is detected from the header
+                with compression.open_save(SAVE_FILE) as f:
                     # Load the data structure from the file
-                    loaded_data = pickle.load(f)
+                    loaded_data = read_checkpoint(f) # Index and marks stages
 
                 # Restore the application state
-                self.students = loaded_data.get('students', []) # Default to empty list if key missing
-                self.courses = loaded_data.get('courses', [])
-                self.marks = loaded_data.get('marks', {})     # Default to empty dict
-                self._invalidate_gpas() # Ensure GPAs are recalculated after loading
+                self.students = EntityStore(loaded_data.get('students', [])) # Default to empty list if key missing
+                self.courses = EntityStore(loaded_data.get('courses', []))
+                self.marks = self.mark_store_class.from_dict(loaded_data.get('marks', {}))
+                self._restore_derived(SAVE_FILE) # Saved GPAs if they still match, else recalculated later
+                self._replay_journal() # Edits made since this checkpoint
+                self.disk_state = disk_state
 
                 if stdscr: ui.display_message(stdscr, "Data loaded successfully. Press key.", wait=True)
                 else: print("Data loaded successfully.")
@@ -90,75 +293,225 @@ class Application:
                  else: print(msg)
                  # Optionally backup corrupted file and start fresh
                  # os.rename(SAVE_FILE, SAVE_FILE + ".corrupt")
-                 self.students, self.courses, self.marks = [], [], {} # Start fresh
+                 self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class() # Start fresh
             except EOFError: # Can happen with empty or truncated files
                  msg = f"Error: Save file {SAVE_FILE} is empty or incomplete."
                  if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=True)
                  else: print(msg)
-                 self.students, self.courses, self.marks = [], [], {} # Start fresh
+                 self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class() # Start fresh
             except IOError as e:
                  msg = f"Error reading save file {SAVE_FILE}: {e}"
                  if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=True)
                  else: print(msg)
-                 self.students, self.courses, self.marks = [], [], {} # Start fresh
+                 self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class() # Start fresh
             except Exception as e:
                  msg = f"An unexpected error occurred during loading: {e}"
                  if stdscr: ui.display_message(stdscr, msg, color_pair=2, wait=True)
                  else: print(msg)
-                 self.students, self.courses, self.marks = [], [], {} # Start fresh
+                 self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class() # Start fresh
         else:
              if stdscr: ui.display_message(stdscr, f"Save file {SAVE_FILE} not found. Starting fresh.", color_pair=3, wait=True)
              else: print(f"Save file {SAVE_FILE} not found. Starting fresh.")
+             self._replay_journal() # Edits made before the first checkpoint
+             self.disk_state = disk_state
+
+    def _load_data_sqlite(self):
+        """Loads everything from the SQLite database, importing the pickle save the first time."""
+        pickle_journal = MutationJournal(SAVE_FILE)
+        if self.database.is_empty() and (os.path.exists(SAVE_FILE) or pickle_journal.size() > 0):
+            # One-time migration: load the pickle (and its journal) as usual, then copy it over
+            database, self.database, self.journal = self.database, None, pickle_journal
+            self._load_data_pickle()
+            self.journal.close()
+            self.database = self.journal = database
+            self.database.replace_all(self.students, self.courses, self.marks)
+            return
+        self.students, self.courses, self.marks = self.database.load(self.mark_store_class)
+        self._invalidate_gpas()
+
+    def _load_data_columnar(self):
+        """Maps the columnar save (importing the pickle save the first time), then replays its journal."""
+        if not columnar.columns_exist(columnar.COLUMNAR_DIR) and os.path.exists(SAVE_FILE) and self.journal.size() == 0:
+            # One-time migration: load the pickle (and its journal) as usual, then write it as columns
+            journal, self.journal, self.storage_backend = self.journal, MutationJournal(SAVE_FILE), "pickle"
+            self._load_data_pickle()
+            self.journal.close()
+            self.journal, self.storage_backend = journal, "columnar"
+            columnar.write_columns(columnar.COLUMNAR_DIR, columnar.snapshot(self.students, self.courses, self.marks))
+            return
+        if columnar.columns_exist(columnar.COLUMNAR_DIR):
+            # Marks stay memory-mapped when mark_store_class is SparseMarkStore
+            self.students, self.courses, self.marks = columnar.read_columns(columnar.COLUMNAR_DIR, self.mark_store_class)
+            self._restore_derived(columnar.COLUMNAR_DIR)
+        self._replay_journal()
+
+    def _load_data_partitioned(self):
+        """Loads every segment of the partitioned save in parallel (importing the pickle save the first time)."""
+        if not partitions.partitions_exist(partitions.PARTITION_DIR) and os.path.exists(SAVE_FILE) and self.journal.size() == 0:
+            # One-time migration: load the pickle (and its journal) as usual, then write every segment
+            journal, self.journal, self.storage_backend = self.journal, MutationJournal(SAVE_FILE), "pickle"
+            self._load_data_pickle()
+            self.journal.close()
+            self.journal, self.storage_backend = journal, "partitioned"
+            data = partitions.snapshot(self.students, self.courses, self.marks, partitions.all_segments(self.marks))
+            partitions.write_partitions(partitions.PARTITION_DIR, data, self._open_checkpoint)
+            return
+        if partitions.partitions_exist(partitions.PARTITION_DIR):
+            self.students, self.courses, self.marks = partitions.read_partitions(partitions.PARTITION_DIR, self.mark_store_class)
+            self._restore_derived(partitions.PARTITION_DIR)
+        self._replay_journal() # Replayed records mark their segments dirty for the next save
+
+    def _disk_state(self):
+        """Identifies the saved data: the checkpoint's content fingerprint and the journal files' signatures.
+
+        None if unknown: the checkpoint has no valid fingerprint sidecar, or the backend is SQLite.
+        """
+        if self.database is not None: return None
+        content = fingerprint.read_sidecar(self.checkpoint_path)
+        if content is None and fingerprint.file_signature(self.checkpoint_path): return None
+        return content, fingerprint.file_signature(self.journal.path), fingerprint.file_signature(self.journal.rotated_path)
+
+    def _saved_data_unchanged(self, disk_state):
+        """True if the saved data is still what memory was loaded from or last saved, so reading it is pointless."""
+        return disk_state is not None and disk_state == self.disk_state
+
+    def reload_data(self, stdscr=None):
+        """Reads the saved data again (e.g. saved by another instance). Returns False if it was unchanged."""
+        if self._saved_data_unchanged(self._disk_state()): return False
+        self._load_data_pickle(stdscr)
+        return True
+
+    def _replay_journal(self):
+        """Re-applies the edits journaled since the last checkpoint."""
+        try:
+            records = self.journal.replay()
+        except OSError as e:
+            print(f"Error reading journal {self.journal.path}: {e}")
+            return
+        for record in records:
+            apply_record(record, self.students, self.courses, self.marks)
+        if records:
+            self._invalidate_replayed(records)
+            self.autosave.touch() # Not in the checkpoint yet: the next save folds them in
+
+    def _restore_derived(self, checkpoint_path):
+        """Starts from the GPAs and ranking saved with the checkpoint just loaded, if they still match it."""
+        self._invalidate_gpas()
+        derived = derived_cache.read_cache(checkpoint_path, len(self.students))
+        if derived is not None:
+            self.gpa_tracker.restore(self.students, derived['weighted'], derived['credits'], derived['ranking'])
+
+    def _invalidate_replayed(self, records):
+        """Flags the students whose GPA replayed journal records may have changed."""
+        affected = set()
+        for record in records:
+            if record[0] == 'student': affected.add(record[1])
+            elif record[0] == 'mark': affected.add(record[2])
+            else: affected.update(self.marks.marks_for_course(record[1])) # Its marks start counting
+        self._invalidate_students(affected)
 
 
     # --- Helper Methods (Keep find_*, get_*_ids) ---
     # ... (find_student_by_id, find_course_by_id, get_student_ids, get_course_ids remain unchanged) ...
     def find_student_by_id(self, student_id):
-        for student in self.students:
-            if student.id == student_id:
-                return student
-        return None
+        return self.students.get(student_id) # O(1) index lookup
 
     def find_course_by_id(self, course_id):
-        for course in self.courses:
-            if course.id == course_id:
-                return course
-        return None
+        return self.courses.get(course_id)
 
     def get_student_ids(self):
-         return {s.id for s in self.students}
+         return self.students.ids() # Live view, stays current as students are added
 
     def get_course_ids(self):
-         return {c.id for c in self.courses}
+         return self.courses.ids()
 
 
     # --- Data Manipulation Methods ---
     # REMOVED calls to _save_*_to_txt() from these methods
     def add_student(self, student_id, name, dob):
         if not self.find_student_by_id(student_id):
-             self.students.append(Student(student_id, name, dob))
-             self._invalidate_gpas()
+             self.students.add(Student(student_id, name, dob))
+             self.gpa_tracker.mark_dirty(student_id) # Only the new student needs computing
+             self.journal.append('student', student_id, name, dob)
+             self.autosave.touch()
              return True
         return False
 
     def add_course(self, course_id, name, credits):
          if not self.find_course_by_id(course_id):
-              self.courses.append(Course(course_id, name, credits))
-              self._invalidate_gpas()
+              self.courses.add(Course(course_id, name, credits))
+              # Marks already entered for this course start counting now
+              for student_id in self.marks.marks_for_course(course_id): self.gpa_tracker.mark_dirty(student_id)
+              self.journal.append('course', course_id, name, credits)
+              self.autosave.touch()
               return True
          return False
 
     def add_mark(self, course_id, student_id, mark):
-         if course_id not in self.marks:
-              self.marks[course_id] = {}
-         self.marks[course_id][student_id] = mark
-         self._invalidate_gpas()
+         tenths = mark_to_tenths(mark) # Stored and summed as integer tenths
+         old_tenths = self.marks.set_tenths(course_id, student_id, tenths) # Updates both views
+         self.journal.append('mark', course_id, student_id, tenths) # Saving later only has to sync these bytes
+         self.autosave.touch()
+         self._update_student_gpa(course_id, student_id, old_tenths, tenths) # O(1) instead of invalidating everyone
+
+    # --- Bulk imports (one validation pass, one GPA invalidation per call) ---
+    # Rows are iterables of tuples; column arrays can be passed as zip(ids, names, dobs).
+    # Each method returns (number_added, errors) with errors as [(row_index, message), ...].
+    def add_students_bulk(self, rows):
+         valid, errors = data_input.validate_student_rows(rows, self.students.ids())
+         for student_id, name, dob in valid:
+              self.students.add(Student(student_id, name, dob))
+         self.journal.append_many(('student',) + row for row in valid) # One write for the whole batch
+         if valid: self.autosave.touch()
+         self._invalidate_students(student_id for student_id, _, _ in valid)
+         return len(valid), errors
+
+    def add_courses_bulk(self, rows):
+         valid, errors = data_input.validate_course_rows(rows, self.courses.ids())
+         affected = set()
+         for course_id, name, credits in valid:
+              self.courses.add(Course(course_id, name, credits))
+              affected.update(self.marks.marks_for_course(course_id)) # Marks already entered start counting now
+         self.journal.append_many(('course',) + row for row in valid) # One write for the whole batch
+         if valid: self.autosave.touch()
+         self._invalidate_students(affected)
+         return len(valid), errors
+
+    def add_marks_bulk(self, rows):
+         valid, errors = data_input.validate_mark_rows(rows) # Marks may be strings or numbers
+         for course_id, student_id, tenths in valid:
+              self.marks.set_tenths(course_id, student_id, tenths)
+         self.journal.append_many(('mark',) + row for row in valid) # One write for the whole batch
+         if valid: self.autosave.touch()
+         self._invalidate_students(student_id for _, student_id, _ in valid)
+         return len(valid), errors
+
+    def _invalidate_students(self, student_ids):
+         """Flags a batch of students for recomputation by the next calculate_all_gpas()."""
+         student_ids = set(student_ids)
+         if not student_ids: return
+         self.gpa_tracker.invalidate_students(student_ids, len(self.students))
+         if self.gpa_tracker.all_dirty:
+              for student in self.students: student.gpa = None
+              return
+         for student_id in student_ids:
+              student = self.find_student_by_id(student_id)
+              if student: student.gpa = None
 
     # --- GPA and Sorting (Keep existing methods) ---
     # ... ( _invalidate_gpas, calculate_student_gpa, calculate_all_gpas, get_sorted_students_by_gpa remain unchanged) ...
+    def _update_student_gpa(self, course_id, student_id, old_tenths, new_tenths):
+         """Patches one student's running GPA totals after a mark change."""
+         course = self.find_course_by_id(course_id)
+         if not course: return # Mark only counts once its course exists
+         gpa = self.gpa_tracker.update_mark(student_id, course.credits, old_tenths, new_tenths)
+         student = self.find_student_by_id(student_id)
+         if student: student.gpa = gpa
+
     def _invalidate_gpas(self):
          for student in self.students:
               student.gpa = None
+         self.gpa_tracker.invalidate_all()
 
     def calculate_student_gpa(self, student_id):
         student = self.find_student_by_id(student_id)
@@ -167,18 +520,14 @@ class Application:
         student_marks_values = []
         corresponding_credits = []
 
-        for course_id, marks_dict in self.marks.items():
-            if student_id in marks_dict:
-                course = self.find_course_by_id(course_id)
-                if course:
-                    student_marks_values.append(marks_dict[student_id])
-                    corresponding_credits.append(course.credits)
+        for course, tenths in self.marks.transcript_tenths(student_id, self.courses): # Only this student's marks, as integer tenths
+            student_marks_values.append(tenths); corresponding_credits.append(course.credits)
 
         if not student_marks_values:
             student.gpa = 0.0
             return 0.0
 
-        marks_arr = np.array(student_marks_values)
+        marks_arr = np.array(student_marks_values, dtype=np.int64)
         credits_arr = np.array(corresponding_credits)
         total_credits = np.sum(credits_arr)
 
@@ -186,18 +535,43 @@ class Application:
             student.gpa = 0.0
             return 0.0
 
-        gpa = np.sum(marks_arr * credits_arr) / total_credits
+        gpa = np.sum(marks_arr * credits_arr) / (total_credits * 10) # Exact integer sum, one division
         student.gpa = gpa
         return gpa
 
     def calculate_all_gpas(self):
          if not self.students: return
-         for student in self.students:
-             self.calculate_student_gpa(student.id)
+         # Only dirty students are recomputed; a full matrix reduction happens after (re)loading
+         self.gpa_tracker.refresh(self.students, self.courses, self.marks)
 
     def get_sorted_students_by_gpa(self):
          self.calculate_all_gpas()
-         return sorted(self.students, key=lambda s: s.gpa if s.gpa is not None else -1, reverse=True)
+         # Ranking index is kept in order as GPAs change, no full re-sort here
+         return self.gpa_tracker.ranking.ordered()
+
+    def get_top_students(self, k):
+         if self.database is not None: return self._students_with_gpas(self.database.top_students(k)) # SQL aggregate, ties in insertion order
+         self.calculate_all_gpas()
+         return self.gpa_tracker.ranking.top_k(k)
+
+    def get_bottom_students(self, k):
+         if self.database is not None: return self._students_with_gpas(self.database.bottom_students(k))
+         self.calculate_all_gpas()
+         return self.gpa_tracker.ranking.bottom_k(k)
+
+    def get_student_rank(self, student_id):
+         if self.database is not None: return self.database.student_rank(student_id)
+         self.calculate_all_gpas()
+         return self.gpa_tracker.ranking.rank_of(student_id)
+
+    def _students_with_gpas(self, rows):
+         """Maps SqliteStore [(student_id, gpa), ...] rows to the loaded students, GPAs filled in."""
+         students = []
+         for student_id, gpa in rows:
+             student = self.students.get(student_id)
+             if student is None: continue # Not loaded (yet)
+             student.gpa = gpa; students.append(student)
+         return students
 
     # --- Curses Interaction Methods ---
     # REMOVED calls to _save_*_to_txt() from these methods
@@ -231,14 +605,13 @@ class Application:
                      ui.display_message(stdscr, "DoB cannot be empty. Press any key.", wait=True, color_pair=2)
                      continue
                 if self.add_student(s_id, s_name, s_dob):
-                     existing_ids.add(s_id)
                      added_count += 1
                 else:
                      ui.display_message(stdscr, f"Failed to add student {s_id}. Might already exist.", wait=True, color_pair=2)
                 break # Move to next student
         # --- NO LONGER SAVING TO TXT HERE ---
         if added_count > 0:
-             ui.display_message(stdscr, f"{added_count} student(s) added. Data will be saved on exit.", wait=True)
+             ui.display_message(stdscr, f"{added_count} student(s) added. Changes are saved automatically.", wait=True)
 
 
     def run_input_courses(self, stdscr):
@@ -271,14 +644,13 @@ class Application:
                      ui.display_message(stdscr, "Invalid credits (must be positive integer). Press key.", wait=True, color_pair=2)
                      continue
                 if self.add_course(c_id, c_name, c_credits):
-                    existing_ids.add(c_id)
                     added_count += 1
                 else:
                      ui.display_message(stdscr, f"Failed to add course {c_id}. Might already exist.", wait=True, color_pair=2)
                 break # Move to next course
         # --- NO LONGER SAVING TO TXT HERE ---
         if added_count > 0:
-            ui.display_message(stdscr, f"{added_count} course(s) added. Data will be saved on exit.", wait=True)
+            ui.display_message(stdscr, f"{added_count} course(s) added. Changes are saved automatically.", wait=True)
 
 
     def run_input_marks(self, stdscr):
@@ -314,7 +686,7 @@ class Application:
                   y_pos = 2
          # --- NO LONGER SAVING TO TXT HERE ---
          if marks_entered:
-             ui.display_message(stdscr, f"Marks input complete for {selected_course.id}. Data will be saved on exit.", wait=True)
+             ui.display_message(stdscr, f"Marks input complete for {selected_course.id}. Changes are saved automatically.", wait=True)
          else:
               ui.display_message(stdscr, f"No marks entered for {selected_course.id}. Press key.", wait=True)
 
@@ -348,13 +720,18 @@ class Application:
             "5. List All Courses",
             "6. Show Mark Sheet for a Course",
             "7. List Students Sorted by GPA",
+            "8. Reload Saved Data",
             "0. Save & Exit" # Updated Exit Text
         ]
         current_row = 0
 
         while True:
             ui.display_menu(stdscr, menu_options, current_row)
+            stdscr.timeout(AUTOSAVE_POLL_MS) # Wake up now and then to autosave; input screens still block
             key = stdscr.getch()
+            stdscr.timeout(-1)
+            if self.autosave.due(): self._save_data_pickle(stdscr, wait=False) # Synchronous, like the exit save
+            self.merge_external_changes() # Edits from other instances show up in the next list
 
             if key == curses.KEY_UP and current_row > 0:
                 current_row -= 1
@@ -389,6 +766,9 @@ class Application:
                                      f"{'ID':<10} {'Name':<25} {'DoB':<15} {'GPA':<5}",
                                      sorted_students,
                                      lambda s: s.get_display_info(show_gpa=True))
+                elif action_row == 7: # Reload (e.g. after another instance saved)
+                      if not self.reload_data(stdscr):
+                           ui.display_message(stdscr, "Saved data unchanged, nothing to reload. Press key.", wait=True)
 
 
                 # --- UPDATED EXIT LOGIC ---
@@ -0,0 +1,184 @@
+# pw6/mark_store.py
+from array import array
+
+# Dual-indexed mark store.
+# The old {course_id: {student_id: mark}} dict made every per-student question
+# (GPA, transcript) walk all courses. MarkStore keeps a course-major and a
+# student-major view that are updated together on every write, so both
+# marks_for_course() and marks_for_student() cost O(result).
+#
+# Marks are stored as integer tenths (7.5 -> 75) in a typed int32 array per
+# course, so GPA sums are exact integer arithmetic and no float objects are
+# kept per mark. Floats only appear when a mark is read for display.
+#
+# snapshot() returns a read-only store sharing the course columns. Each column
+# remembers the snapshot epoch it belongs to; the first write to a column
+# taken before the latest snapshot copies it, so snapshots never change.
+
+def mark_to_tenths(mark):
+    """Converts a mark already rounded down to 1 decimal place (e.g. from validate_mark) to tenths."""
+    return int(round(mark * 10))
+
+def tenths_to_mark(tenths):
+    return tenths / 10
+
+class CourseMarks:
+    """Marks of one course: student IDs and their marks (tenths) in parallel columns."""
+    __slots__ = ('student_ids', 'tenths', 'positions', 'epoch')
+
+    def __init__(self, epoch=0):
+        self.student_ids = []     # Column of student IDs
+        self.tenths = array('i')  # Column of marks in tenths (4 bytes each)
+        self.positions = {}       # {student_id: row in the columns}
+        self.epoch = epoch        # Store epoch the columns were created in (see MarkStore.snapshot)
+
+    def copy(self, epoch):
+        course_marks = CourseMarks(epoch)
+        course_marks.student_ids = list(self.student_ids)
+        course_marks.tenths = array('i', self.tenths)
+        course_marks.positions = dict(self.positions)
+        return course_marks
+
+class MarkStore:
+    """Marks indexed by course and by student."""
+    def __init__(self):
+        self._by_course = {}  # {course_id: CourseMarks}
+        self._by_student = {} # {student_id: {course_id: row in that course's columns}}
+        self._epoch = 0       # Bumped by snapshot(); columns from older epochs are shared
+
+    @classmethod
+    def from_dict(cls, marks_dict):
+        """Builds a store from the old {course_id: {student_id: mark}} save format."""
+        store = cls()
+        for course_id, course_marks in marks_dict.items():
+            for student_id, mark in course_marks.items():
+                store.set(course_id, student_id, mark)
+        return store
+
+    @classmethod
+    def from_csr(cls, student_ids, course_ids, indptr, cols, tenths):
+        """Builds a store from CSR arrays (one row per student), e.g. a columnar save."""
+        store = cls()
+        indptr, cols, tenths = indptr.tolist(), cols.tolist(), tenths.tolist()
+        for row, student_id in enumerate(student_ids):
+            for position in range(indptr[row], indptr[row + 1]):
+                store.set_tenths(course_ids[cols[position]], student_id, tenths[position])
+        return store
+
+    def to_dict(self):
+        """Returns the marks in the {course_id: {student_id: mark}} save format (a fresh copy)."""
+        return {course_id: self.marks_for_course(course_id) for course_id in self._by_course}
+
+    def snapshot(self):
+        """Returns a read-only store of the current marks, sharing every course column (no mark is copied)."""
+        self._epoch += 1
+        snap = type(self).__new__(type(self))
+        snap._by_course = dict(self._by_course)
+        snap._by_student = None # Derived from the columns if the snapshot is read per student
+        snap._epoch = self._epoch
+        return snap
+
+    def _student_index(self):
+        if self._by_student is None:
+            by_student = {}
+            for course_id, course_marks in self._by_course.items():
+                for row, student_id in enumerate(course_marks.student_ids):
+                    by_student.setdefault(student_id, {})[course_id] = row
+            self._by_student = by_student
+        return self._by_student
+
+    def set_tenths(self, course_id, student_id, tenths):
+        """Adds or overwrites a mark (in tenths) in both views. Returns the previous tenths (or None)."""
+        course_marks = self._by_course.get(course_id)
+        if course_marks is None:
+            course_marks = self._by_course[course_id] = CourseMarks(self._epoch)
+        elif course_marks.epoch != self._epoch: # Shared with a snapshot: copy the columns first
+            course_marks = self._by_course[course_id] = course_marks.copy(self._epoch)
+        row = course_marks.positions.get(student_id)
+        if row is not None:
+            old_tenths = course_marks.tenths[row]
+            course_marks.tenths[row] = tenths
+            return old_tenths
+        row = len(course_marks.student_ids)
+        course_marks.student_ids.append(student_id)
+        course_marks.tenths.append(tenths)
+        course_marks.positions[student_id] = row
+        self._student_index().setdefault(student_id, {})[course_id] = row
+        return None
+
+    def set(self, course_id, student_id, mark):
+        """Adds or overwrites a mark given as a float. Returns the previous tenths (or None)."""
+        return self.set_tenths(course_id, student_id, mark_to_tenths(mark))
+
+    def get_tenths(self, course_id, student_id, default=None):
+        course_marks = self._by_course.get(course_id)
+        if course_marks is None: return default
+        row = course_marks.positions.get(student_id)
+        return course_marks.tenths[row] if row is not None else default
+
+    def get(self, course_id, student_id, default=None):
+        tenths = self.get_tenths(course_id, student_id)
+        return tenths_to_mark(tenths) if tenths is not None else default
+
+    def marks_for_course(self, course_id):
+        """Returns {student_id: mark} for one course."""
+        course_marks = self._by_course.get(course_id)
+        if course_marks is None: return {}
+        return {student_id: tenths / 10 for student_id, tenths in zip(course_marks.student_ids, course_marks.tenths)}
+
+    def course_column(self, course_id):
+        """Returns (student IDs, tenths) of one course, as copies of its two columns."""
+        course_marks = self._by_course.get(course_id)
+        if course_marks is None: return [], array('i')
+        return list(course_marks.student_ids), array('i', course_marks.tenths)
+
+    def marks_for_student(self, student_id):
+        """Returns {course_id: mark} for one student."""
+        return {course_id: self._by_course[course_id].tenths[row] / 10
+                for course_id, row in self._student_index().get(student_id, {}).items()}
+
+    def transcript_tenths(self, student_id, courses):
+        """Returns [(course, tenths), ...] for one student; used for exact integer GPA sums.
+
+        `courses` is the course EntityStore; marks for unknown courses are left out,
+        the same way the GPA calculation ignores them.
+        """
+        transcript = []
+        for course_id, row in self._student_index().get(student_id, {}).items():
+            course = courses.get(course_id)
+            if course: transcript.append((course, self._by_course[course_id].tenths[row]))
+        return transcript
+
+    def transcript(self, student_id, courses):
+        """Returns [(course, mark), ...] for one student, in the order the marks were entered."""
+        return [(course, tenths / 10) for course, tenths in self.transcript_tenths(student_id, courses)]
+
+    def iter_tenths(self):
+        """Yields (course_id, student_id, tenths) for every mark, course by course."""
+        for course_id, course_marks in self._by_course.items():
+            yield from ((course_id, student_id, tenths) for student_id, tenths in zip(course_marks.student_ids, course_marks.tenths))
+
+    def iter_marks(self):
+        """Yields (course_id, student_id, mark) for every mark, course by course."""
+        for course_id, student_id, tenths in self.iter_tenths():
+            yield course_id, student_id, tenths / 10
+
+    def coo(self):
+        """Returns (student_ids, course_ids, rows, cols, tenths): every mark as coordinates into the two ID lists.
+
+        Same layout as SparseMarkStore.coo(), so the GPA engine can reduce either store in O(marks).
+        """
+        student_ids, course_ids = list(self._student_index()), list(self._by_course)
+        student_rows = {student_id: row for row, student_id in enumerate(student_ids)}
+        rows, cols, tenths = array('i'), array('i'), array('i')
+        for col, course_marks in enumerate(self._by_course.values()):
+            rows.extend(student_rows[student_id] for student_id in course_marks.student_ids)
+            cols.extend([col] * len(course_marks.student_ids))
+            tenths.extend(course_marks.tenths)
+        return student_ids, course_ids, rows, cols, tenths
+
+    def course_ids(self):
+        return self._by_course.keys()
+
+    def __len__(self):
+        return sum(len(course_marks.student_ids) for course_marks in self._by_course.values())
@@ -0,0 +1,149 @@
+# pw6/sqlite_store.py
+import sqlite3
+import threading
+from itertools import groupby
+
+from .domains import Student, Course
+from .repository import EntityStore
+
+# SQLite storage engine.
+# An alternative to the gzipped pickle: students, courses and marks live in
+# indexed tables of a WAL-mode database. Edits are written as they happen,
+# through the same append()/append_many() calls the apps make on the journal,
+# and a save only commits them. GPA and ranking queries are SQL aggregates, so
+# large cohorts can be queried without building Python lists first.
+#
+# The apps load on a LoadThread and edit and save on the UI thread, so the one
+# connection is shared between threads: every use of it holds the store's lock.
+
+DB_FILE = "student_data.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    seq INTEGER PRIMARY KEY, -- Insertion order, used for listings and GPA ties
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    dob TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS courses (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    credits INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS marks (
+    course_id TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    tenths INTEGER NOT NULL, -- Mark * 10, exact like the in-memory mark stores
+    PRIMARY KEY (course_id, student_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS marks_by_student ON marks (student_id, course_id);
+"""
+
+# Marks may name unknown students or courses; the LEFT JOINs leave those out of
+# the sums, exactly like the in-memory GPA calculation.
+def _gpa_query(where=""):
+    return f"""
+SELECT s.seq AS seq, s.id AS id,
+       CASE WHEN SUM(c.credits) > 0 THEN CAST(SUM(m.tenths * c.credits) AS REAL) / (SUM(c.credits) * 10)
+            ELSE 0.0 END AS gpa
+FROM students s
+LEFT JOIN marks m ON m.student_id = s.id
+LEFT JOIN courses c ON c.id = m.course_id
+{where}
+GROUP BY s.seq
+"""
+
+_GPA_SQL = _gpa_query()
+
+_INSERT_SQL = {
+    'student': "INSERT OR IGNORE INTO students (id, name, dob) VALUES (?, ?, ?)",
+    'course': "INSERT OR IGNORE INTO courses (id, name, credits) VALUES (?, ?, ?)",
+    'mark': "INSERT OR REPLACE INTO marks (course_id, student_id, tenths) VALUES (?, ?, ?)",
+}
+
+class SqliteStore:
+    """Students, courses and marks in a SQLite database (WAL mode)."""
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self._lock = threading.RLock() # Serializes use of the connection (it is not thread-bound)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL") # WAL keeps commits safe, fsync only at checkpoints
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+    def _fetchall(self, sql, parameters=()):
+        with self._lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def _fetchone(self, sql, parameters=()):
+        with self._lock:
+            return self.connection.execute(sql, parameters).fetchone()
+
+    def is_empty(self):
+        return not any(self._fetchone(f"SELECT 1 FROM {table} LIMIT 1") for table in ('students', 'courses', 'marks'))
+
+    # --- Loading ---
+    def load(self, mark_store_class):
+        """Returns (students EntityStore, courses EntityStore, mark store) in insertion order."""
+        with self._lock: # One consistent read, even if edits are written meanwhile
+            execute = self.connection.execute
+            students = EntityStore(Student(*row) for row in execute("SELECT id, name, dob FROM students ORDER BY seq"))
+            courses = EntityStore(Course(*row) for row in execute("SELECT id, name, credits FROM courses ORDER BY seq"))
+            marks = mark_store_class()
+            for row in execute("SELECT course_id, student_id, tenths FROM marks"):
+                marks.set_tenths(*row)
+        return students, courses, marks
+
+    # --- Writing (same calls as MutationJournal) ---
+    def append(self, *record):
+        """Writes one edit, e.g. append('mark', course_id, student_id, tenths). Committed by sync()."""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """Writes several edits, one executemany() per run of records of the same kind."""
+        with self._lock:
+            for op, run in groupby(records, key=lambda record: record[0]):
+                self.connection.executemany(_INSERT_SQL[op], (record[1:] for record in run))
+
+    def sync(self):
+        with self._lock:
+            self.connection.commit()
+
+    def replace_all(self, students, courses, marks):
+        """Replaces the whole database content in one transaction (e.g. importing a pickle save)."""
+        with self._lock, self.connection:
+            for table in ('marks', 'courses', 'students'):
+                self.connection.execute(f"DELETE FROM {table}")
+            self.connection.executemany(_INSERT_SQL['student'], ((s.id, s.name, s.dob) for s in students))
+            self.connection.executemany(_INSERT_SQL['course'], ((c.id, c.name, c.credits) for c in courses))
+            self.connection.executemany(_INSERT_SQL['mark'], marks.iter_tenths())
+
+    # --- SQL aggregates ---
+    def student_gpas(self):
+        """Returns [(student_id, gpa), ...] for every student, in insertion order."""
+        return self._fetchall(f"SELECT id, gpa FROM ({_GPA_SQL}) ORDER BY seq")
+
+    def student_gpa(self, student_id):
+        """Returns one student's GPA (an indexed lookup of their marks), or None if unknown."""
+        row = self._fetchone(f"SELECT gpa FROM ({_gpa_query('WHERE s.id = ?')})", (student_id,))
+        return row[0] if row else None
+
+    def top_students(self, k):
+        """Returns the k best [(student_id, gpa), ...]; ties keep insertion order like GpaRanking."""
+        return self._fetchall(f"SELECT id, gpa FROM ({_GPA_SQL}) ORDER BY gpa DESC, seq LIMIT ?", (max(k, 0),))
+
+    def bottom_students(self, k):
+        """Returns the k worst [(student_id, gpa), ...], worst first."""
+        return self._fetchall(f"SELECT id, gpa FROM ({_GPA_SQL}) ORDER BY gpa ASC, seq DESC LIMIT ?", (max(k, 0),))
+
+    def student_rank(self, student_id):
+        """Returns the 1-based GPA rank of a student, or None if the student does not exist."""
+        row = self._fetchone(f"""
+            SELECT rank FROM (SELECT id, ROW_NUMBER() OVER (ORDER BY gpa DESC, seq) AS rank FROM ({_GPA_SQL}))
+            WHERE id = ?""", (student_id,))
+        return row[0] if row else None
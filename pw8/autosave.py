@@ -0,0 +1,65 @@
+# pw8/autosave.py
+import time
+
+# Coalescing autosave.
+# Every edit bumps a generation counter. A save becomes due once the edits
+# pause for AUTOSAVE_DELAY seconds, or AUTOSAVE_MAX_DELAY after the oldest
+# unsaved edit, so steady typing is saved too. The app polls due() from its
+# event loop and starts the save there, on the UI thread, where the stores can
+# be snapshotted safely. Edits made while a save is in flight stay pending and
+# become a single follow-up save once it finishes, however many there were.
+# Nothing is saved while the generation equals the last durable one.
+
+AUTOSAVE_DELAY = 2.0      # Seconds without edits before saving
+AUTOSAVE_MAX_DELAY = 30.0 # ... but never later than this after the oldest unsaved edit
+AUTOSAVE_POLL_MS = 500    # How often the UI loops ask whether a save is due
+
+class SaveScheduler:
+    """Tracks edits by generation and decides when the next save should start."""
+    def __init__(self, delay=AUTOSAVE_DELAY, max_delay=AUTOSAVE_MAX_DELAY, clock=time.monotonic):
+        self.delay, self.max_delay, self._clock = delay, max_delay, clock
+        self.generation = 0           # Bumped by every edit
+        self.saved_generation = 0     # Generation of the last durable save
+        self.saving_generation = None # Generation the save in flight will make durable
+        self._first_edit = None       # Time of the oldest edit not covered by a save
+        self._last_edit = None
+        self._requested = False       # Explicit save request, served as soon as nothing is in flight
+
+    def touch(self):
+        """Records an edit (a bulk import counts as one)."""
+        now = self._clock()
+        if self._first_edit is None: self._first_edit = now
+        self._last_edit = now
+        self.generation += 1
+
+    def request(self):
+        """Asks for a save without waiting for a pause, e.g. when one is in flight already."""
+        self._requested = True
+
+    def is_dirty(self):
+        """True if some edit is not durable yet (the save in flight may still cover it)."""
+        return self.generation != self.saved_generation
+
+    def is_saving(self):
+        return self.saving_generation is not None
+
+    def due(self):
+        """True if a save should start now."""
+        if self.is_saving() or self.generation == self.saved_generation: return False
+        if self._requested or self._first_edit is None: return True # Requested, or retrying a failed save
+        now = self._clock()
+        return now - self._last_edit >= self.delay or now - self._first_edit >= self.max_delay
+
+    def begin(self):
+        """Marks the start of a save of every edit so far. Returns the generation it covers."""
+        self.saving_generation = self.generation
+        self._first_edit = self._last_edit = None # Later edits open a new window
+        self._requested = False
+        return self.saving_generation
+
+    def finish(self, ok):
+        """Records the end of the save in flight (it may run on another thread)."""
+        if ok: self.saved_generation = self.saving_generation
+        elif self._last_edit is None: # Failed: its edits are pending again, retried after a pause
+            self._first_edit = self._last_edit = self._clock()
+        self.saving_generation = None
@@ -0,0 +1,131 @@
+# pw8/columnar.py
+import os
+import json
+import shutil
+import numpy as np
+
+from .domains import Student, Course
+from .repository import EntityStore
+from .journal import sync_file, sync_directory
+
+# Memory-mapped columnar save format.
+# The dataset is a directory of .npy columns: integer-encoded IDs and names
+# pointing into one UTF-8 string table, course credits, and the marks in CSR
+# form (one row per student, sorted course columns, integer tenths).
+# Loading maps the mark columns with numpy.memmap ('c' = copy-on-write), so
+# nothing is unpickled or decompressed and pages are only read when touched;
+# a SparseMarkStore adopts the mapped arrays as they are and the GPA engine
+# reduces them directly.
+#
+# A new save is written next to the old one, fsynced, and swapped in with
+# renames; if the process dies between the two renames, the ".old" directory is
+# still loadable.
+
+COLUMNAR_DIR = "student_data.cols"
+FORMAT_VERSION = 1
+
+class _StringTable:
+    """Deduplicated strings, each referenced by its index."""
+    def __init__(self):
+        self.strings = []
+        self._index = {}
+
+    def column(self, values):
+        indexes = []
+        for value in values:
+            index = self._index.get(value)
+            if index is None:
+                index = self._index[value] = len(self.strings)
+                self.strings.append(value)
+            indexes.append(index)
+        return np.array(indexes, dtype=np.int32)
+
+    def encode(self):
+        """Returns (UTF-8 blob as uint8, byte offsets with one extra end offset)."""
+        encoded = [string.encode('utf-8') for string in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+def snapshot(students, courses, marks):
+    """Copies everything write_columns() needs, so it can run in a background thread."""
+    student_ids, course_ids, rows, cols, tenths = marks.coo()
+    return {
+        'students': [(s.id, s.name, s.dob) for s in students],
+        'courses': [(c.id, c.name, c.credits) for c in courses],
+        'mark_student_keys': list(student_ids),
+        'mark_course_keys': list(course_ids),
+        'mark_rows': np.array(rows, dtype=np.int32), # np.array copies: the store may change meanwhile
+        'mark_cols': np.array(cols, dtype=np.int32),
+        'mark_tenths': np.array(tenths, dtype=np.int32),
+    }
+
+def write_columns(path, data):
+    """Writes a snapshot() as a columnar directory, replacing `path` atomically."""
+    table = _StringTable()
+    columns = {}
+    for prefix, rows, fields in (('student', data['students'], ('id', 'name', 'dob')),
+                                 ('course', data['courses'], ('id', 'name', 'credits'))):
+        values = list(zip(*rows)) or [()] * len(fields)
+        for field, column in zip(fields, values):
+            if field == 'credits': columns['course_credits'] = np.array(column, dtype=np.int32)
+            else: columns[f'{prefix}_{field}'] = table.column(column)
+
+    # Marks as CSR: sorted by student row, then course column
+    rows, cols, tenths = data['mark_rows'], data['mark_cols'], data['mark_tenths']
+    order = np.lexsort((cols, rows))
+    counts = np.bincount(rows, minlength=len(data['mark_student_keys']))
+    columns['mark_student_key'] = table.column(data['mark_student_keys'])
+    columns['mark_course_key'] = table.column(data['mark_course_keys'])
+    columns['mark_indptr'] = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+    columns['mark_cols'] = cols[order]
+    columns['mark_tenths'] = tenths[order]
+    columns['strings'], columns['string_offsets'] = table.encode()
+
+    temp_path, old_path = path + ".tmp", path + ".old"
+    shutil.rmtree(temp_path, ignore_errors=True)
+    os.makedirs(temp_path)
+    for name, column in columns.items():
+        np.save(os.path.join(temp_path, name + ".npy"), column)
+        sync_file(os.path.join(temp_path, name + ".npy"))
+    with open(os.path.join(temp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({'version': FORMAT_VERSION}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    sync_directory(temp_path)
+    parent = os.path.dirname(path)
+    if os.path.isdir(path): # Otherwise ".old" (if any) is the current save: keep it until the swap
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.replace(path, old_path)
+    os.replace(temp_path, path)
+    sync_directory(parent) # The new save is durable before the old one (or the journal) goes
+    shutil.rmtree(old_path, ignore_errors=True) # Still-mapped files stay readable until unmapped
+
+def columns_exist(path):
+    return os.path.isdir(path) or os.path.isdir(path + ".old")
+
+def read_columns(path, mark_store_class):
+    """Opens a columnar save. Returns (students EntityStore, courses EntityStore, mark store).
+
+    Mark columns are memory-mapped and handed to mark_store_class.from_csr();
+    SparseMarkStore keeps them mapped, MarkStore copies them into its own layout.
+    """
+    if not os.path.isdir(path): path += ".old" # Interrupted swap
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        version = json.load(f).get('version')
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar format version {version}")
+
+    def column(name, mode='r'):
+        return np.load(os.path.join(path, name + ".npy"), mmap_mode=mode)
+
+    text, offsets = bytes(column('strings')), column('string_offsets').tolist()
+    strings = [text[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+    def decoded(name):
+        return [strings[index] for index in column(name).tolist()]
+
+    students = EntityStore(Student(*fields) for fields in zip(decoded('student_id'), decoded('student_name'), decoded('student_dob')))
+    courses = EntityStore(Course(*fields) for fields in zip(decoded('course_id'), decoded('course_name'), column('course_credits').tolist()))
+    marks = mark_store_class.from_csr(decoded('mark_student_key'), decoded('mark_course_key'),
+                                      column('mark_indptr'), column('mark_cols', 'c'), column('mark_tenths', 'c'))
+    return students, courses, marks
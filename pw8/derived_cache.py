@@ -0,0 +1,48 @@
+# pw8/derived_cache.py
+import pickle
+import numpy as np
+
+from . import gpa_engine
+from . import fingerprint
+from .journal import write_checkpoint
+
+# Persisted derived data for warm starts.
+# A checkpoint save also writes, next to the checkpoint, the GPA totals of every
+# student and the ranking order they give. Both are computed from the saved
+# state itself, on the saving side. The cache records the content fingerprint
+# of the state it was computed from (see fingerprint.py). A load adopts it only
+# while the checkpoint's fingerprint sidecar still vouches for that content,
+# and otherwise rebuilds the GPAs lazily, as before. Records replayed from the
+# journal then only dirty the students they touch.
+# Partitioned saves write no cache: computing it reduces every segment, which
+# would cost each save as much as rewriting them all.
+
+CACHE_SUFFIX = ".derived"
+CACHE_VERSION = 2
+
+def cache_path(checkpoint_path):
+    return checkpoint_path + CACHE_SUFFIX
+
+def compute(students, courses, marks):
+    """Derived data of a state: GPA totals per student (in `students` order) and the ranking order."""
+    weighted, total_credits = gpa_engine.compute_gpa_totals(students, courses, marks)
+    gpas = gpa_engine.gpas_from_totals(weighted, total_credits)
+    ranking = np.lexsort((np.arange(len(gpas)), -gpas)) # Positions, best GPA first, ties in list order (like GpaRanking)
+    return {'weighted': weighted, 'credits': total_credits, 'ranking': ranking.astype(np.int32)}
+
+def write_cache(checkpoint_path, derived, content):
+    """Stores derived data for the checkpoint at `checkpoint_path`, whose state has content fingerprint `content`."""
+    data = dict(derived, version=CACHE_VERSION, content=content)
+    write_checkpoint(cache_path(checkpoint_path), data, open) # Temp file + rename, uncompressed
+    return data
+
+def read_cache(checkpoint_path, n_students):
+    """Returns the derived data saved for the checkpoint on disk, or None if missing or stale."""
+    try:
+        with open(cache_path(checkpoint_path), 'rb') as f:
+            data = pickle.load(f)
+        if data.get('version') != CACHE_VERSION or data.get('content') != fingerprint.read_sidecar(checkpoint_path):
+            return None
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+    return data if len(data['weighted']) == n_students else None
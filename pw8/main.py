@@ -5,44 +5,156 @@ import time
 import math
 import numpy as np
 import os
-import pickle
-import gzip
 import threading # <-- Import threading module
-import copy      # <-- Import copy module for deep copies (safer for threading)
 
 # Import classes and functions from our modules
 from .domains import Student, Course
 from . import input as data_input
 from . import output as ui
+from . import gpa_engine
+from .repository import EntityStore
+from .mark_store import MarkStore, mark_to_tenths
+from .sparse_mark_store import SparseMarkStore
+from .journal import MutationJournal, apply_record, write_checkpoint, read_checkpoint_stages
+from .parallel_gzip import ParallelGzipFile
+from .sqlite_store import SqliteStore, DB_FILE
+from . import columnar
+from . import compression
+from . import partitions
+from . import derived_cache
+from . import fingerprint
+from .autosave import SaveScheduler, AUTOSAVE_POLL_MS
 
 SAVE_FILE = "student_data.pkl.gz" # Keep the same filename
+STORAGE_BACKEND = os.environ.get("STUDENT_STORAGE", "pickle") # "pickle", "sqlite", "columnar" or "partitioned"
+SAVE_CODEC = os.environ.get("STUDENT_SAVE_CODEC", "zlib:9") # SAVE_FILE codec: "none", "zlib:1".."zlib:9", "bz2:N" or "lzma:N"
+SAVE_STRATEGY = os.environ.get("STUDENT_SAVE_STRATEGY", "thread") # Checkpoints written by "thread" (SaveThread) or "fork" (a child process)
+MARK_STORE = os.environ.get("STUDENT_MARK_STORE", "auto") # "dense" (MarkStore), "sparse" (SparseMarkStore) or "auto": sparse for columnar saves
+
+def default_mark_store_class(storage_backend, setting=MARK_STORE):
+    """Mark store for a backend. SparseMarkStore keeps columnar marks memory-mapped; MarkStore would copy every one."""
+    if setting == "auto": setting = "sparse" if storage_backend == "columnar" else "dense"
+    if setting not in ("dense", "sparse"):
+        raise ValueError(f"Unknown mark store {setting!r} (expected auto, dense or sparse)")
+    return SparseMarkStore if setting == "sparse" else MarkStore
 
 class Application:
-    def __init__(self):
-        self.students = []
-        self.courses = []
-        self.marks = {}
-        # Loading still happens synchronously at the start
-        self._load_data_pickle()
+    def __init__(self, mark_store_class=None, storage_backend=STORAGE_BACKEND, save_codec=SAVE_CODEC, load_in_background=False, save_strategy=SAVE_STRATEGY):
+        # MarkStore, or SparseMarkStore for wide, sparsely enrolled catalogs (and the columnar backend, see MARK_STORE)
+        self.mark_store_class = mark_store_class or default_mark_store_class(storage_backend)
+        self.students = EntityStore() # Students in insertion order, indexed by ID
+        self.courses = EntityStore()
+        self.marks = self.mark_store_class() # Course-major and student-major views of the marks
+        self.gpa_tracker = gpa_engine.GpaTracker() # Running GPA totals per student
+        self.storage_backend = storage_backend
+        self.database = SqliteStore(DB_FILE) if storage_backend == "sqlite" else None
+        self.checkpoint_path = {"columnar": columnar.COLUMNAR_DIR, "partitioned": partitions.PARTITION_DIR}.get(storage_backend, SAVE_FILE)
+        # Edits are recorded through append()/append_many(): in the database, or in the checkpoint's journal
+        # (the partitioned journal also tracks which segments the edits dirty)
+        journal_class = partitions.PartitionedJournal if storage_backend == "partitioned" else MutationJournal
+        self.journal = self.database if self.database is not None else journal_class(self.checkpoint_path)
+        self.save_codec = compression.parse_codec(save_codec) # (name, level); loading detects the codec
+        if save_strategy not in ("thread", "fork"):
+            raise ValueError(f"Unknown save strategy {save_strategy!r} (expected thread or fork)")
+        if save_strategy == "fork" and not hasattr(os, "fork"):
+            print("Note: fork() is not available on this platform, saving on a thread instead.")
+            save_strategy = "thread"
+        self.save_strategy = save_strategy
+        self.disk_state = None # _disk_state() when memory last matched the saved data (after a load or save)
         # Thread handle for saving, initially None
         self.save_thread = None
+        self.autosave = SaveScheduler() # Edit generations; says when a (coalesced) save is due
+        # Staged loading: students and courses first, then marks and the GPA cache.
+        # With load_in_background the menu appears right away; actions wait on `loaded`.
+        self.loaded = threading.Event()
+        self.load_progress = (0.0, "Loading data...") # (fraction done, message)
+        # Background saves and loads must not print over the curses screen: while
+        # main() runs, their messages become the menu's status line instead
+        self.ui_active = False
+        self.status_message = None # (message, color pair), replaced by each new message
+        self.load_thread = None
+        if load_in_background:
+            self.load_thread = threading.Thread(target=self._load_all, name="LoadThread", daemon=True)
+            self.load_thread.start()
+        else:
+            self._load_all()
+
+    # --- Staged Loading ---
+    def _load_all(self):
+        """Loads every stage, then warms the GPA cache. Runs on LoadThread with load_in_background."""
+        try:
+            self._load_data_pickle()
+            self._publish_progress(0.9, "Computing GPAs...")
+            if self.students: self.gpa_tracker.refresh(self.students, self.courses, self.marks)
+        except Exception as e:
+            self._notify(f"Error loading data: {e}", error=True)
+        finally:
+            self._publish_progress(1.0, "Data loaded.")
+            self.loaded.set()
+
+    def _notify(self, message, error=False):
+        """Reports a load/save/merge message: on the status line under curses, printed otherwise."""
+        if self.ui_active: self.status_message = (message, 2 if error else 1) # One tuple assignment, like load_progress
+        else: print(message, file=sys.stderr if error else sys.stdout)
+
+    def _publish_progress(self, fraction, message):
+        self.load_progress = (fraction, message) # One tuple assignment: readers never see half an update
+
+    def _wait_until_loaded(self, stdscr):
+        """Shows the load progress until the background load has finished."""
+        while not self.loaded.wait(0.1):
+            fraction, message = self.load_progress
+            ui.display_message(stdscr, f"{message} {fraction:.0%}", color_pair=3, wait=False)
 
     # --- Loading Method (Remains Synchronous) ---
     def _load_data_pickle(self, stdscr=None):
         # ... (Keep the existing _load_data_pickle method from pw6 exactly as is) ...
         # ... (It handles os.path.exists, gzip.open, pickle.load, error checking) ...
+        disk_state = self._disk_state() # Taken first: a save by another instance meanwhile means the next load reads again
+        if self._saved_data_unchanged(disk_state): return # Memory already holds exactly the saved data
+        self.disk_state = None
+        self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class() # Reloads start over
+        self._invalidate_gpas()
+        if self.database is not None: # SQLite backend
+            try:
+                self._load_data_sqlite()
+            except Exception as e:
+                self._notify(f"Error loading data from {DB_FILE}: {e}. Starting fresh.", error=True)
+                self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class()
+            return
+        if self.storage_backend == "columnar":
+            try:
+                self._load_data_columnar()
+                self.disk_state = disk_state
+            except Exception as e:
+                self._notify(f"Error loading data from {columnar.COLUMNAR_DIR}: {e}. Starting fresh.", error=True)
+                self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class()
+            return
+        if self.storage_backend == "partitioned":
+            try:
+                self._load_data_partitioned()
+                self.disk_state = disk_state
+            except Exception as e:
+                self._notify(f"Error loading data from {partitions.PARTITION_DIR}: {e}. Starting fresh.", error=True)
+                self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class()
+            return
         if os.path.exists(SAVE_FILE):
             try:
                 # Optional: Display loading message via UI if stdscr is available
                 # if stdscr: ui.display_message(stdscr, f"Loading data from {SAVE_FILE}...", wait=False)
                 # else: print(f"Loading data from {SAVE_FILE}...") # Fallback
 
-                with gzip.open(SAVE_FILE, 'rb') as f:
-                    loaded_data = pickle.load(f)
-                self.students = loaded_data.get('students', [])
-                self.courses = loaded_data.get('courses', [])
-                self.marks = loaded_data.get('marks', {})
-                self._invalidate_gpas()
+                self._publish_progress(0.1, "Loading students and courses...")
+                with compression.open_save(SAVE_FILE) as f:
+                    stages = read_checkpoint_stages(f)
+                    loaded_data = next(stages) # Index stage: only the start of the file is decompressed
+                    self.students = EntityStore(loaded_data.get('students', []))
+                    self.courses = EntityStore(loaded_data.get('courses', []))
+                    self._publish_progress(0.4, "Loading marks...")
+                    for stage in stages: loaded_data.update(stage)
+                self.marks = self.mark_store_class.from_dict(loaded_data.get('marks', {}))
+                self._publish_progress(0.8, "Replaying journal...")
+                self._restore_derived(SAVE_FILE) # Saved GPAs if they still match, else recalculated later
 
                 # Optional: Display success message
                 # if stdscr: ui.display_message(stdscr, "Data loaded successfully. Press key.", wait=True)
@@ -52,136 +164,483 @@ class Application:
                  # if stdscr: ui.display_message(stdscr, f"Error loading data: {e}. Starting fresh.", color_pair=2, wait=True)
                  # else: print(f"Error loading data: {e}. Starting fresh.")
                  # If loading fails, ensure we start with empty lists/dict
-                 self.students, self.courses, self.marks = [], [], {}
+                 self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class()
+                 return # Journal records only make sense on top of their checkpoint
         else:
              # Optional: Display starting fresh message via UI
              # if stdscr: ui.display_message(stdscr, f"Save file {SAVE_FILE} not found. Starting fresh.", color_pair=3, wait=True)
              pass # Silently start fresh if no file
+        self._replay_journal()
+        self.disk_state = disk_state
+
+    def _load_data_sqlite(self):
+        """Loads everything from the SQLite database, importing the pickle save the first time."""
+        pickle_journal = MutationJournal(SAVE_FILE)
+        if self.database.is_empty() and (os.path.exists(SAVE_FILE) or pickle_journal.size() > 0):
+            # One-time migration: load the pickle (and its journal) as usual, then copy it over
+            database, self.database, self.journal = self.database, None, pickle_journal
+            self._load_data_pickle()
+            self.journal.close()
+            self.database = self.journal = database
+            self.database.replace_all(self.students, self.courses, self.marks)
+            return
+        self.students, self.courses, self.marks = self.database.load(self.mark_store_class)
+        self._invalidate_gpas()
+
+    def _load_data_columnar(self):
+        """Maps the columnar save (importing the pickle save the first time), then replays its journal."""
+        if not columnar.columns_exist(columnar.COLUMNAR_DIR) and os.path.exists(SAVE_FILE) and self.journal.size() == 0:
+            # One-time migration: load the pickle (and its journal) as usual, then write it as columns
+            journal, self.journal, self.storage_backend = self.journal, MutationJournal(SAVE_FILE), "pickle"
+            self._load_data_pickle()
+            self.journal.close()
+            self.journal, self.storage_backend = journal, "columnar"
+            columnar.write_columns(columnar.COLUMNAR_DIR, columnar.snapshot(self.students, self.courses, self.marks))
+            return
+        if columnar.columns_exist(columnar.COLUMNAR_DIR):
+            # Marks stay memory-mapped when mark_store_class is SparseMarkStore
+            self.students, self.courses, self.marks = columnar.read_columns(columnar.COLUMNAR_DIR, self.mark_store_class)
+            self._restore_derived(columnar.COLUMNAR_DIR)
+        self._replay_journal()
+
+    def _load_data_partitioned(self):
+        """Loads every segment of the partitioned save in parallel (importing the pickle save the first time)."""
+        if not partitions.partitions_exist(partitions.PARTITION_DIR) and os.path.exists(SAVE_FILE) and self.journal.size() == 0:
+            # One-time migration: load the pickle (and its journal) as usual, then write every segment
+            journal, self.journal, self.storage_backend = self.journal, MutationJournal(SAVE_FILE), "pickle"
+            self._load_data_pickle()
+            self.journal.close()
+            self.journal, self.storage_backend = journal, "partitioned"
+            data = partitions.snapshot(self.students, self.courses, self.marks, partitions.all_segments(self.marks))
+            partitions.write_partitions(partitions.PARTITION_DIR, data, self._open_checkpoint)
+            return
+        if partitions.partitions_exist(partitions.PARTITION_DIR):
+            self.students, self.courses, self.marks = partitions.read_partitions(partitions.PARTITION_DIR, self.mark_store_class)
+            self._restore_derived(partitions.PARTITION_DIR)
+        self._replay_journal() # Replayed records mark their segments dirty for the next save
+
+    def _disk_state(self):
+        """Identifies the saved data: the checkpoint's content fingerprint and the journal files' signatures.
+
+        None if unknown: the checkpoint has no valid fingerprint sidecar, or the backend is SQLite.
+        """
+        if self.database is not None: return None
+        content = fingerprint.read_sidecar(self.checkpoint_path)
+        if content is None and fingerprint.file_signature(self.checkpoint_path): return None
+        return content, fingerprint.file_signature(self.journal.path), fingerprint.file_signature(self.journal.rotated_path)
+
+    def _saved_data_unchanged(self, disk_state):
+        """True if the saved data is still what memory was loaded from or last saved, so reading it is pointless."""
+        return disk_state is not None and disk_state == self.disk_state
+
+    def reload_data(self):
+        """Reads the saved data again (e.g. saved by another instance). Returns False if it was unchanged."""
+        self.wait_for_save()
+        if self._saved_data_unchanged(self._disk_state()): return False
+        self._load_data_pickle()
+        if self.students: self.gpa_tracker.refresh(self.students, self.courses, self.marks)
+        return True
 
+    def _replay_journal(self):
+        """Re-applies the edits journaled since the last checkpoint."""
+        try:
+            records = self.journal.replay()
+        except OSError as e:
+            self._notify(f"Error reading journal {self.journal.path}: {e}", error=True)
+            return
+        for record in records:
+            apply_record(record, self.students, self.courses, self.marks)
+        if records:
+            self._invalidate_replayed(records)
+            self.autosave.touch() # Not in the checkpoint yet: the next save folds them in
+
+
+    def _restore_derived(self, checkpoint_path):
+        """Starts from the GPAs and ranking saved with the checkpoint just loaded, if they still match it."""
+        self._invalidate_gpas()
+        derived = derived_cache.read_cache(checkpoint_path, len(self.students))
+        if derived is not None:
+            self.gpa_tracker.restore(self.students, derived['weighted'], derived['credits'], derived['ranking'])
+
+    def _invalidate_replayed(self, records):
+        """Flags the students whose GPA replayed journal records may have changed."""
+        affected = set()
+        for record in records:
+            if record[0] == 'student': affected.add(record[1])
+            elif record[0] == 'mark': affected.add(record[2])
+            else: affected.update(self.marks.marks_for_course(record[1])) # Its marks start counting
+        self._invalidate_students(affected)
 
     # --- NEW Background Saving Logic ---
 
-    def _save_thread_target(self, data_to_save):
+    def _open_checkpoint(self, path, mode):
+        """Opens the pickle checkpoint with the configured codec; zlib is compressed on all cores."""
+        return compression.open_save(path, mode, self.save_codec, ParallelGzipFile)
+
+    def _checkpoint_data(self, students, courses, marks):
+        """Builds what the backend writes from the stores or their snapshots (runs on the saving side)."""
+        if self.storage_backend == "columnar": return columnar.snapshot(students, courses, marks)
+        return {'students': students.to_list(), 'courses': courses.to_list(), 'marks': marks.to_dict()} # Saved as plain lists
+
+    def _write_checkpoint(self, state, dirty=None):
+        """Serializes (students, courses, marks) and writes them with the configured backend.
+
+        Returns False without writing if the checkpoint on disk already holds exactly this state.
+        """
+        if self.storage_backend == "partitioned": return self._write_partitioned(state, dirty)
+        content = fingerprint.state_fingerprint(*state)
+        if content == fingerprint.read_sidecar(self.checkpoint_path): return False
+        data_to_save = self._checkpoint_data(*state)
+        if self.storage_backend == "columnar": columnar.write_columns(self.checkpoint_path, data_to_save)
+        else: write_checkpoint(SAVE_FILE, data_to_save, self._open_checkpoint) # Temp file + rename, never a half-written save
+        self._write_derived(state, content)
+        return True
+
+    def _write_partitioned(self, state, dirty):
+        """Partitioned _write_checkpoint(): only the dirty segments are serialized, fingerprinted and written.
+
+        No pass over the whole state: clean segments keep their fingerprints, and
+        no GPA cache is saved (loads recalculate the GPAs lazily instead).
+        """
+        data_to_save = partitions.snapshot(*state, dirty)
+        content, segments = partitions.state_fingerprint(self.checkpoint_path, state, data_to_save)
+        if content == fingerprint.read_sidecar(self.checkpoint_path): return False
+        partitions.write_partitions(self.checkpoint_path, data_to_save, self._open_checkpoint)
+        self._write_derived(state, content, segments)
+        return True
+
+    def _write_derived(self, state, content, segments=None):
+        """Saves the content fingerprint, GPA totals and ranking next to the checkpoint just written.
+
+        Only the shortcuts (skipped saves and reloads, warm starts) are lost if this fails.
+        """
+        try:
+            fingerprint.write_sidecar(self.checkpoint_path, content, segments)
+            if segments is None: # Partitioned saves skip the reduction over every mark
+                derived_cache.write_cache(self.checkpoint_path, derived_cache.compute(*state), content)
+        except Exception as e:
+            self._notify(f"Warning: could not write the fingerprint or derived data of {self.checkpoint_path}: {e}", error=True)
+
+    def _fork_save(self, dirty=None):
+        """Forks a child process that writes the checkpoint from its copy-on-write view of memory.
+
+        The child shares nothing with the UI (no GIL, no snapshot) and finishes even if
+        the app exits first. Returns the thread that reaps it.
+        """
+        sys.stdout.flush(); sys.stderr.flush() # The child must not repeat buffered output
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                self._write_checkpoint((self.students, self.courses, self.marks), dirty)
+                self.journal.checkpoint_done() # On disk now, even if the parent is gone
+                exit_code = 0
+            except BaseException as e:
+                print(f"\n[SaveProcess {os.getpid()}] ERROR during background save: {e}", file=sys.stderr)
+            finally:
+                sys.stderr.flush()
+                os._exit(exit_code) # Skip the parent's cleanup (atexit handlers, open windows)
+        return threading.Thread(target=self._reap_save, args=(pid,), name="SaveReaper", daemon=True)
+
+    def _reap_save(self, pid):
+        """Waits for a save process and reports how it ended."""
+        thread_name = threading.current_thread().name
+        _, status = os.waitpid(pid, 0)
+        exit_code = os.waitstatus_to_exitcode(status)
+        if exit_code == 0:
+            self.journal.checkpoint_done() # The child removed the rotated journal; this resets our bookkeeping
+            self.disk_state = self._disk_state()
+            self.autosave.finish(True)
+            self._notify(f"[{thread_name}] Background save (process {pid}) completed.")
+        else:
+            self._notify(f"[{thread_name}] ERROR: save process {pid} exited with code {exit_code}", error=True)
+            self.autosave.finish(False)
+
+    def _save_thread_target(self, state, dirty=None):
         """This function runs in the background thread to save data."""
         # This contains the core saving logic from pw6's _save_data_pickle
         thread_name = threading.current_thread().name
-        print(f"\n[{thread_name}] Starting background save to {SAVE_FILE}...") # Print from thread
+        self._notify(f"[{thread_name}] Starting background save to {self.checkpoint_path}...")
         try:
-            with gzip.open(SAVE_FILE, 'wb') as f:
-                pickle.dump(data_to_save, f, pickle.HIGHEST_PROTOCOL)
-            print(f"[{thread_name}] Background save completed.") # Print from thread
+            written = self._write_checkpoint(state, dirty)
+            self.journal.checkpoint_done() # Records up to the snapshot are in the checkpoint now
+            self.disk_state = self._disk_state()
+            self.autosave.finish(True)
+            self._notify(f"[{thread_name}] Background save completed." if written else f"[{thread_name}] Saved data already up to date, nothing written.")
 
         except Exception as e:
             # Error handling in background thread is tricky. Printing is simplest.
-            print(f"\n[{thread_name}] ERROR during background save: {e}", file=sys.stderr)
+            self._notify(f"[{thread_name}] ERROR during background save: {e}", error=True)
+            self.autosave.finish(False)
 
-    def save_in_background(self):
-        """Initiates the saving process in a background daemon thread."""
-        # Prevent starting multiple save threads if one is already running
-        if self.save_thread and self.save_thread.is_alive():
-            print("Note: Previous save operation still in progress.")
-            # Optionally provide feedback via UI if stdscr is available
+    def autosave_if_due(self):
+        """Starts a save once the scheduler says one is due. Called periodically from the menu loop."""
+        if self.loaded.is_set() and self.autosave.due(): self.save_in_background()
+
+    def wait_for_save(self):
+        """Blocks until the save in flight (if any) has finished."""
+        if self.save_thread: self.save_thread.join()
+
+    # --- Changes from Other Instances ---
+    def merge_external_changes(self):
+        """Applies the edits other instances journaled since the last call. Called periodically from the menu loop.
+
+        Only the entities those records touch change, and only the affected GPAs
+        are invalidated. Returns the number of records that changed something.
+        """
+        if self.database is not None or not self.loaded.is_set(): return 0
+        try:
+            records = self.journal.follow()
+        except OSError as e:
+            self._notify(f"Error reading journal {self.journal.path}: {e}", error=True)
+            return 0
+        return self._merge_records(records)
+
+    def _merge_records(self, records):
+        # Our own records come back too: they change nothing, so they cost no GPA
+        changed = [record for record in records if apply_record(record, self.students, self.courses, self.marks)]
+        if changed: self._invalidate_replayed(changed)
+        return len(changed)
+
+    def _carry_over_external(self):
+        """Re-journals records other instances appended between the last merge and the rotation.
+
+        They are not in the snapshot, and the rotated journal holding them is
+        deleted once the checkpoint is written.
+        """
+        try:
+            records = self.journal.follow()
+            if records: self.journal.append_many(records)
+        except OSError as e:
+            self._notify(f"Error carrying journal records over to {self.journal.path}: {e}", error=True)
             return
+        self._merge_records(records)
 
-        print("\nInitiating background save...") # Message in main thread
+    def save_in_background(self):
+        """Initiates the saving process in a background daemon thread.
 
-        # Create DEEP copies of the data to avoid race conditions
-        # If the main thread modified lists/dicts while the background thread reads them,
-        # errors can occur. Deepcopy is safest.
+        Returns True if the save started (or, for journal and SQLite saves, is done),
+        False if it could not start, and None if there was nothing to save.
+        """
+        # Only one save at a time: a request meanwhile becomes one follow-up save (see autosave_if_due)
+        if self.save_thread and self.save_thread.is_alive():
+            self.autosave.request()
+            self._notify("Note: Previous save operation still in progress, another save will follow it.")
+            return False
+        if not self.autosave.is_dirty():
+            self._notify("No changes since the last save.")
+            return None
+        self.autosave.begin() # Covers every edit so far; later ones wait for the next save
+
+        if self.database is not None:
+            # SQLite backend: every edit is already written, saving commits the transaction
+            try:
+                self.database.sync()
+                self.autosave.finish(True)
+                self._notify(f"Changes committed to {DB_FILE}.")
+            except Exception as e:
+                self.autosave.finish(False)
+                self._notify(f"Error committing to {DB_FILE}: {e}", error=True)
+                return False
+            return True
+
+        if not self.journal.needs_checkpoint():
+            # Every edit is already in the journal: saving just makes it durable
+            try:
+                self.journal.sync()
+                self.disk_state = self._disk_state()
+                self.autosave.finish(True)
+                self._notify("Changes saved to journal.")
+            except OSError as e:
+                self.autosave.finish(False)
+                self._notify(f"Error syncing journal {self.journal.path}: {e}", error=True)
+                return False
+            return True
+
+        self._notify("Initiating background save...") # Message in main thread
+        self.merge_external_changes() # The checkpoint must hold what other instances journaled so far
+
+        # O(1) snapshots instead of deep copies: the stores share their data with the
+        # snapshots and copy on write, so the UI keeps editing while SaveThread
+        # serializes exactly the state of this moment. A forked save needs no
+        # snapshot at all: the OS gives the child copy-on-write pages.
         try:
-             data_copy = {
-                 'students': copy.deepcopy(self.students),
-                 'courses': copy.deepcopy(self.courses),
-                 'marks': copy.deepcopy(self.marks)
-             }
+            state = None if self.save_strategy == "fork" else (self.students.snapshot(), self.courses.snapshot(), self.marks.snapshot())
+            dirty = self.journal.take_dirty() if self.storage_backend == "partitioned" else None # Segments dirtied since the last save
         except Exception as e:
-             print(f"\nError creating deep copy for saving: {e}", file=sys.stderr)
-             # Optionally provide feedback via UI
-             return # Don't start thread if copy fails
-
-        # Create and configure the thread
-        self.save_thread = threading.Thread(
-            target=self._save_thread_target,
-            args=(data_copy,), # Pass the copied data to the thread function
-            name="SaveThread",
-            daemon=True # Set as daemon thread
-        )
+             self._notify(f"Error taking a snapshot for saving: {e}", error=True)
+             self.autosave.finish(False)
+             return False # Don't start thread if copy fails
+        with self.journal.locked(): # No other instance appends between the rotation and the carry-over
+            self.journal.rotate() # Edits from now on go to a fresh journal
+            self._carry_over_external()
+
+        if self.save_strategy == "fork":
+            try:
+                self.save_thread = self._fork_save(dirty) # Thread reaping the save process
+            except OSError as e:
+                self._notify(f"Error starting the save process: {e}", error=True)
+                self.autosave.finish(False)
+                return False # The rotated journal is kept, the next save picks it up
+        else:
+            # Create and configure the thread
+            self.save_thread = threading.Thread(
+                target=self._save_thread_target,
+                args=(state, dirty), # Pass the snapshots to the thread function
+                name="SaveThread",
+                daemon=True # Set as daemon thread
+            )
         # Start the thread
         self.save_thread.start()
-        print("Background save process started. Program can now exit.")
-        # Optional: display message via UI
+        self._notify("Background save process started. Program can now exit.")
+        return True
 
     # --- Helper Methods (Unchanged) ---
     # ... (find_student_by_id, find_course_by_id, get_student_ids, get_course_ids) ...
     def find_student_by_id(self, student_id):
-        for student in self.students:
-            if student.id == student_id:
-                return student
-        return None
+        return self.students.get(student_id) # O(1) index lookup
 
     def find_course_by_id(self, course_id):
-        for course in self.courses:
-            if course.id == course_id:
-                return course
-        return None
+        return self.courses.get(course_id)
 
     def get_student_ids(self):
-         return {s.id for s in self.students}
+         return self.students.ids() # Live view, stays current as students are added
 
     def get_course_ids(self):
-         return {c.id for c in self.courses}
+         return self.courses.ids()
 
     # --- Data Manipulation Methods (Unchanged from pw6) ---
     # ... (add_student, add_course, add_mark) ...
     def add_student(self, student_id, name, dob):
         if not self.find_student_by_id(student_id):
-             self.students.append(Student(student_id, name, dob))
-             self._invalidate_gpas()
+             self.students.add(Student(student_id, name, dob))
+             self.gpa_tracker.mark_dirty(student_id) # Only the new student needs computing
+             self.journal.append('student', student_id, name, dob)
+             self.autosave.touch()
              return True
         return False
 
     def add_course(self, course_id, name, credits):
          if not self.find_course_by_id(course_id):
-              self.courses.append(Course(course_id, name, credits))
-              self._invalidate_gpas()
+              self.courses.add(Course(course_id, name, credits))
+              # Marks already entered for this course start counting now
+              for student_id in self.marks.marks_for_course(course_id): self.gpa_tracker.mark_dirty(student_id)
+              self.journal.append('course', course_id, name, credits)
+              self.autosave.touch()
               return True
          return False
 
     def add_mark(self, course_id, student_id, mark):
-         if course_id not in self.marks:
-              self.marks[course_id] = {}
-         self.marks[course_id][student_id] = mark
-         self._invalidate_gpas()
+         tenths = mark_to_tenths(mark) # Stored and summed as integer tenths
+         old_tenths = self.marks.set_tenths(course_id, student_id, tenths) # Updates both views
+         self.journal.append('mark', course_id, student_id, tenths) # Saving later only has to sync these bytes
+         self.autosave.touch()
+         self._update_student_gpa(course_id, student_id, old_tenths, tenths) # O(1) instead of invalidating everyone
+
+    # --- Bulk imports (one validation pass, one GPA invalidation per call) ---
+    # Rows are iterables of tuples; column arrays can be passed as zip(ids, names, dobs).
+    # Each method returns (number_added, errors) with errors as [(row_index, message), ...].
+    def add_students_bulk(self, rows):
+         valid, errors = data_input.validate_student_rows(rows, self.students.ids())
+         for student_id, name, dob in valid:
+              self.students.add(Student(student_id, name, dob))
+         self.journal.append_many(('student',) + row for row in valid) # One write for the whole batch
+         if valid: self.autosave.touch()
+         self._invalidate_students(student_id for student_id, _, _ in valid)
+         return len(valid), errors
+
+    def add_courses_bulk(self, rows):
+         valid, errors = data_input.validate_course_rows(rows, self.courses.ids())
+         affected = set()
+         for course_id, name, credits in valid:
+              self.courses.add(Course(course_id, name, credits))
+              affected.update(self.marks.marks_for_course(course_id)) # Marks already entered start counting now
+         self.journal.append_many(('course',) + row for row in valid) # One write for the whole batch
+         if valid: self.autosave.touch()
+         self._invalidate_students(affected)
+         return len(valid), errors
+
+    def add_marks_bulk(self, rows):
+         valid, errors = data_input.validate_mark_rows(rows) # Marks may be strings or numbers
+         for course_id, student_id, tenths in valid:
+              self.marks.set_tenths(course_id, student_id, tenths)
+         self.journal.append_many(('mark',) + row for row in valid) # One write for the whole batch
+         if valid: self.autosave.touch()
+         self._invalidate_students(student_id for _, student_id, _ in valid)
+         return len(valid), errors
+
+    def _invalidate_students(self, student_ids):
+         """Flags a batch of students for recomputation by the next calculate_all_gpas()."""
+         student_ids = set(student_ids)
+         if not student_ids: return
+         self.gpa_tracker.invalidate_students(student_ids, len(self.students))
+         if self.gpa_tracker.all_dirty:
+              for student in self.students: student.gpa = None
+              return
+         for student_id in student_ids:
+              student = self.find_student_by_id(student_id)
+              if student: student.gpa = None
 
     # --- GPA and Sorting (Unchanged) ---
     # ... (_invalidate_gpas, calculate_student_gpa, calculate_all_gpas, get_sorted_students_by_gpa) ...
+    def _update_student_gpa(self, course_id, student_id, old_tenths, new_tenths):
+         """Patches one student's running GPA totals after a mark change."""
+         course = self.find_course_by_id(course_id)
+         if not course: return # Mark only counts once its course exists
+         gpa = self.gpa_tracker.update_mark(student_id, course.credits, old_tenths, new_tenths)
+         student = self.find_student_by_id(student_id)
+         if student: student.gpa = gpa
+
     def _invalidate_gpas(self):
          for student in self.students:
               student.gpa = None
+         self.gpa_tracker.invalidate_all()
 
     def calculate_student_gpa(self, student_id):
         student = self.find_student_by_id(student_id)
         if not student: return 0.0 # Or None
         student_marks_values = []; corresponding_credits = []
-        for course_id, marks_dict in self.marks.items():
-            if student_id in marks_dict:
-                course = self.find_course_by_id(course_id)
-                if course:
-                    student_marks_values.append(marks_dict[student_id])
-                    corresponding_credits.append(course.credits)
+        for course, tenths in self.marks.transcript_tenths(student_id, self.courses): # Only this student's marks, as integer tenths
+            student_marks_values.append(tenths); corresponding_credits.append(course.credits)
         if not student_marks_values: student.gpa = 0.0; return 0.0
-        marks_arr = np.array(student_marks_values); credits_arr = np.array(corresponding_credits)
+        marks_arr = np.array(student_marks_values, dtype=np.int64); credits_arr = np.array(corresponding_credits)
         total_credits = np.sum(credits_arr)
         if total_credits == 0: student.gpa = 0.0; return 0.0
-        gpa = np.sum(marks_arr * credits_arr) / total_credits; student.gpa = gpa; return gpa
+        gpa = np.sum(marks_arr * credits_arr) / (total_credits * 10); student.gpa = gpa; return gpa # Exact integer sum, one division
 
     def calculate_all_gpas(self):
          if not self.students: return
-         for student in self.students: self.calculate_student_gpa(student.id)
+         # Only dirty students are recomputed; a full matrix reduction happens after (re)loading
+         self.gpa_tracker.refresh(self.students, self.courses, self.marks)
 
     def get_sorted_students_by_gpa(self):
          self.calculate_all_gpas()
-         return sorted(self.students, key=lambda s: s.gpa if s.gpa is not None else -1, reverse=True)
+         # Ranking index is kept in order as GPAs change, no full re-sort here
+         return self.gpa_tracker.ranking.ordered()
+
+    def get_top_students(self, k):
+         if self.database is not None: return self._students_with_gpas(self.database.top_students(k)) # SQL aggregate, ties in insertion order
+         self.calculate_all_gpas()
+         return self.gpa_tracker.ranking.top_k(k)
+
+    def get_bottom_students(self, k):
+         if self.database is not None: return self._students_with_gpas(self.database.bottom_students(k))
+         self.calculate_all_gpas()
+         return self.gpa_tracker.ranking.bottom_k(k)
+
+    def get_student_rank(self, student_id):
+         if self.database is not None: return self.database.student_rank(student_id)
+         self.calculate_all_gpas()
+         return self.gpa_tracker.ranking.rank_of(student_id)
+
+    def _students_with_gpas(self, rows):
+         """Maps SqliteStore [(student_id, gpa), ...] rows to the loaded students, GPAs filled in."""
+         students = []
+         for student_id, gpa in rows:
+             student = self.students.get(student_id)
+             if student is None: continue # Not loaded (yet)
+             student.gpa = gpa; students.append(student)
+         return students
 
     # --- Curses Interaction Methods (Unchanged from pw6) ---
     # ... (run_input_students, run_input_courses, run_input_marks - they no longer call save directly) ...
@@ -201,10 +660,10 @@ class Application:
                 if not s_name: ui.display_message(stdscr, "Name cannot be empty. Press key.", wait=True, color_pair=2); continue
                 s_dob = ui.get_input(stdscr, "  Student DoB (dd/mm/yyyy): ", 5, 1)
                 if not s_dob: ui.display_message(stdscr, "DoB cannot be empty. Press key.", wait=True, color_pair=2); continue
-                if self.add_student(s_id, s_name, s_dob): existing_ids.add(s_id); added_count += 1
+                if self.add_student(s_id, s_name, s_dob): added_count += 1
                 else: ui.display_message(stdscr, f"Failed to add student {s_id}. Might already exist.", wait=True, color_pair=2)
                 break # Move to next student
-        if added_count > 0: ui.display_message(stdscr, f"{added_count} student(s) added. Data will be saved on exit.", wait=True)
+        if added_count > 0: ui.display_message(stdscr, f"{added_count} student(s) added. Changes are saved automatically.", wait=True)
 
     def run_input_courses(self, stdscr):
         # ... (keep existing input loop logic from pw6/main.py) ...
@@ -223,10 +682,10 @@ class Application:
                 c_credits_str = ui.get_input(stdscr, "  Course Credits: ", 5, 1)
                 c_credits = data_input.validate_credits(c_credits_str)
                 if c_credits is None: ui.display_message(stdscr, "Invalid credits (must be positive integer). Press key.", wait=True, color_pair=2); continue
-                if self.add_course(c_id, c_name, c_credits): existing_ids.add(c_id); added_count += 1
+                if self.add_course(c_id, c_name, c_credits): added_count += 1
                 else: ui.display_message(stdscr, f"Failed to add course {c_id}. Might already exist.", wait=True, color_pair=2)
                 break # Move to next course
-        if added_count > 0: ui.display_message(stdscr, f"{added_count} course(s) added. Data will be saved on exit.", wait=True)
+        if added_count > 0: ui.display_message(stdscr, f"{added_count} course(s) added. Changes are saved automatically.", wait=True)
 
     def run_input_marks(self, stdscr):
          # ... (keep existing logic from pw6/main.py) ...
@@ -248,7 +707,7 @@ class Application:
                        self.add_mark(selected_course.id, student.id, mark); marks_entered = True
                        stdscr.move(h - 1, 1); stdscr.clrtoeol(); y_pos += 1; break
               if y_pos >= h - 2: ui.display_message(stdscr, "Screen full... Press key.", wait=True); stdscr.clear(); ui.display_message(stdscr, title, y_offset=5); y_pos = 2
-         if marks_entered: ui.display_message(stdscr, f"Marks input complete for {selected_course.id}. Data will be saved on exit.", wait=True)
+         if marks_entered: ui.display_message(stdscr, f"Marks input complete for {selected_course.id}. Changes are saved automatically.", wait=True)
          else: ui.display_message(stdscr, f"No marks entered for {selected_course.id}. Press key.", wait=True)
 
 
@@ -259,27 +718,35 @@ class Application:
         curses.curs_set(0); curses.noecho(); stdscr.keypad(True)
         curses.start_color(); curses.init_pair(1, curses.COLOR_GREEN, curses.COLOR_BLACK)
         curses.init_pair(2, curses.COLOR_RED, curses.COLOR_BLACK); curses.init_pair(3, curses.COLOR_YELLOW, curses.COLOR_BLACK)
+        self.ui_active = True # Messages from LoadThread/SaveThread go to the status line from now on
 
-        # --- LOAD DATA AT START ( Happens in __init__ ) ---
-        if not self.students or not self.courses:
+        # --- LOAD DATA AT START ( Started in __init__, may still be running on LoadThread ) ---
+        if self.loaded.is_set() and (not self.students or not self.courses):
              ui.display_message(stdscr,"No data loaded. Consider inputting initial students and courses.", wait=True, color_pair=3)
 
         # Menu definition (Update Exit option text if needed)
         menu_options = [
             "1. Input Students", "2. Input Courses", "3. Input Marks for a Course",
             "4. List All Students", "5. List All Courses", "6. Show Mark Sheet for a Course",
-            "7. List Students Sorted by GPA", "0. Save & Exit (Background)"
+            "7. List Students Sorted by GPA", "8. Reload Saved Data", "0. Save & Exit (Background)"
         ]
         current_row = 0
 
         while True:
             ui.display_menu(stdscr, menu_options, current_row)
+            status = self.status_message
+            if status: ui.display_message(stdscr, status[0], color_pair=status[1], wait=False)
+            stdscr.timeout(AUTOSAVE_POLL_MS) # Wake up now and then to autosave; input screens still block
             key = stdscr.getch()
+            stdscr.timeout(-1)
+            self.autosave_if_due()
+            self.merge_external_changes() # Edits from other instances show up in the next list
 
             if key == curses.KEY_UP and current_row > 0: current_row -= 1
             elif key == curses.KEY_DOWN and current_row < len(menu_options) - 1: current_row += 1
             elif key == curses.KEY_ENTER or key in [10, 13]:
                 action_row = current_row
+                self._wait_until_loaded(stdscr) # Actions (and the exit save) need the fully loaded data
 
                 # --- Menu actions 1-7 remain the same ---
                 if action_row == 0: self.run_input_students(stdscr)
@@ -296,15 +763,23 @@ class Application:
                 elif action_row == 6: # List Sorted Students
                       sorted_students = self.get_sorted_students_by_gpa()
                       ui.display_list(stdscr, "Students Sorted by GPA", f"{'ID':<10} {'Name':<25} {'DoB':<15} {'GPA':<5}", sorted_students, lambda s: s.get_display_info(show_gpa=True))
+                elif action_row == 7: # Reload (e.g. after another instance saved)
+                      ui.display_message(stdscr, "Reloading saved data...", wait=False)
+                      msg = "Saved data reloaded." if self.reload_data() else "Saved data unchanged, nothing to reload."
+                      ui.display_message(stdscr, f"{msg} Press key.", wait=True)
 
                 # --- NEW EXIT LOGIC ---
                 elif action_row == len(menu_options) - 1: # Exit
-                    # Initiate save in background thread
-                    self.save_in_background()
+                    # Initiate save in background thread (after any autosave still running)
+                    self.wait_for_save()
+                    started = self.save_in_background()
                     # Display message and exit main thread
                     # Note: Curses screen needs to be cleaned up by wrapper.
                     # We might need a slight delay for the user to see the message.
-                    ui.display_message(stdscr, "Save initiated in background. Exiting...", wait=False)
+                    if started is None: msg, color = "Nothing to save. Exiting...", 1
+                    elif started: msg, color = "Save initiated in background. Exiting...", 1
+                    else: msg, color = "Could not save, see the message after exit. Exiting...", 2
+                    ui.display_message(stdscr, msg, color_pair=color, wait=False)
                     stdscr.refresh()
                     time.sleep(2.0) # Give user time to see message & save thread to start
                     break # Exit the while loop (curses wrapper will handle cleanup)
@@ -312,6 +787,7 @@ class Application:
         # This part is reached after the loop breaks
         # Final message might be tricky if curses cleans up immediately.
         # The 'Exiting' message is shown just before break now.
+        self.ui_active = False # The wrapper restores the terminal next: later messages are printed
 
 # --- Script Execution ---
 if __name__ == "__main__":
@@ -319,8 +795,9 @@ if __name__ == "__main__":
     try: import numpy; import curses; import curses.panel
     except ImportError as e: print(f"Dependency Error: {e}"); sys.exit(1)
 
-    app = Application()
+    app = Application(load_in_background=True) # Menu appears while the data loads
     curses.wrapper(app.main)
+    if app.status_message: print(app.status_message[0]) # Last save message, shown on the screen that just closed
     # After wrapper finishes (program exits), Python might wait for non-daemon threads.
     # Since our save thread IS a daemon, Python should exit promptly.
     print("\nMain program finished.") # This might print after curses screen closes
\ No newline at end of file
@@ -1,169 +1,673 @@
 # pw9/app_logic.py
 import os
 import sys
-import pickle
-import gzip
 import threading
-import copy
 import numpy as np
 
 # Assuming domains and input are in the same package level or accessible
 # If running main.py directly, might need adjustment, but with -m should be fine
 from .domains import Student, Course
 from . import input as data_input # Keep validation logic separate
+from . import gpa_engine
+from .repository import EntityStore
+from .mark_store import MarkStore
+from .sparse_mark_store import SparseMarkStore
+from .journal import MutationJournal, apply_record, write_checkpoint, read_checkpoint_stages
+from .parallel_gzip import ParallelGzipFile
+from .sqlite_store import SqliteStore, DB_FILE
+from . import columnar
+from . import compression
+from . import partitions
+from . import derived_cache
+from . import fingerprint
+from .autosave import SaveScheduler
 
 SAVE_FILE = "student_data.pkl.gz"
+STORAGE_BACKEND = os.environ.get("STUDENT_STORAGE", "pickle") # "pickle", "sqlite", "columnar" or "partitioned"
+SAVE_CODEC = os.environ.get("STUDENT_SAVE_CODEC", "zlib:9") # SAVE_FILE codec: "none", "zlib:1".."zlib:9", "bz2:N" or "lzma:N"
+SAVE_STRATEGY = os.environ.get("STUDENT_SAVE_STRATEGY", "thread") # Checkpoints written by "thread" (SaveThread) or "fork" (a child process)
+MARK_STORE = os.environ.get("STUDENT_MARK_STORE", "auto") # "dense" (MarkStore), "sparse" (SparseMarkStore) or "auto": sparse for columnar saves
+
+def default_mark_store_class(storage_backend, setting=MARK_STORE):
+    """Mark store for a backend. SparseMarkStore keeps columnar marks memory-mapped; MarkStore would copy every one."""
+    if setting == "auto": setting = "sparse" if storage_backend == "columnar" else "dense"
+    if setting not in ("dense", "sparse"):
+        raise ValueError(f"Unknown mark store {setting!r} (expected auto, dense or sparse)")
+    return SparseMarkStore if setting == "sparse" else MarkStore
 
 class AppLogic:
-    def __init__(self):
-        self.students = []
-        self.courses = []
-        self.marks = {} # {course_id: {student_id: mark}}
+    def __init__(self, mark_store_class=None, storage_backend=STORAGE_BACKEND, save_codec=SAVE_CODEC, load_in_background=False, save_strategy=SAVE_STRATEGY):
+        # MarkStore, or SparseMarkStore for wide, sparsely enrolled catalogs (and the columnar backend, see MARK_STORE)
+        self.mark_store_class = mark_store_class or default_mark_store_class(storage_backend)
+        self.students = EntityStore() # Students in insertion order, indexed by ID
+        self.courses = EntityStore()
+        self.marks = self.mark_store_class() # Course-major and student-major views of the marks
+        self.gpa_tracker = gpa_engine.GpaTracker() # Running GPA totals per student
         self.save_thread = None
-        self._load_data_pickle() # Load data on initialization
+        self.autosave = SaveScheduler() # Edit generations; says when a (coalesced) save is due
+        self.storage_backend = storage_backend
+        self.database = SqliteStore(DB_FILE) if storage_backend == "sqlite" else None
+        self.checkpoint_path = {"columnar": columnar.COLUMNAR_DIR, "partitioned": partitions.PARTITION_DIR}.get(storage_backend, SAVE_FILE)
+        # Edits are recorded through append()/append_many(): in the database, or in the checkpoint's journal
+        # (the partitioned journal also tracks which segments the edits dirty)
+        journal_class = partitions.PartitionedJournal if storage_backend == "partitioned" else MutationJournal
+        self.journal = self.database if self.database is not None else journal_class(self.checkpoint_path)
+        self.save_codec = compression.parse_codec(save_codec) # (name, level); loading detects the codec
+        if save_strategy not in ("thread", "fork"):
+            raise ValueError(f"Unknown save strategy {save_strategy!r} (expected thread or fork)")
+        if save_strategy == "fork" and not hasattr(os, "fork"):
+            print("Note: fork() is not available on this platform, saving on a thread instead.")
+            save_strategy = "thread"
+        self.save_strategy = save_strategy
+        self.disk_state = None # _disk_state() when memory last matched the saved data (after a load or save)
+        # Staged loading: students and courses first, then marks and the GPA cache.
+        # With load_in_background the GUI can open right away, poll load_progress
+        # and wait on `loaded`; methods that need the marks wait for it themselves.
+        self.index_ready = threading.Event() # Students and courses can be listed (get_students/get_courses)
+        self.loaded = threading.Event()      # Everything is loaded
+        self.load_progress = (0.0, "Loading data...") # (fraction done, message), replaced as loading advances
+        self._index_preview = ([], [])       # Read-only student/course lists shown while the marks load
+        self.load_thread = None
+        if load_in_background:
+            self.load_thread = threading.Thread(target=self._load_all, name="LoadThread", daemon=True)
+            self.load_thread.start()
+        else:
+            self._load_all() # Load data on initialization
+
+    # --- Staged loading ---
+    def _load_all(self):
+        """Loads every stage, then warms the GPA cache. Runs on LoadThread with load_in_background."""
+        try:
+            self._load_data_pickle()
+            self._publish_progress(0.9, "Computing GPAs...")
+            if self.students: self.gpa_tracker.refresh(self.students, self.courses, self.marks)
+        except Exception as e:
+            print(f"Error loading data: {e}", file=sys.stderr)
+        finally:
+            self._publish_progress(1.0, "Data loaded.")
+            self.index_ready.set()
+            self.loaded.set()
+
+    def _publish_progress(self, fraction, message):
+        self.load_progress = (fraction, message) # One tuple assignment: readers never see half an update
+
+    def _publish_index(self):
+        """Makes the students and courses available for listing before the marks are loaded."""
+        self._index_preview = (self.students.to_list(), self.courses.to_list())
+        self.index_ready.set()
+
+    def wait_until_loaded(self, timeout=None):
+        """Blocks until loading has finished (or timeout seconds). Returns True if loaded."""
+        return self.loaded.wait(timeout)
 
     def _load_data_pickle(self):
-        """Loads application state from a gzipped pickle file."""
+        """Loads application state from a compressed pickle file (or the SQLite database).
+
+        Nothing is read while the saved data is still what memory was loaded from or last saved.
+        """
+        disk_state = self._disk_state() # Taken first: a save by another instance meanwhile means the next load reads again
+        if self._saved_data_unchanged(disk_state):
+            print("Saved data unchanged, keeping the data in memory.")
+            return True
+        self.disk_state = None
+        self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class() # Reloads start over
+        self._invalidate_gpas()
+        if self.database is not None:
+            try:
+                self._load_data_sqlite()
+                print(f"Data loaded from {DB_FILE}.")
+                return True
+            except Exception as e:
+                print(f"Error loading data from {DB_FILE}: {e}. Starting fresh.", file=sys.stderr)
+                self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class()
+                return False
+        if self.storage_backend == "columnar":
+            try:
+                self._load_data_columnar()
+                self.disk_state = disk_state
+                print(f"Data loaded from {columnar.COLUMNAR_DIR}.")
+                return True
+            except Exception as e:
+                print(f"Error loading data from {columnar.COLUMNAR_DIR}: {e}. Starting fresh.", file=sys.stderr)
+                self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class()
+                return False
+        if self.storage_backend == "partitioned":
+            try:
+                self._load_data_partitioned()
+                self.disk_state = disk_state
+                print(f"Data loaded from {partitions.PARTITION_DIR}.")
+                return True
+            except Exception as e:
+                print(f"Error loading data from {partitions.PARTITION_DIR}: {e}. Starting fresh.", file=sys.stderr)
+                self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class()
+                return False
         load_success = False
         if os.path.exists(SAVE_FILE):
             try:
                 print(f"Loading data from {SAVE_FILE}...") # Log to console
-                with gzip.open(SAVE_FILE, 'rb') as f:
-                    loaded_data = pickle.load(f)
-                self.students = loaded_data.get('students', [])
-                self.courses = loaded_data.get('courses', [])
-                self.marks = loaded_data.get('marks', {})
-                self._invalidate_gpas()
+                self._publish_progress(0.1, "Loading students and courses...")
+                with compression.open_save(SAVE_FILE) as f:
+                    stages = read_checkpoint_stages(f)
+                    loaded_data = next(stages) # Index stage: only the start of the file is decompressed
+                    self.students = EntityStore(loaded_data.get('students', []))
+                    self.courses = EntityStore(loaded_data.get('courses', []))
+                    self._publish_index()
+                    self._publish_progress(0.4, "Loading marks...")
+                    for stage in stages: loaded_data.update(stage)
+                self.marks = self.mark_store_class.from_dict(loaded_data.get('marks', {}))
+                self._publish_progress(0.8, "Replaying journal...")
+                self._restore_derived(SAVE_FILE) # Saved GPAs if they still match, else recalculated later
                 print("Data loaded successfully.")
                 load_success = True
             except Exception as e:
                  print(f"Error loading data: {e}. Starting fresh.", file=sys.stderr)
                  # If loading fails, ensure we start with empty lists/dict
-                 self.students, self.courses, self.marks = [], [], {}
+                 self.students, self.courses, self.marks = EntityStore(), EntityStore(), self.mark_store_class()
         else:
              print(f"Save file {SAVE_FILE} not found. Starting fresh.")
+        if load_success or not os.path.exists(SAVE_FILE):
+            self._replay_journal()
+            self.disk_state = disk_state
         return load_success # Indicate if load was successful
 
-    def _save_thread_target(self, data_to_save):
+    def _load_data_sqlite(self):
+        """Loads everything from the SQLite database, importing the pickle save the first time."""
+        pickle_journal = MutationJournal(SAVE_FILE)
+        if self.database.is_empty() and (os.path.exists(SAVE_FILE) or pickle_journal.size() > 0):
+            # One-time migration: load the pickle (and its journal) as usual, then copy it over
+            database, self.database, self.journal = self.database, None, pickle_journal
+            self._load_data_pickle()
+            self.journal.close()
+            self.database = self.journal = database
+            self.database.replace_all(self.students, self.courses, self.marks)
+            return
+        self.students, self.courses, self.marks = self.database.load(self.mark_store_class)
+        self._invalidate_gpas()
+
+    def _load_data_columnar(self):
+        """Maps the columnar save (importing the pickle save the first time), then replays its journal."""
+        if not columnar.columns_exist(columnar.COLUMNAR_DIR) and os.path.exists(SAVE_FILE) and self.journal.size() == 0:
+            # One-time migration: load the pickle (and its journal) as usual, then write it as columns
+            journal, self.journal, self.storage_backend = self.journal, MutationJournal(SAVE_FILE), "pickle"
+            self._load_data_pickle()
+            self.journal.close()
+            self.journal, self.storage_backend = journal, "columnar"
+            columnar.write_columns(columnar.COLUMNAR_DIR, columnar.snapshot(self.students, self.courses, self.marks))
+            return
+        if columnar.columns_exist(columnar.COLUMNAR_DIR):
+            # Marks stay memory-mapped when mark_store_class is SparseMarkStore
+            self.students, self.courses, self.marks = columnar.read_columns(columnar.COLUMNAR_DIR, self.mark_store_class)
+            self._restore_derived(columnar.COLUMNAR_DIR)
+        self._replay_journal()
+
+    def _load_data_partitioned(self):
+        """Loads every segment of the partitioned save in parallel (importing the pickle save the first time)."""
+        if not partitions.partitions_exist(partitions.PARTITION_DIR) and os.path.exists(SAVE_FILE) and self.journal.size() == 0:
+            # One-time migration: load the pickle (and its journal) as usual, then write every segment
+            journal, self.journal, self.storage_backend = self.journal, MutationJournal(SAVE_FILE), "pickle"
+            self._load_data_pickle()
+            self.journal.close()
+            self.journal, self.storage_backend = journal, "partitioned"
+            data = partitions.snapshot(self.students, self.courses, self.marks, partitions.all_segments(self.marks))
+            partitions.write_partitions(partitions.PARTITION_DIR, data, self._open_checkpoint)
+            return
+        if partitions.partitions_exist(partitions.PARTITION_DIR):
+            self.students, self.courses, self.marks = partitions.read_partitions(partitions.PARTITION_DIR, self.mark_store_class)
+            self._restore_derived(partitions.PARTITION_DIR)
+        self._replay_journal() # Replayed records mark their segments dirty for the next save
+
+    def _disk_state(self):
+        """Identifies the saved data: the checkpoint's content fingerprint and the journal files' signatures.
+
+        None if unknown: the checkpoint has no valid fingerprint sidecar, or the backend is SQLite.
+        """
+        if self.database is not None: return None
+        content = fingerprint.read_sidecar(self.checkpoint_path)
+        if content is None and fingerprint.file_signature(self.checkpoint_path): return None
+        return content, fingerprint.file_signature(self.journal.path), fingerprint.file_signature(self.journal.rotated_path)
+
+    def _saved_data_unchanged(self, disk_state):
+        """True if the saved data is still what memory was loaded from or last saved, so reading it is pointless."""
+        return disk_state is not None and disk_state == self.disk_state
+
+    def reload_data(self):
+        """Reads the saved data again (e.g. saved by another instance). Returns False if it was unchanged."""
+        self.wait_until_loaded()
+        self.wait_for_save()
+        if self._saved_data_unchanged(self._disk_state()): return False
+        self._load_data_pickle()
+        if self.students: self.gpa_tracker.refresh(self.students, self.courses, self.marks)
+        return True
+
+    def _replay_journal(self):
+        """Re-applies the edits journaled since the last checkpoint."""
+        try:
+            records = self.journal.replay()
+        except OSError as e:
+            print(f"Error reading journal {self.journal.path}: {e}", file=sys.stderr)
+            return
+        for record in records:
+            apply_record(record, self.students, self.courses, self.marks)
+        if records:
+            self._invalidate_replayed(records)
+            self.autosave.touch() # Not in the checkpoint yet: the next save folds them in
+            print(f"Replayed {len(records)} journaled change(s).")
+
+    def _restore_derived(self, checkpoint_path):
+        """Starts from the GPAs and ranking saved with the checkpoint just loaded, if they still match it."""
+        self._invalidate_gpas()
+        derived = derived_cache.read_cache(checkpoint_path, len(self.students))
+        if derived is not None:
+            self.gpa_tracker.restore(self.students, derived['weighted'], derived['credits'], derived['ranking'])
+
+    def _invalidate_replayed(self, records):
+        """Flags the students whose GPA replayed journal records may have changed."""
+        affected = set()
+        for record in records:
+            if record[0] == 'student': affected.add(record[1])
+            elif record[0] == 'mark': affected.add(record[2])
+            else: affected.update(self.marks.marks_for_course(record[1])) # Its marks start counting
+        self._invalidate_students(affected)
+
+    def _open_checkpoint(self, path, mode):
+        """Opens the pickle checkpoint with the configured codec; zlib is compressed on all cores."""
+        return compression.open_save(path, mode, self.save_codec, ParallelGzipFile)
+
+    def _checkpoint_data(self, students, courses, marks):
+        """Builds what the backend writes from the stores or their snapshots (runs on the saving side)."""
+        if self.storage_backend == "columnar": return columnar.snapshot(students, courses, marks)
+        return {'students': students.to_list(), 'courses': courses.to_list(), 'marks': marks.to_dict()} # Saved as plain lists
+
+    def _write_checkpoint(self, state, dirty=None):
+        """Serializes (students, courses, marks) and writes them with the configured backend.
+
+        Returns False without writing if the checkpoint on disk already holds exactly this state.
+        """
+        if self.storage_backend == "partitioned": return self._write_partitioned(state, dirty)
+        content = fingerprint.state_fingerprint(*state)
+        if content == fingerprint.read_sidecar(self.checkpoint_path): return False
+        data_to_save = self._checkpoint_data(*state)
+        if self.storage_backend == "columnar": columnar.write_columns(self.checkpoint_path, data_to_save)
+        else: write_checkpoint(SAVE_FILE, data_to_save, self._open_checkpoint) # Temp file + rename, never a half-written save
+        self._write_derived(state, content)
+        return True
+
+    def _write_partitioned(self, state, dirty):
+        """Partitioned _write_checkpoint(): only the dirty segments are serialized, fingerprinted and written.
+
+        No pass over the whole state: clean segments keep their fingerprints, and
+        no GPA cache is saved (loads recalculate the GPAs lazily instead).
+        """
+        data_to_save = partitions.snapshot(*state, dirty)
+        content, segments = partitions.state_fingerprint(self.checkpoint_path, state, data_to_save)
+        if content == fingerprint.read_sidecar(self.checkpoint_path): return False
+        partitions.write_partitions(self.checkpoint_path, data_to_save, self._open_checkpoint)
+        self._write_derived(state, content, segments)
+        return True
+
+    def _write_derived(self, state, content, segments=None):
+        """Saves the content fingerprint, GPA totals and ranking next to the checkpoint just written.
+
+        Only the shortcuts (skipped saves and reloads, warm starts) are lost if this fails.
+        """
+        try:
+            fingerprint.write_sidecar(self.checkpoint_path, content, segments)
+            if segments is None: # Partitioned saves skip the reduction over every mark
+                derived_cache.write_cache(self.checkpoint_path, derived_cache.compute(*state), content)
+        except Exception as e:
+            print(f"Warning: could not write the fingerprint or derived data of {self.checkpoint_path}: {e}", file=sys.stderr)
+
+    def _fork_save(self, dirty=None):
+        """Forks a child process that writes the checkpoint from its copy-on-write view of memory.
+
+        The child shares nothing with the UI (no GIL, no snapshot) and finishes even if
+        the app exits first. Returns the thread that reaps it.
+        """
+        sys.stdout.flush(); sys.stderr.flush() # The child must not repeat buffered output
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                self._write_checkpoint((self.students, self.courses, self.marks), dirty)
+                self.journal.checkpoint_done() # On disk now, even if the parent is gone
+                exit_code = 0
+            except BaseException as e:
+                print(f"\n[SaveProcess {os.getpid()}] ERROR during background save: {e}", file=sys.stderr)
+            finally:
+                sys.stderr.flush()
+                os._exit(exit_code) # Skip the parent's cleanup (atexit handlers, open windows)
+        return threading.Thread(target=self._reap_save, args=(pid,), name="SaveReaper", daemon=True)
+
+    def _reap_save(self, pid):
+        """Waits for a save process and reports how it ended."""
+        thread_name = threading.current_thread().name
+        _, status = os.waitpid(pid, 0)
+        exit_code = os.waitstatus_to_exitcode(status)
+        if exit_code == 0:
+            self.journal.checkpoint_done() # The child removed the rotated journal; this resets our bookkeeping
+            self.disk_state = self._disk_state()
+            self.autosave.finish(True)
+            print(f"[{thread_name}] Background save (process {pid}) completed.")
+        else:
+            print(f"\n[{thread_name}] ERROR: save process {pid} exited with code {exit_code}", file=sys.stderr)
+            self.autosave.finish(False)
+
+    def _save_thread_target(self, state, dirty=None):
         """This function runs in the background thread to save data."""
         thread_name = threading.current_thread().name
-        print(f"\n[{thread_name}] Starting background save to {SAVE_FILE}...")
+        print(f"\n[{thread_name}] Starting background save to {self.checkpoint_path}...")
         try:
-            with gzip.open(SAVE_FILE, 'wb') as f:
-                pickle.dump(data_to_save, f, pickle.HIGHEST_PROTOCOL)
-            print(f"[{thread_name}] Background save completed.")
+            written = self._write_checkpoint(state, dirty)
+            self.journal.checkpoint_done() # Records up to the snapshot are in the checkpoint now
+            self.disk_state = self._disk_state()
+            self.autosave.finish(True)
+            print(f"[{thread_name}] Background save completed." if written else f"[{thread_name}] Saved data already up to date, nothing written.")
         except Exception as e:
             print(f"\n[{thread_name}] ERROR during background save: {e}", file=sys.stderr)
+            self.autosave.finish(False)
+
+    def autosave_if_due(self):
+        """Starts a save once the scheduler says one is due. Call it periodically from the UI thread."""
+        if not self.loaded.is_set() or not self.autosave.due(): return False
+        return self.save_in_background()
+
+    def wait_for_save(self):
+        """Blocks until the save in flight (if any) has finished."""
+        if self.save_thread: self.save_thread.join()
+
+    # --- Changes from other instances ---
+    def merge_external_changes(self):
+        """Applies the edits other instances journaled since the last call. Call it periodically from the UI thread.
+
+        Only the entities those records touch change, and only the affected GPAs
+        are invalidated. Returns the number of records that changed something.
+        """
+        if self.database is not None or not self.loaded.is_set(): return 0
+        try:
+            records = self.journal.follow()
+        except OSError as e:
+            print(f"Error reading journal {self.journal.path}: {e}", file=sys.stderr)
+            return 0
+        return self._merge_records(records)
+
+    def _merge_records(self, records):
+        # Our own records come back too: they change nothing, so they cost no GPA
+        changed = [record for record in records if apply_record(record, self.students, self.courses, self.marks)]
+        if changed: self._invalidate_replayed(changed)
+        return len(changed)
+
+    def _carry_over_external(self):
+        """Re-journals records other instances appended between the last merge and the rotation.
+
+        They are not in the snapshot, and the rotated journal holding them is
+        deleted once the checkpoint is written.
+        """
+        try:
+            records = self.journal.follow()
+            if records: self.journal.append_many(records)
+        except OSError as e:
+            print(f"Error carrying journal records over to {self.journal.path}: {e}", file=sys.stderr)
+            return
+        self._merge_records(records)
 
     def save_in_background(self):
-        """Initiates the saving process in a background daemon thread."""
+        """Initiates the saving process in a background daemon thread.
+
+        Returns True if the save started (or, for journal and SQLite saves, is done),
+        False if it could not start, and None if there was nothing to save.
+        """
+        self.wait_until_loaded()
         if self.save_thread and self.save_thread.is_alive():
-            print("Note: Previous save operation still in progress.")
+            self.autosave.request() # Served by autosave_if_due() once this save is done
+            print("Note: Previous save operation still in progress, another save will follow it.")
             return False # Indicate save didn't start
+        if not self.autosave.is_dirty():
+            print("No changes since the last save.")
+            return None # Distinct from a started save: the caller can say so
+        self.autosave.begin() # Covers every edit so far; later ones wait for the next save
+
+        if self.database is not None:
+            # SQLite backend: every edit is already written, saving commits the transaction
+            try:
+                self.database.sync()
+            except Exception as e:
+                print(f"\nError committing to {DB_FILE}: {e}", file=sys.stderr)
+                self.autosave.finish(False)
+                return False
+            self.autosave.finish(True)
+            print(f"Changes committed to {DB_FILE}.")
+            return True
+
+        if not self.journal.needs_checkpoint():
+            # Every edit is already in the journal: saving just makes it durable
+            try:
+                self.journal.sync()
+            except OSError as e:
+                print(f"\nError syncing journal {self.journal.path}: {e}", file=sys.stderr)
+                self.autosave.finish(False)
+                return False
+            self.disk_state = self._disk_state()
+            self.autosave.finish(True)
+            print("Changes saved to journal.")
+            return True
 
         print("\nInitiating background save...")
+        self.merge_external_changes() # The checkpoint must hold what other instances journaled so far
+
+        # O(1) snapshots instead of deep copies: the stores share their data with the
+        # snapshots and copy on write, so the UI keeps editing while SaveThread
+        # serializes exactly the state of this moment. A forked save needs no
+        # snapshot at all: the OS gives the child copy-on-write pages.
         try:
-             data_copy = {
-                 'students': copy.deepcopy(self.students),
-                 'courses': copy.deepcopy(self.courses),
-                 'marks': copy.deepcopy(self.marks)
-             }
+            state = None if self.save_strategy == "fork" else (self.students.snapshot(), self.courses.snapshot(), self.marks.snapshot())
+            dirty = self.journal.take_dirty() if self.storage_backend == "partitioned" else None # Segments dirtied since the last save
         except Exception as e:
-             print(f"\nError creating deep copy for saving: {e}", file=sys.stderr)
+             print(f"\nError taking a snapshot for saving: {e}", file=sys.stderr)
+             self.autosave.finish(False)
              return False # Indicate save didn't start
+        with self.journal.locked(): # No other instance appends between the rotation and the carry-over
+            self.journal.rotate() # Edits from now on go to a fresh journal
+            self._carry_over_external()
 
-        self.save_thread = threading.Thread(
-            target=self._save_thread_target, args=(data_copy,),
-            name="SaveThread", daemon=True
-        )
+        if self.save_strategy == "fork":
+            try:
+                self.save_thread = self._fork_save(dirty)
+            except OSError as e:
+                print(f"\nError starting the save process: {e}", file=sys.stderr)
+                self.autosave.finish(False)
+                return False # The rotated journal is kept, the next save picks it up
+        else:
+            self.save_thread = threading.Thread(
+                target=self._save_thread_target, args=(state, dirty),
+                name="SaveThread", daemon=True
+            )
         self.save_thread.start()
         print("Background save process started.")
         return True # Indicate save started
 
     # --- Data Access Methods for GUI ---
     def get_students(self):
+        if not self.loaded.is_set(): return self._index_preview[0] # Still loading: the index stage
         return self.students
 
     def get_courses(self):
+        if not self.loaded.is_set(): return self._index_preview[1]
         return self.courses
 
     def get_marks(self):
-        return self.marks # GUI can iterate through this
+        return self.marks # MarkStore: marks_for_course / marks_for_student / transcript
+
+    def get_transcript(self, student_id):
+        """Returns [(course, mark), ...] for one student."""
+        self.wait_until_loaded()
+        return self.marks.transcript(student_id, self.courses)
 
     def get_course_by_id(self, course_id): # Renamed from find_
-         for course in self.courses:
-            if course.id == course_id:
-                return course
-         return None
+         return self.courses.get(course_id) # O(1) index lookup
 
     def get_student_by_id(self, student_id): # Renamed from find_
-         for student in self.students:
-              if student.id == student_id:
-                  return student
-         return None
+         return self.students.get(student_id)
 
     # --- Data Manipulation Methods ---
     def add_student(self, student_id, name, dob):
         """Adds a student. Returns True on success, False if ID exists."""
+        self.wait_until_loaded()
         # Use validation logic (can be enhanced)
-        is_valid_id, _ = data_input.validate_student_id(student_id, {s.id for s in self.students})
+        is_valid_id, _ = data_input.validate_student_id(student_id, self.students.ids())
         if not is_valid_id: return False
         if not name: return False # Basic validation
         if not dob: return False # Basic validation
 
-        self.students.append(Student(student_id, name, dob))
-        self._invalidate_gpas()
+        self.students.add(Student(student_id, name, dob))
+        self.gpa_tracker.mark_dirty(student_id) # Only the new student needs computing
+        self.journal.append('student', student_id, name, dob)
+        self.autosave.touch()
         return True
 
     def add_course(self, course_id, name, credits_str):
         """Adds a course. Returns True on success, False if ID exists or credits invalid."""
-        is_valid_id, _ = data_input.validate_course_id(course_id, {c.id for c in self.courses})
+        self.wait_until_loaded()
+        is_valid_id, _ = data_input.validate_course_id(course_id, self.courses.ids())
         credits = data_input.validate_credits(credits_str) # Use validator
         if not is_valid_id: return False
         if not name: return False
         if credits is None: return False # Invalid credits
 
-        self.courses.append(Course(course_id, name, credits)) # Pass validated credits
-        self._invalidate_gpas()
+        self.courses.add(Course(course_id, name, credits)) # Pass validated credits
+        # Marks already entered for this course start counting now
+        for student_id in self.marks.marks_for_course(course_id): self.gpa_tracker.mark_dirty(student_id)
+        self.journal.append('course', course_id, name, credits)
+        self.autosave.touch()
         return True
 
     def add_mark(self, course_id, student_id, mark_str):
         """Adds or updates a mark. Returns True on success, False if mark invalid."""
-        mark, err_msg = data_input.validate_mark(mark_str) # Use validator (rounds down)
+        self.wait_until_loaded()
+        tenths, err_msg = data_input.parse_mark_tenths(mark_str) # Use validator (rounds down, integer tenths)
         if err_msg:
             return False # Mark validation failed
 
-        if course_id not in self.marks:
-            self.marks[course_id] = {}
-        self.marks[course_id][student_id] = mark
-        self._invalidate_gpas()
+        old_tenths = self.marks.set_tenths(course_id, student_id, tenths) # Updates both views
+        self.journal.append('mark', course_id, student_id, tenths) # Saving later only has to sync these bytes
+        self.autosave.touch()
+        self._update_student_gpa(course_id, student_id, old_tenths, tenths) # O(1) instead of invalidating everyone
         return True
 
+    # --- Bulk imports (one validation pass, one GPA invalidation per call) ---
+    # Rows are iterables of tuples; column arrays can be passed as zip(ids, names, dobs).
+    # Each method returns (number_added, errors) with errors as [(row_index, message), ...].
+    def add_students_bulk(self, rows):
+        self.wait_until_loaded()
+        valid, errors = data_input.validate_student_rows(rows, self.students.ids())
+        for student_id, name, dob in valid:
+            self.students.add(Student(student_id, name, dob))
+        self.journal.append_many(('student',) + row for row in valid) # One write for the whole batch
+        if valid: self.autosave.touch()
+        self._invalidate_students(student_id for student_id, _, _ in valid)
+        return len(valid), errors
+
+    def add_courses_bulk(self, rows):
+        self.wait_until_loaded()
+        valid, errors = data_input.validate_course_rows(rows, self.courses.ids())
+        affected = set()
+        for course_id, name, credits in valid:
+            self.courses.add(Course(course_id, name, credits))
+            affected.update(self.marks.marks_for_course(course_id)) # Marks already entered start counting now
+        self.journal.append_many(('course',) + row for row in valid) # One write for the whole batch
+        if valid: self.autosave.touch()
+        self._invalidate_students(affected)
+        return len(valid), errors
+
+    def add_marks_bulk(self, rows):
+        self.wait_until_loaded()
+        valid, errors = data_input.validate_mark_rows(rows)
+        for course_id, student_id, tenths in valid:
+            self.marks.set_tenths(course_id, student_id, tenths)
+        self.journal.append_many(('mark',) + row for row in valid) # One write for the whole batch
+        if valid: self.autosave.touch()
+        self._invalidate_students(student_id for _, student_id, _ in valid)
+        return len(valid), errors
+
+    def _invalidate_students(self, student_ids):
+        """Flags a batch of students for recomputation by the next calculate_all_gpas()."""
+        student_ids = set(student_ids)
+        if not student_ids: return
+        self.gpa_tracker.invalidate_students(student_ids, len(self.students))
+        if self.gpa_tracker.all_dirty:
+            for student in self.students: student.gpa = None
+            return
+        for student_id in student_ids:
+            student = self.get_student_by_id(student_id)
+            if student: student.gpa = None
+
     # --- GPA and Sorting ---
+    def _update_student_gpa(self, course_id, student_id, old_tenths, new_tenths):
+        """Patches one student's running GPA totals after a mark change."""
+        course = self.get_course_by_id(course_id)
+        if not course: return # Mark only counts once its course exists
+        gpa = self.gpa_tracker.update_mark(student_id, course.credits, old_tenths, new_tenths)
+        student = self.get_student_by_id(student_id)
+        if student: student.gpa = gpa
+
     def _invalidate_gpas(self):
          for student in self.students: student.gpa = None
+         self.gpa_tracker.invalidate_all()
 
     def calculate_all_gpas(self):
+        self.wait_until_loaded()
         if not self.students: return
-        for student in self.students: self.calculate_student_gpa(student.id)
+        # Only dirty students are recomputed; a full matrix reduction happens after (re)loading
+        self.gpa_tracker.refresh(self.students, self.courses, self.marks)
 
     def calculate_student_gpa(self, student_id):
+        self.wait_until_loaded()
         # ... (Keep existing calculation logic from pw6) ...
         student = self.get_student_by_id(student_id)
         if not student: return 0.0
         student_marks_values = []; corresponding_credits = []
-        for course_id, marks_dict in self.marks.items():
-            if student_id in marks_dict:
-                course = self.get_course_by_id(course_id)
-                if course: student_marks_values.append(marks_dict[student_id]); corresponding_credits.append(course.credits)
+        for course, tenths in self.marks.transcript_tenths(student_id, self.courses): # Only this student's marks, as integer tenths
+            student_marks_values.append(tenths); corresponding_credits.append(course.credits)
         if not student_marks_values: student.gpa = 0.0; return 0.0
-        marks_arr = np.array(student_marks_values); credits_arr = np.array(corresponding_credits)
+        marks_arr = np.array(student_marks_values, dtype=np.int64); credits_arr = np.array(corresponding_credits)
         total_credits = np.sum(credits_arr)
         if total_credits == 0: student.gpa = 0.0; return 0.0
-        gpa = np.sum(marks_arr * credits_arr) / total_credits; student.gpa = gpa; return gpa
+        gpa = np.sum(marks_arr * credits_arr) / (total_credits * 10); student.gpa = gpa; return gpa # Exact integer sum, one division
 
     def get_students_sorted_by_gpa(self):
-        """Calculates all GPAs and returns a *new* sorted list of students."""
+        """Brings GPAs up to date and returns a *new* list of students, best GPA first."""
+        self.calculate_all_gpas()
+        # Ranking index is kept in order as GPAs change, no full re-sort here
+        return self.gpa_tracker.ranking.ordered()
+
+    def get_top_students(self, k):
+        """Returns the k students with the highest GPA."""
+        if self.database is not None: # SQL aggregate over the committed and pending edits
+            self.wait_until_loaded()
+            return self._students_with_gpas(self.database.top_students(k))
         self.calculate_all_gpas()
-        # Sort by GPA descending, handle None as lowest
-        return sorted(self.students, key=lambda s: s.gpa if s.gpa is not None else -1, reverse=True)
\ No newline at end of file
+        return self.gpa_tracker.ranking.top_k(k)
+
+    def get_bottom_students(self, k):
+        """Returns the k students with the lowest GPA, worst first."""
+        if self.database is not None:
+            self.wait_until_loaded()
+            return self._students_with_gpas(self.database.bottom_students(k))
+        self.calculate_all_gpas()
+        return self.gpa_tracker.ranking.bottom_k(k)
+
+    def get_student_rank(self, student_id):
+        """Returns the 1-based GPA rank of a student (None if unknown)."""
+        if self.database is not None:
+            self.wait_until_loaded()
+            return self.database.student_rank(student_id)
+        self.calculate_all_gpas()
+        return self.gpa_tracker.ranking.rank_of(student_id)
+
+    def _students_with_gpas(self, rows):
+        """Maps SqliteStore [(student_id, gpa), ...] rows to the loaded students, GPAs filled in."""
+        students = []
+        for student_id, gpa in rows:
+            student = self.students.get(student_id)
+            if student is None: continue # Not loaded (yet)
+            student.gpa = gpa; students.append(student)
+        return students
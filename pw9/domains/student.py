@@ -1,12 +1,32 @@
 # pw4/domains/student.py
 class Student:
     """Represents a student with ID, name, and date of birth."""
+    # Slots instead of a per-instance __dict__: far smaller objects when 100k+ are resident
+    __slots__ = ('id', 'name', 'dob', '_gpa')
+
     def __init__(self, student_id, name, dob):
         self.id = student_id
         self.name = name
         self.dob = dob
         self.gpa = None # Calculated later
 
+    @property
+    def gpa(self):
+        return self._gpa
+
+    @gpa.setter
+    def gpa(self, value):
+        # Store a plain float, never a boxed numpy.float64
+        self._gpa = float(value) if value is not None else None
+
+    def __setstate__(self, state):
+        """Restores pickled students, including files saved before __slots__ (plain __dict__ state)."""
+        if isinstance(state, tuple): # (__dict__ state, slots state)
+            state = {**(state[0] or {}), **(state[1] or {})}
+        self.gpa = None
+        for key, value in state.items():
+            if key in ('id', 'name', 'dob', 'gpa', '_gpa'): setattr(self, key, value)
+
     # String representation used for simple display or debugging
     def __str__(self):
         gpa_str = f", GPA: {self.gpa:.2f}" if self.gpa is not None else ""
@@ -15,4 +35,4 @@ class Student:
     # Method specifically for table formatting in curses might be useful
     def get_display_info(self, show_gpa=False):
         gpa_str = f"{self.gpa:.2f}" if show_gpa and self.gpa is not None else "N/A"
-        return f"{self.id:<10} {self.name:<25} {self.dob:<15}" + (f" {gpa_str:<5}" if show_gpa else "")
\ No newline at end of file
+        return f"{self.id:<10} {self.name:<25} {self.dob:<15}" + (f" {gpa_str:<5}" if show_gpa else "")
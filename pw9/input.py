@@ -1,5 +1,8 @@
 # pw4/input.py
 import math
+from decimal import Decimal, DecimalException
+
+import numpy as np
 
 def validate_positive_integer(input_str):
     """Tries to convert input to a positive integer."""
@@ -39,16 +42,254 @@ def validate_credits(credits_str):
     except ValueError:
         return None
 
+# Marks are kept as integer tenths (7.5 -> 75) so sums are exact integers.
+# int32 range is plenty for any mark scale and matches the MarkStore typed arrays.
+MIN_MARK_TENTHS = -2**31
+MAX_MARK_TENTHS = 2**31 - 1
+_MIN_MARK = Decimal(MIN_MARK_TENTHS) / 10       # Smallest mark whose floor is in range
+_MARK_LIMIT = Decimal(MAX_MARK_TENTHS + 1) / 10 # Marks must stay below this
+
+def parse_mark_tenths(mark_str):
+    """Parses a mark and rounds it down to 1 decimal place, returned as integer tenths.
+
+    Uses Decimal so the floor is exact: "2.3" gives 23 (the float formula
+    math.floor(2.3 * 10) gave 22 because 2.3 * 10 == 22.999999999999996).
+    """
+    try:
+        mark_dec = Decimal(str(mark_str).strip())
+        if not mark_dec.is_finite():
+            return None, "Invalid input. Please enter a numerical mark."
+        # Range first: "1e9999999" must not be turned into a (huge) integer
+        if not _MIN_MARK <= mark_dec < _MARK_LIMIT:
+            return None, "Mark is out of range."
+        sign, digits, exponent = mark_dec.as_tuple()
+        tenths = math.floor(Decimal((sign, digits, exponent + 1))) # mark * 10, exact (no context rounding)
+    except (DecimalException, ValueError):
+        return None, "Invalid input. Please enter a numerical mark."
+    return tenths, ""
+
 def validate_mark(mark_str):
     """Validates and rounds down mark input to 1 decimal place."""
-    try:
-        mark_float = float(mark_str)
-        # Add range validation if needed, e.g., 0-10 or 0-20
-        # if not (0 <= mark_float <= 10):
-        #     return None, "Mark must be between 0 and 10."
-
-        # Round down using math.floor
-        rounded_mark = math.floor(mark_float * 10) / 10
-        return rounded_mark, "" # Return validated and rounded mark
-    except ValueError:
-        return None, "Invalid input. Please enter a numerical mark."
\ No newline at end of file
+    tenths, err_msg = parse_mark_tenths(mark_str)
+    if err_msg:
+        return None, err_msg
+    return tenths / 10, "" # Float only for display / callers that expect a mark value
+
+# --- Vectorized validators ---
+# Array versions of the scalar validators above for large imports. Plain ASCII
+# inputs (the overwhelming majority) are parsed with NumPy string operations;
+# anything else (exponents, underscores, non-ASCII digits, garbage) is handed
+# to the scalar function, so results are always exactly the same as calling
+# it element by element, without paying an exception per row.
+# Each returns (values, valid_mask, error_codes).
+
+VALID = 0
+ERR_EMPTY = 1        # Empty ID
+ERR_DUPLICATE = 2    # ID already exists
+ERR_NOT_A_NUMBER = 3 # Could not be parsed
+ERR_NOT_POSITIVE = 4 # Parsed, but not > 0
+ERR_OUT_OF_RANGE = 5 # Mark outside the int32 tenths range
+
+MARK_ERROR_MESSAGES = {
+    ERR_NOT_A_NUMBER: "Invalid input. Please enter a numerical mark.",
+    ERR_OUT_OF_RANGE: "Mark is out of range.",
+}
+
+_MAX_FAST_DIGITS = 15 # Integer parts up to this length cannot overflow int64 (even * 10)
+
+def _as_str_array(values, convert):
+    """Returns (array of str, mask of elements the fast path may handle, original values).
+
+    With convert=True every element goes through str() first, like parse_mark_tenths does;
+    otherwise non-str elements are left to the scalar fallback.
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'U':
+        values = values.ravel()
+        return values, np.ones(len(values), dtype=bool), values
+    values = list(values)
+    strs = [str(v) if convert or isinstance(v, str) else '' for v in values]
+    arr = np.array(strs, dtype=str) if strs else np.zeros(0, dtype='<U1')
+    lengths = np.fromiter(map(len, strs), dtype=np.int64, count=len(strs))
+    ok = np.char.str_len(arr) == lengths # NumPy drops trailing NULs; leave those to the fallback
+    if not convert:
+        ok &= np.fromiter((isinstance(v, str) for v in values), dtype=bool, count=len(values))
+    return arr, ok, values
+
+def _codepoints(arr):
+    """Fixed-width (n, width) uint32 view of a unicode array (0 marks padding)."""
+    width = max(arr.dtype.itemsize // 4, 1)
+    arr = np.ascontiguousarray(arr, dtype=f'<U{width}')
+    return arr.view(np.uint32).reshape(len(arr), width)
+
+def _split_sign(arr):
+    """Strips whitespace and one leading sign.
+
+    Returns (unsigned strings, negative mask, mask of strings that had at most one sign).
+    """
+    arr = np.char.strip(arr)
+    negative = np.char.startswith(arr, '-')
+    signed = negative | np.char.startswith(arr, '+')
+    unsigned = np.where(signed, np.char.lstrip(arr, '+-'), arr)
+    one_sign = np.char.str_len(arr) - np.char.str_len(unsigned) == signed.astype(np.int64) # "+-5" is not a number
+    return unsigned, negative, one_sign
+
+def _ascii_digits(arr, max_len):
+    """Mask of strings made of 1..max_len ASCII digits."""
+    points = _codepoints(arr)
+    lengths = np.char.str_len(arr)
+    is_digit = (points >= 48) & (points <= 57)
+    return (lengths > 0) & (lengths <= max_len) & (is_digit.sum(axis=1) == lengths)
+
+def _digits_value(arr):
+    """Integer value of strings of ASCII digits (empty -> 0), straight from the code points."""
+    points = _codepoints(arr).astype(np.int64)
+    lengths = np.char.str_len(arr)
+    exponents = lengths[:, None] - 1 - np.arange(points.shape[1])
+    digits = np.where(exponents >= 0, points - 48, 0)
+    return (digits * 10 ** np.maximum(exponents, 0)).sum(axis=1)
+
+def _parse_ints_fast(values):
+    """Fast path shared by the integer validators: (ints, fast mask, original values)."""
+    arr, ok, values = _as_str_array(values, convert=False)
+    unsigned, negative, one_sign = _split_sign(arr)
+    fast = ok & one_sign & _ascii_digits(unsigned, _MAX_FAST_DIGITS)
+    ints = np.zeros(len(arr), dtype=np.int64)
+    if fast.any():
+        ints[fast] = _digits_value(unsigned[fast])
+    ints[negative] *= -1
+    return ints, fast, values
+
+def validate_positive_integer_batch(values):
+    """Array version of validate_positive_integer.
+
+    Returns (ints, valid_mask, error_codes); invalid entries hold 0. Values the
+    scalar function would return beyond int64 turn the result into an object array.
+    """
+    ints, fast, values = _parse_ints_fast(values)
+    codes = np.where(ints > 0, VALID, ERR_NOT_POSITIVE).astype(np.int8)
+    slow_values = {}
+    for index in np.flatnonzero(~fast).tolist():
+        try:
+            num = int(values[index]) # Same conversion as the scalar validator
+        except ValueError:
+            ints[index] = 0; codes[index] = ERR_NOT_A_NUMBER; continue
+        if num <= 0:
+            ints[index] = 0; codes[index] = ERR_NOT_POSITIVE; continue
+        codes[index] = VALID
+        if num > np.iinfo(np.int64).max: slow_values[index] = num
+        else: ints[index] = num
+    ints[codes != VALID] = 0
+    if slow_values:
+        ints = ints.astype(object)
+        for index, num in slow_values.items(): ints[index] = num
+    return ints, codes == VALID, codes
+
+def validate_credits_batch(credits_values):
+    """Array version of validate_credits (same rules as validate_positive_integer)."""
+    return validate_positive_integer_batch(credits_values)
+
+def parse_mark_tenths_batch(mark_values):
+    """Array version of parse_mark_tenths: floors every mark to integer tenths.
+
+    Returns (tenths as int64, valid_mask, error_codes); invalid entries hold 0.
+    The floor is done on the digits themselves, so it is exact like the Decimal path.
+    """
+    arr, fast, values = _as_str_array(mark_values, convert=True)
+    tenths = np.zeros(len(arr), dtype=np.int64)
+    codes = np.full(len(arr), VALID, dtype=np.int8)
+    if len(arr):
+        unsigned, negative, one_sign = _split_sign(arr)
+        parts = np.char.partition(unsigned, '.')
+        int_part, frac_part = parts[:, 0], parts[:, 2]
+        has_int = np.char.str_len(int_part) > 0
+        has_frac = np.char.str_len(frac_part) > 0
+        int_ok = ~has_int | _ascii_digits(int_part, _MAX_FAST_DIGITS)
+        frac_ok = ~has_frac | _ascii_digits(frac_part, np.iinfo(np.int64).max)
+        fast &= one_sign & (has_int | has_frac) & int_ok & frac_ok
+        if fast.any():
+            frac_points = _codepoints(frac_part)
+            first_digit = np.where(has_frac, frac_points[:, 0].astype(np.int64) - 48, 0)
+            # Any non-zero digit after the first decimal makes a negative mark floor one tenth lower
+            remainder = (frac_points[:, 1:] > 48).any(axis=1) if frac_points.shape[1] > 1 else np.zeros(len(arr), dtype=bool)
+            whole = np.zeros(len(arr), dtype=np.int64)
+            whole[fast] = _digits_value(int_part[fast])
+            magnitude = whole * 10 + first_digit
+            tenths = np.where(negative, -(magnitude + remainder), magnitude)
+            tenths[~fast] = 0
+            out_of_range = fast & ((tenths < MIN_MARK_TENTHS) | (tenths > MAX_MARK_TENTHS))
+            codes[out_of_range] = ERR_OUT_OF_RANGE
+    for index in np.flatnonzero(~fast).tolist():
+        parsed, err_msg = parse_mark_tenths(values[index])
+        if err_msg:
+            codes[index] = ERR_OUT_OF_RANGE if err_msg == MARK_ERROR_MESSAGES[ERR_OUT_OF_RANGE] else ERR_NOT_A_NUMBER
+        else:
+            tenths[index] = parsed
+    tenths[codes != VALID] = 0
+    return tenths, codes == VALID, codes
+
+def validate_mark_batch(mark_values):
+    """Array version of validate_mark. Returns (marks as float64, valid_mask, error_codes); invalid marks are NaN."""
+    tenths, valid, codes = parse_mark_tenths_batch(mark_values)
+    marks = np.where(valid, tenths / 10, np.nan)
+    return marks, valid, codes
+
+def _validate_ids_batch(ids, existing_ids):
+    ids = list(ids)
+    empty = np.fromiter((not entity_id for entity_id in ids), dtype=bool, count=len(ids))
+    taken = np.fromiter((bool(entity_id) and entity_id in existing_ids for entity_id in ids), dtype=bool, count=len(ids))
+    codes = np.where(empty, ERR_EMPTY, np.where(taken, ERR_DUPLICATE, VALID)).astype(np.int8)
+    return codes == VALID, codes
+
+def validate_student_id_batch(student_ids, existing_ids):
+    """Array version of validate_student_id. Returns (valid_mask, error_codes)."""
+    return _validate_ids_batch(student_ids, existing_ids)
+
+def validate_course_id_batch(course_ids, existing_ids):
+    """Array version of validate_course_id. Returns (valid_mask, error_codes)."""
+    return _validate_ids_batch(course_ids, existing_ids)
+
+# --- Batch validation (one pass over many rows, used by the add_*_bulk methods) ---
+# Each returns (valid_rows, errors) where errors is a list of (row_index, message).
+
+def validate_student_rows(rows, existing_ids):
+    """Validates (student_id, name, dob) rows; IDs must be new and unique within the batch."""
+    valid, errors, batch_ids = [], [], set()
+    for index, (student_id, name, dob) in enumerate(rows):
+        is_valid_id, id_err = validate_student_id(student_id, existing_ids)
+        if is_valid_id and student_id in batch_ids:
+            is_valid_id, id_err = False, f"Student ID '{student_id}' is repeated in this batch."
+        if not is_valid_id: errors.append((index, id_err)); continue
+        if not name: errors.append((index, "Name cannot be empty.")); continue
+        if not dob: errors.append((index, "DoB cannot be empty.")); continue
+        batch_ids.add(student_id)
+        valid.append((student_id, name, dob))
+    return valid, errors
+
+def validate_course_rows(rows, existing_ids):
+    """Validates (course_id, name, credits) rows; credits come back as positive ints."""
+    rows = list(rows)
+    credits_values, credits_ok, _ = validate_credits_batch([credits_str for _, _, credits_str in rows])
+    valid, errors, batch_ids = [], [], set()
+    for index, (course_id, name, _) in enumerate(rows):
+        is_valid_id, id_err = validate_course_id(course_id, existing_ids)
+        if is_valid_id and course_id in batch_ids:
+            is_valid_id, id_err = False, f"Course ID '{course_id}' is repeated in this batch."
+        if not is_valid_id: errors.append((index, id_err)); continue
+        if not name: errors.append((index, "Name cannot be empty.")); continue
+        if not credits_ok[index]: errors.append((index, "Invalid credits (must be positive integer).")); continue
+        batch_ids.add(course_id)
+        valid.append((course_id, name, int(credits_values[index])))
+    return valid, errors
+
+def validate_mark_rows(rows):
+    """Validates (course_id, student_id, mark) rows; marks come back as integer tenths."""
+    rows = list(rows)
+    tenths, marks_ok, codes = parse_mark_tenths_batch([mark for _, _, mark in rows])
+    tenths, codes = tenths.tolist(), codes.tolist()
+    valid, errors = [], []
+    for index, (course_id, student_id, _) in enumerate(rows):
+        if not course_id or not student_id:
+            errors.append((index, "Course ID and student ID are required.")); continue
+        if not marks_ok[index]: errors.append((index, MARK_ERROR_MESSAGES[codes[index]])); continue
+        valid.append((course_id, student_id, tenths[index]))
+    return valid, errors
@@ -0,0 +1,302 @@
+# pw9/journal.py
+import os
+import gzip
+import pickle
+import struct
+import zlib
+import threading
+from contextlib import contextmanager
+try:
+    import fcntl # POSIX only; elsewhere instances sharing a save file are not locked against each other
+except ImportError:
+    fcntl = None
+
+from .domains import Student, Course
+
+# Append-only mutation journal.
+# Instead of re-pickling the whole state on every save, each add_student /
+# add_course / add_mark is appended to SAVE_FILE + ".journal" as a small
+# length-prefixed, CRC-checked pickle record. The full pickle (the checkpoint)
+# is only rewritten once the journal grows past a fraction of it; startup
+# loads the checkpoint and replays the journal on top.
+#
+# Replaying is idempotent (existing IDs are skipped, marks are overwritten), so
+# a crash at any point of a checkpoint never loses or corrupts data:
+#   1. rotate(): the live journal becomes ".journal.old", new edits go to a fresh file
+#   2. the checkpoint is written to a temp file, fsynced, and renamed over
+#      SAVE_FILE; the directory is fsynced so the rename survives a power loss
+#   3. checkpoint_done(): ".journal.old" is deleted, only after step 2 is durable
+#
+# Instances sharing a save file share its journal too, which makes it a change
+# feed: follow() returns the records appended since replay() (or the previous
+# follow()), the rest of a journal another instance rotated away first. An
+# appender whose journal was rotated by another instance switches to the new
+# file before writing. Appends, rotations and truncations hold an flock() on
+# "<journal>.lock", so no record can be written to a journal after another
+# instance has rotated it away and read it to its end.
+
+JOURNAL_SUFFIX = ".journal"
+ROTATED_SUFFIX = ".old"
+LOCK_SUFFIX = ".lock"
+FOLLOW_POLL_MS = 1000             # How often the apps look for records appended by other instances
+MIN_CHECKPOINT_BYTES = 1024 * 1024 # Journals smaller than this never trigger a checkpoint
+CHECKPOINT_RATIO = 0.25            # ... otherwise checkpoint once the journal is 1/4 of the checkpoint
+
+_HEADER = struct.Struct('<II') # Payload length, CRC32 of the payload
+
+class MutationJournal:
+    """Append-only log of edits made since the last checkpoint of `checkpoint_path`."""
+    def __init__(self, checkpoint_path):
+        self.checkpoint_path = checkpoint_path
+        self.path = checkpoint_path + JOURNAL_SUFFIX
+        self.rotated_path = self.path + ROTATED_SUFFIX
+        self.lock_path = self.path + LOCK_SUFFIX
+        self._file = None
+        self._lock_file = None
+        self._lock_depth = 0                # locked() is re-entrant: only the outermost level takes the flock
+        self._thread_lock = threading.RLock() # ... and threads of this instance take turns
+        self._followed = None     # Journal file follow() reads (kept open: it survives a rotation)
+        self._followed_offset = 0 # End of the last complete record read from it
+
+    # --- Locking ---
+    @contextmanager
+    def locked(self):
+        """Holds the lock shared by every instance appending to this journal (re-entrant)."""
+        with self._thread_lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                if self._lock_file is None: self._lock_file = open(self.lock_path, 'ab')
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    # --- Writing ---
+    def _open(self):
+        if self._file is not None and not _is_same_file(self._file, self.path):
+            self.close() # Another instance rotated the journal for a checkpoint: append to the new one
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+        return self._file
+
+    def append(self, *record):
+        """Appends one record, e.g. append('mark', course_id, student_id, tenths)."""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """Appends several records with a single write (bulk imports)."""
+        chunks = []
+        for record in records:
+            payload = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+            chunks.append(_HEADER.pack(len(payload), zlib.crc32(payload)))
+            chunks.append(payload)
+        if not chunks: return
+        with self.locked(): # The journal cannot be rotated between the check in _open() and the write
+            journal_file = self._open()
+            journal_file.write(b''.join(chunks))
+            journal_file.flush() # Hand the bytes to the OS right away; sync() makes them durable
+
+    def sync(self):
+        """Forces appended records to disk. This is all a save costs until a checkpoint is due."""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._lock_file is not None and self._lock_depth == 0:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # --- Reading ---
+    def replay(self):
+        """Returns every record (rotated journal first) in the order it was appended.
+
+        A torn record at the end of a file (crash during append) ends that file;
+        the live journal is truncated there so new records follow valid ones.
+        """
+        self.close()
+        self._stop_following()
+        records = []
+        for path in (self.rotated_path, self.path):
+            if not os.path.exists(path): continue
+            journal_file = open(path, 'rb')
+            file_records, valid_size = _parse_records(journal_file.read())
+            if path == self.path and valid_size < os.fstat(journal_file.fileno()).st_size:
+                with self.locked(): # A record another instance is still appending is not torn: read again once it is done
+                    journal_file.seek(0)
+                    file_records, valid_size = _parse_records(journal_file.read())
+                    if valid_size < os.fstat(journal_file.fileno()).st_size and _is_same_file(journal_file, path):
+                        os.truncate(path, valid_size)
+            records.extend(file_records)
+            if path == self.path:
+                self._followed, self._followed_offset = journal_file, valid_size # follow() picks up from here
+            else:
+                journal_file.close()
+        return records
+
+    def follow(self):
+        """Returns the records appended since replay() or the last follow(), in journal order.
+
+        Records appended by this instance come back too; re-applying them is
+        idempotent and keeps every instance in the journal's order.
+        """
+        records = []
+        if self._followed is not None:
+            records.extend(self._read_followed())
+            if _is_same_file(self._followed, self.path): return records
+            self._stop_following() # Rotated: its records are all read, the new journal starts empty
+        try:
+            self._followed, self._followed_offset = open(self.path, 'rb'), 0
+        except FileNotFoundError:
+            return records
+        records.extend(self._read_followed())
+        return records
+
+    def _read_followed(self):
+        self._followed.seek(self._followed_offset)
+        records, valid_size = _parse_records(self._followed.read())
+        self._followed_offset += valid_size # A record still being written is read next time
+        return records
+
+    def _stop_following(self):
+        if self._followed is not None:
+            self._followed.close()
+            self._followed = None
+
+    # --- Checkpointing ---
+    def size(self):
+        """Bytes of journal not yet folded into a completed checkpoint."""
+        return sum(os.path.getsize(path) for path in (self.path, self.rotated_path) if os.path.exists(path))
+
+    def needs_checkpoint(self):
+        """True once replaying the journal would cost noticeably more than rewriting the checkpoint."""
+        checkpoint_size = _path_size(self.checkpoint_path)
+        return self.size() > max(MIN_CHECKPOINT_BYTES, checkpoint_size * CHECKPOINT_RATIO)
+
+    def rotate(self):
+        """Starts a fresh journal; call it when taking the snapshot a checkpoint will contain.
+
+        Hold locked() from here until the records other instances appended are
+        carried over (follow() + append_many()), so none can land in between.
+        """
+        with self.locked():
+            self.close() # Keeps the lock file while the lock is held
+            if not os.path.exists(self.path): return
+            if self._followed is None: # Created since the last follow(): the carry-over must read it from the start
+                self._followed, self._followed_offset = open(self.path, 'rb'), 0
+            if os.path.exists(self.rotated_path): # Previous checkpoint never finished: keep both
+                with open(self.rotated_path, 'ab') as rotated, open(self.path, 'rb') as live:
+                    rotated.write(live.read())
+                    rotated.flush()
+                    os.fsync(rotated.fileno()) # Durable before the records' only other copy is removed
+                os.remove(self.path)
+            else:
+                os.replace(self.path, self.rotated_path)
+
+    def checkpoint_done(self):
+        """Drops the rotated journal once the checkpoint holding its records is on disk."""
+        if os.path.exists(self.rotated_path): os.remove(self.rotated_path)
+
+
+def _path_size(path):
+    """Size of a checkpoint file, or of all files of a checkpoint directory (columnar saves)."""
+    if os.path.isdir(path):
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+def _is_same_file(f, path):
+    """True if the open file `f` is still the file at `path`."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    opened = os.fstat(f.fileno())
+    return (stat.st_dev, stat.st_ino) == (opened.st_dev, opened.st_ino)
+
+def _parse_records(data):
+    """Returns (records, size of the valid prefix of `data`)."""
+    records = []
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        length, crc = _HEADER.unpack_from(data, offset)
+        payload = data[offset + _HEADER.size:offset + _HEADER.size + length]
+        if len(payload) < length or zlib.crc32(payload) != crc: break
+        try:
+            records.append(pickle.loads(payload))
+        except Exception:
+            break
+        offset += _HEADER.size + length
+    return records, offset
+
+def apply_record(record, students, courses, marks):
+    """Re-applies one journal record to the stores (EntityStores and a mark store).
+
+    Returns True if the stores changed, False if they already reflected the record.
+    """
+    op = record[0]
+    if op == 'student':
+        return students.add(Student(*record[1:])) # Already present (e.g. in the checkpoint): skipped
+    if op == 'course':
+        return courses.add(Course(*record[1:]))
+    if op == 'mark':
+        return marks.set_tenths(*record[1:]) != record[3] # Returns the old mark
+    return False
+
+def sync_file(path):
+    """Forces a closed file's contents to disk."""
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+
+def sync_directory(path):
+    """Forces a directory's entries (renames, new and removed files) to disk."""
+    fd = os.open(path or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def write_checkpoint(path, data, open_file=gzip.open, sync_dir=True):
+    """Writes the full state as a compressed pickle, atomically (temp file + rename).
+
+    open_file(path, 'wb') opens the compressed stream, e.g. parallel_gzip.ParallelGzipFile
+    or compression.open_save() with a codec. A state dict is pickled in two
+    stages, students and courses before the marks, so a loader can use them
+    before the marks are read (see read_checkpoint_stages()).
+    The temp file is fsynced before the rename, and the directory after it
+    (unless sync_dir is False: the caller syncs it after several writes).
+    """
+    temp_path = path + ".tmp"
+    with open_file(temp_path, 'wb') as f:
+        for stage in _checkpoint_stages(data):
+            pickle.dump(stage, f, pickle.HIGHEST_PROTOCOL)
+    sync_file(temp_path) # open_file may be any compressed stream: sync by path once it is closed
+    os.replace(temp_path, path)
+    if sync_dir: sync_directory(os.path.dirname(path))
+
+def _checkpoint_stages(data):
+    if isinstance(data, dict) and 'marks' in data:
+        return [{key: value for key, value in data.items() if key != 'marks'}, {'marks': data['marks']}]
+    return [data]
+
+def read_checkpoint_stages(f):
+    """Yields the stages of a checkpoint stream: the index dict, then the marks dict.
+
+    Checkpoints written before staging are a single dict holding everything.
+    """
+    stage = pickle.load(f)
+    yield stage
+    if isinstance(stage, dict) and 'marks' not in stage:
+        yield pickle.load(f)
+
+def read_checkpoint(f):
+    """Reads a whole checkpoint stream into one state dict."""
+    data = {}
+    for stage in read_checkpoint_stages(f):
+        data.update(stage)
+    return data
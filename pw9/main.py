@@ -5,9 +5,13 @@ from tkinter import messagebox, simpledialog, Frame, Label, Button, Listbox, Scr
 
 # Import the separated application logic
 from .app_logic import AppLogic
+from .autosave import AUTOSAVE_POLL_MS
+from .journal import FOLLOW_POLL_MS
 # Import data classes (needed for type hints or checks if desired)
 # from .domains import Student, Course
 
+LOAD_POLL_MS = 100 # How often the progress bar follows the background load
+
 # --- Input Dialogs (Example using Toplevel) ---
 
 class AddStudentDialog(Toplevel):
@@ -55,6 +59,32 @@ class AddStudentDialog(Toplevel):
         self.result = (s_id, s_name, s_dob)
         self.destroy() # Close the dialog
 
+class TranscriptWindow(Toplevel):
+    """Read-only window listing one student's courses, credits and marks."""
+    def __init__(self, parent, student, transcript):
+        super().__init__(parent)
+        self.title(f"Transcript - {student.name} ({student.id})")
+        self.geometry("420x300")
+        self.transient(parent)
+
+        cols = ('course', 'name', 'credits', 'mark')
+        tree = ttk.Treeview(self, columns=cols, show='headings')
+        tree.heading('course', text='Course ID')
+        tree.heading('name', text='Course Name')
+        tree.heading('credits', text='Credits')
+        tree.heading('mark', text='Mark')
+        tree.column('course', width=80, anchor='w')
+        tree.column('name', width=180, anchor='w')
+        tree.column('credits', width=60, anchor='e')
+        tree.column('mark', width=60, anchor='e')
+        for course, mark in transcript:
+            tree.insert('', 'end', values=(course.id, course.name, course.credits, mark))
+        tree.pack(fill="both", expand=True, padx=5, pady=5)
+
+        gpa_str = f"{student.gpa:.2f}" if student.gpa is not None else "N/A"
+        Label(self, text=f"GPA: {gpa_str}").pack(pady=2)
+        Button(self, text="Close", command=self.destroy).pack(pady=5)
+
 # --- Main GUI Application ---
 
 class StudentAppGUI(tk.Tk):
@@ -63,8 +93,8 @@ class StudentAppGUI(tk.Tk):
         self.title("Student Management System")
         self.geometry("800x600") # Adjust size as needed
 
-        # Initialize the application logic handler
-        self.logic = AppLogic()
+        # Initialize the application logic handler; data loads on a background thread
+        self.logic = AppLogic(load_in_background=True)
 
         # Set up protocol for closing the window
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -72,9 +102,11 @@ class StudentAppGUI(tk.Tk):
         # Create main UI components
         self.create_widgets()
 
-        # Load initial data and populate lists
-        self.refresh_student_list()
-        self.refresh_course_list()
+        # Populate lists as the load stages complete (students and courses first)
+        self._index_shown = False
+        self.poll_loading()
+        self.after(AUTOSAVE_POLL_MS, self.poll_autosave)
+        self.after(FOLLOW_POLL_MS, self.poll_external_changes)
 
     def create_widgets(self):
         # Use themed widgets for a better look
@@ -93,6 +125,8 @@ class StudentAppGUI(tk.Tk):
         ttk.Button(control_frame, text="Add Course", command=self.open_add_course_dialog).pack(side="left", padx=5)
         ttk.Button(control_frame, text="Input Marks", command=self.open_input_marks_dialog).pack(side="left", padx=5)
         ttk.Button(control_frame, text="List Sorted by GPA", command=self.list_students_sorted).pack(side="left", padx=5)
+        ttk.Button(control_frame, text="Show Transcript", command=self.show_transcript).pack(side="left", padx=5)
+        ttk.Button(control_frame, text="Reload Data", command=self.reload_data).pack(side="left", padx=5)
 
         # --- Display Area (using PanedWindow for resizing) ---
         paned_window = tk.PanedWindow(main_frame, orient="horizontal", sashrelief="raised")
@@ -139,6 +173,54 @@ class StudentAppGUI(tk.Tk):
         # --- Marks Display (Could be another frame/treeview added when needed) ---
         # Placeholder or integrate with student/course selection
 
+        # --- Status Bar (load progress) ---
+        status_frame = ttk.Frame(main_frame)
+        status_frame.pack(fill="x", pady=(5, 0))
+        self.status_label = ttk.Label(status_frame, text="")
+        self.status_label.pack(side="left")
+        self.load_bar = ttk.Progressbar(status_frame, mode="determinate", maximum=100, length=200)
+        self.load_bar.pack(side="right")
+
+    # --- Background Load ---
+    def poll_loading(self):
+        """Follows the background load: updates the progress bar and fills the lists as stages finish."""
+        fraction, message = self.logic.load_progress
+        self.load_bar['value'] = fraction * 100
+        self.status_label.config(text=message)
+        if self.logic.loaded.is_set():
+            self.refresh_student_list()
+            self.refresh_course_list()
+            self.load_bar.pack_forget()
+            return
+        if self.logic.index_ready.is_set() and not self._index_shown:
+            self._index_shown = True # Students and courses can be browsed while the marks load
+            self.refresh_student_list()
+            self.refresh_course_list()
+        self.after(LOAD_POLL_MS, self.poll_loading)
+
+    def poll_autosave(self):
+        """Starts the debounced save when it is due; edits during a save get one follow-up save."""
+        self.logic.autosave_if_due()
+        self.after(AUTOSAVE_POLL_MS, self.poll_autosave)
+
+    def poll_external_changes(self):
+        """Merges edits made by other instances on the same save file and shows them."""
+        merged = self.logic.merge_external_changes()
+        if merged:
+            self.logic.calculate_all_gpas() # Only the students those edits touched are recomputed
+            self.refresh_student_list()
+            self.refresh_course_list()
+            self.status_label.config(text=f"Merged {merged} change(s) from another instance.")
+        self.after(FOLLOW_POLL_MS, self.poll_external_changes)
+
+    def wait_for_data(self):
+        """Waits for the background load before an action that needs the marks, keeping the window responsive."""
+        if self.logic.loaded.is_set(): return
+        self.config(cursor="watch")
+        while not self.logic.wait_until_loaded(LOAD_POLL_MS / 1000):
+            self.update() # Keeps repainting and running poll_loading
+        self.config(cursor="")
+
     # --- Refresh Methods ---
     def refresh_student_list(self, sorted_list=None):
         """Clears and repopulates the student Treeview."""
@@ -150,7 +232,8 @@ class StudentAppGUI(tk.Tk):
         # Populate with new data
         for student in students_to_display:
              gpa_str = f"{student.gpa:.2f}" if student.gpa is not None else "N/A"
-             self.student_tree.insert('', 'end', values=(student.id, student.name, student.dob, gpa_str))
+             # Student ID doubles as the row id so selections map back without Tk's number coercion
+             self.student_tree.insert('', 'end', iid=student.id, values=(student.id, student.name, student.dob, gpa_str))
 
     def refresh_course_list(self):
         """Clears and repopulates the course Treeview."""
@@ -162,6 +245,7 @@ class StudentAppGUI(tk.Tk):
 
     # --- Callback Methods ---
     def open_add_student_dialog(self):
+        self.wait_for_data()
         dialog = AddStudentDialog(self) # Use the custom dialog
         if dialog.result: # If user clicked Add and data is valid
              s_id, s_name, s_dob = dialog.result
@@ -173,6 +257,7 @@ class StudentAppGUI(tk.Tk):
                   messagebox.showerror("Error", f"Failed to add student {s_id}. ID might already exist or invalid input.", parent=self)
 
     def open_add_course_dialog(self):
+        self.wait_for_data()
         # Simple dialogs for now, could use custom Toplevel like AddStudentDialog
         c_id = simpledialog.askstring("Add Course", "Enter Course ID:", parent=self)
         if not c_id: return
@@ -188,6 +273,7 @@ class StudentAppGUI(tk.Tk):
              messagebox.showerror("Error", f"Failed to add course {c_id}. Check ID doesn't exist and credits are valid.", parent=self)
 
     def open_input_marks_dialog(self):
+         self.wait_for_data()
          # This needs a more complex dialog: select course, select student, enter mark
          # For simplicity, maybe start by selecting course from the Treeview first?
          # Or use a simpledialog loop - less user friendly
@@ -221,16 +307,48 @@ class StudentAppGUI(tk.Tk):
 
     def list_students_sorted(self):
         """Calculates GPAs and displays students sorted by GPA."""
+        self.wait_for_data()
         sorted_list = self.logic.get_students_sorted_by_gpa()
         self.refresh_student_list(sorted_list=sorted_list)
         messagebox.showinfo("Students Sorted", "Student list refreshed and sorted by GPA (descending).", parent=self)
 
 
+    def show_transcript(self):
+        """Shows the transcript of the student selected in the student list."""
+        self.wait_for_data()
+        selected_student_items = self.student_tree.selection()
+        if not selected_student_items:
+            messagebox.showwarning("Select Student", "Please select a student from the list first.", parent=self)
+            return
+        student_id = selected_student_items[0] # Row id is the student ID
+        student = self.logic.get_student_by_id(student_id)
+        if not student: return
+        self.logic.calculate_all_gpas() # Cheap: only dirty students are recomputed
+        TranscriptWindow(self, student, self.logic.get_transcript(student_id))
+
+    def reload_data(self):
+        """Re-reads the saved data unless it is unchanged, and refreshes both lists."""
+        self.wait_for_data()
+        self.config(cursor="watch")
+        self.update_idletasks()
+        try:
+            reloaded = self.logic.reload_data()
+        finally:
+            self.config(cursor="")
+        self.refresh_student_list()
+        self.refresh_course_list()
+        self.status_label.config(text="Data reloaded." if reloaded else "Saved data unchanged, nothing to reload.")
+
     def on_closing(self):
         # Ask for confirmation
         if messagebox.askokcancel("Quit", "Do you want to save data and quit?"):
+            self.wait_for_data() # Saving before the load finished would drop the unloaded data
+            self.logic.wait_for_save() # An autosave may still be running
             # Initiate background save
-            if self.logic.save_in_background():
+            started = self.logic.save_in_background()
+            if started is None:
+                 messagebox.showinfo("Saving", "Nothing to save.\nProgram will now exit.", parent=self)
+            elif started:
                  messagebox.showinfo("Saving", "Data save initiated in background.\nProgram will now exit.", parent=self)
             else:
                  messagebox.showwarning("Saving", "Could not start background save.\nCheck console for errors.\nExiting anyway.", parent=self)
@@ -0,0 +1,170 @@
+# pw9/partitions.py
+import os
+import gzip
+import pickle
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from .domains import Student, Course
+from .repository import EntityStore
+from .journal import MutationJournal, write_checkpoint, sync_directory
+from . import compression
+from . import fingerprint
+
+# Partitioned save format.
+# The state is split into segments in one directory: the students, the
+# courses, and the marks of each course in its own file under marks/. The
+# journal already says what changed: a 'student' record dirties the students
+# segment, a 'mark' record the segment of its course. A save rewrites only the
+# dirty segments, each one atomically (temp file + fsync + rename; the
+# directories are fsynced once all are renamed). Loading decodes
+# all segments in parallel on a thread pool (decompression releases the GIL)
+# and merges them.
+#
+# Crash safety is the journal's: records stay in the (rotated) journal until
+# every segment they dirtied is on disk, and replaying them is idempotent.
+#
+# A save also only fingerprints the segments it writes: the fingerprint sidecar
+# keeps one per segment, and the state's is combined from them.
+
+PARTITION_DIR = "student_data.parts"
+STUDENTS_SEGMENT = "students.seg"
+COURSES_SEGMENT = "courses.seg"
+MARKS_DIR = "marks"
+
+def partition_key(record):
+    """Segment touched by a journal record: 'students', 'courses' or ('marks', course_id)."""
+    op = record[0]
+    if op == 'student': return 'students'
+    if op == 'course': return 'courses'
+    return ('marks', record[1])
+
+def _marks_segment(course_id):
+    return course_id.encode('utf-8').hex() + ".seg" # Any course ID gives a safe file name
+
+class PartitionedJournal(MutationJournal):
+    """MutationJournal that also tracks the segments its records have dirtied."""
+    def __init__(self, checkpoint_path):
+        super().__init__(checkpoint_path)
+        self.dirty = set()   # Segments changed since the last snapshot
+        self._saving = set() # Segments of the snapshot being written (kept for a retry if it fails)
+
+    def append_many(self, records):
+        records = list(records)
+        self.dirty.update(partition_key(record) for record in records)
+        super().append_many(records)
+
+    def replay(self):
+        records = super().replay()
+        self.dirty.update(partition_key(record) for record in records) # Not in the segments yet
+        return records
+
+    def follow(self):
+        records = super().follow()
+        self.dirty.update(partition_key(record) for record in records) # Another instance may not save them
+        return records
+
+    def needs_checkpoint(self):
+        """Any dirty segment is worth writing: a save only costs the segments that changed."""
+        return bool(self.dirty or self._saving)
+
+    def take_dirty(self):
+        """Returns the segments a new snapshot must contain and starts tracking a fresh set."""
+        self._saving |= self.dirty
+        self.dirty = set()
+        return set(self._saving)
+
+    def checkpoint_done(self):
+        self._saving = set()
+        super().checkpoint_done()
+
+def partitions_exist(path):
+    return os.path.isdir(path)
+
+def snapshot(students, courses, marks, dirty):
+    """Copies the dirty segments (from PartitionedJournal.take_dirty()) for write_partitions()."""
+    data = {'marks': {}}
+    if 'students' in dirty: data['students'] = [(s.id, s.name, s.dob) for s in students]
+    if 'courses' in dirty: data['courses'] = [(c.id, c.name, c.credits) for c in courses]
+    for key in dirty:
+        if isinstance(key, tuple):
+            student_ids, tenths = marks.course_column(key[1])
+            data['marks'][key[1]] = (list(student_ids), array('i', tenths))
+    return data
+
+def all_segments(marks):
+    """Every segment of a state, for writing a complete partitioned save (e.g. a migration)."""
+    return {'students', 'courses'} | {('marks', course_id) for course_id in marks.course_ids()}
+
+def _segment_name(key):
+    return key if isinstance(key, str) else "marks:" + key[1]
+
+def segment_fingerprints(data):
+    """{segment name: fingerprint} of the segments in a snapshot(); marks are ordered by student ID."""
+    fingerprints = {}
+    if 'students' in data: fingerprints['students'] = fingerprint.value_fingerprint(data['students'])
+    if 'courses' in data: fingerprints['courses'] = fingerprint.value_fingerprint(data['courses'])
+    for course_id, (student_ids, tenths) in data['marks'].items():
+        fingerprints[_segment_name(('marks', course_id))] = fingerprint.value_fingerprint(sorted(zip(student_ids, tenths)))
+    return fingerprints
+
+def state_fingerprint(path, state, data):
+    """Returns (content fingerprint, segment fingerprints) of `state` once the snapshot() `data` is written to `path`.
+
+    Clean segments keep the fingerprints recorded for the save on disk; every
+    segment is hashed only if there are none (first save, or another instance
+    wrote the save since).
+    """
+    segments = fingerprint.read_segment_sidecar(path)
+    if segments is None: segments = segment_fingerprints(snapshot(*state, all_segments(state[2])))
+    segments.update(segment_fingerprints(data))
+    return fingerprint.combine_fingerprints(segments), segments
+
+def write_partitions(path, data, open_file=gzip.open):
+    """Writes the segments in a snapshot(); the others on disk are left as they are."""
+    created = not os.path.isdir(path)
+    os.makedirs(os.path.join(path, MARKS_DIR), exist_ok=True)
+    if 'students' in data: write_checkpoint(os.path.join(path, STUDENTS_SEGMENT), data['students'], open_file, sync_dir=False)
+    if 'courses' in data: write_checkpoint(os.path.join(path, COURSES_SEGMENT), data['courses'], open_file, sync_dir=False)
+    for course_id, (student_ids, tenths) in data['marks'].items():
+        write_checkpoint(os.path.join(path, MARKS_DIR, _marks_segment(course_id)), (course_id, student_ids, tenths), open_file, sync_dir=False)
+    sync_directory(os.path.join(path, MARKS_DIR))
+    sync_directory(path)
+    if created: sync_directory(os.path.dirname(path))
+
+def _read_segment(path):
+    with compression.open_save(path) as f: # Codec detected per segment
+        return pickle.load(f)
+
+def read_partitions(path, mark_store_class, workers=None):
+    """Loads every segment in parallel. Returns (students EntityStore, courses EntityStore, mark store)."""
+    marks_dir = os.path.join(path, MARKS_DIR)
+    mark_paths = sorted(entry.path for entry in os.scandir(marks_dir) if entry.name.endswith(".seg")) if os.path.isdir(marks_dir) else []
+    paths = [os.path.join(path, name) for name in (STUDENTS_SEGMENT, COURSES_SEGMENT)]
+    with ThreadPoolExecutor(workers or os.cpu_count() or 1, thread_name_prefix="SegmentLoader") as pool:
+        fixed = [pool.submit(_read_segment, segment) if os.path.exists(segment) else None for segment in paths]
+        mark_segments = list(pool.map(_read_segment, mark_paths))
+        student_rows, course_rows = [future.result() if future else [] for future in fixed]
+    students = EntityStore(Student(*row) for row in student_rows)
+    courses = EntityStore(Course(*row) for row in course_rows)
+    return students, courses, _merge_marks(mark_segments, mark_store_class)
+
+def _merge_marks(segments, mark_store_class):
+    """Builds a mark store from per-course (course_id, student_ids, tenths) segments via CSR arrays."""
+    student_ids, student_rows, course_ids = [], {}, []
+    rows, cols, tenths = array('i'), array('i'), array('i')
+    for col, (course_id, course_student_ids, course_tenths) in enumerate(segments):
+        course_ids.append(course_id)
+        for student_id in course_student_ids:
+            row = student_rows.get(student_id)
+            if row is None:
+                row = student_rows[student_id] = len(student_ids)
+                student_ids.append(student_id)
+            rows.append(row)
+        cols.extend([col] * len(course_student_ids))
+        tenths.extend(course_tenths)
+    rows, cols, tenths = (np.frombuffer(column, dtype=np.int32) for column in (rows, cols, tenths))
+    order = np.lexsort((cols, rows)) # By student row, then course column
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(student_ids))))).astype(np.int64)
+    return mark_store_class.from_csr(student_ids, course_ids, indptr, cols[order], tenths[order])
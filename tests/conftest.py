@@ -0,0 +1,10 @@
+import pytest
+
+# tests/ is a package, so pytest puts the repository root on sys.path and the
+# pw4..pw9 snapshots import as top-level packages.
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Runs every test in an empty directory: the apps keep their save files in the working directory."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,60 @@
+import contextlib
+import importlib
+import io
+
+# Apps under test: pw4..pw8 have a curses Application, pw9 the Tk-free AppLogic.
+APP_MODULES = {"pw4": "pw4.main", "pw5": "pw5.main", "pw6": "pw6.main", "pw8": "pw8.main", "pw9": "pw9.app_logic"}
+PERSISTENT = ("pw6", "pw8", "pw9") # Apps with the journal, storage backends and autosave
+BACKENDS = ("pickle", "sqlite", "columnar", "partitioned")
+
+def app_class(package):
+    module = importlib.import_module(APP_MODULES[package])
+    return getattr(module, "AppLogic", None) or module.Application
+
+@contextlib.contextmanager
+def quiet():
+    """Swallows the progress messages the apps print."""
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+def make_app(package, *args, **kwargs):
+    with quiet():
+        return app_class(package)(*args, **kwargs)
+
+def mark_value(package, mark):
+    """pw9 takes marks (and credits) as entered text, the curses apps as numbers."""
+    return str(mark) if package == "pw9" else mark
+
+def mark_store_class(package, name):
+    module = "mark_store" if name == "MarkStore" else "sparse_mark_store"
+    return getattr(importlib.import_module(f"{package}.{module}"), name)
+
+def save(app):
+    """Runs a save to completion, whichever way the app saves."""
+    with quiet():
+        if hasattr(app, "save_in_background"):
+            app.save_in_background()
+            if app.save_thread: app.save_thread.join()
+        else:
+            app._save_data_pickle()
+
+def state(app):
+    """Everything an app shows: students with GPAs (in list order), courses and marks."""
+    app.calculate_all_gpas()
+    return ([(s.id, s.name, s.dob, s.gpa) for s in app.students],
+            [(c.id, c.name, c.credits) for c in app.courses],
+            sorted(app.marks.iter_tenths()))
+
+def force_checkpoints(monkeypatch, package):
+    """Makes every save write the checkpoint instead of just syncing the journal."""
+    journal = importlib.import_module(f"{package}.journal")
+    monkeypatch.setattr(journal, "MIN_CHECKPOINT_BYTES", 0)
+    monkeypatch.setattr(journal, "CHECKPOINT_RATIO", 0)
+
+def fill(app, package, n_students=20, n_courses=5):
+    """Adds a small, deterministic dataset through the app's own add methods."""
+    with quiet():
+        for i in range(n_students): app.add_student(f"S{i}", f"Name {i}", "01/01/2000")
+        for j in range(n_courses): app.add_course(f"C{j}", f"Course {j}", mark_value(package, j % 4 + 1))
+        for i in range(n_students):
+            for j in range(i % n_courses + 1): app.add_mark(f"C{j}", f"S{i}", mark_value(package, (i * 7 + j) % 200 / 10))
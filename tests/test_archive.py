@@ -0,0 +1,84 @@
+import zipfile
+
+import pytest
+
+from pw5 import main as pw5
+
+from .helpers import make_app, quiet
+
+NAMES = ["Ada Lovelace", "Nguyễn Thị Bình", "O'Brien; Jr.", "Zoë ;;Müller;"]
+
+def fill(app):
+    with quiet():
+        for number, name in enumerate(NAMES):
+            app.add_student(f"S{number}", name, f"0{number + 1}/01/2000")
+        app.add_course("C1", "Toán; cao cấp", 3)
+        app.add_course("C2", "Physics", 2)
+        for number in range(len(NAMES)):
+            app.add_mark("C1", f"S{number}", 10 + number * 2.5)
+        app.add_mark("C2", "S1", 19.5)
+
+def contents(app):
+    return ([(s.id, s.name, s.dob) for s in app.students], [(c.id, c.name, c.credits) for c in app.courses],
+            sorted(app.marks.iter_marks()))
+
+def test_archive_written_by_zipping_the_txt_files_reloads():
+    app = make_app("pw5")
+    fill(app)
+    with quiet():
+        app._save_students_to_txt(); app._save_courses_to_txt(); app._save_marks_to_txt()
+    with zipfile.ZipFile(pw5.ARCHIVE_FILE, "w", compression=zipfile.ZIP_DEFLATED) as zipf: # The original save format
+        for name in (pw5.STUDENTS_FILE, pw5.COURSES_FILE, pw5.MARKS_FILE): zipf.write(name)
+    reloaded = make_app("pw5")
+    assert contents(reloaded) == contents(app)
+    assert reloaded.find_student_by_id("S3").name == "Zoë ;;Müller;" # Delimiters inside names survive
+
+def test_lines_without_three_fields_are_still_skipped():
+    app = make_app("pw5")
+    with quiet():
+        app._load_students_from_txt(["S1;Ada;01/01/2000\n", "S2;no dob\n", "\n"])
+    assert [s.id for s in app.students] == ["S1"]
+
+def members(path=pw5.ARCHIVE_FILE):
+    with zipfile.ZipFile(path) as zipf:
+        return [(info.filename, zipf.read(info)) for info in zipf.infolist()]
+
+def txt_files(app):
+    with quiet():
+        app._save_students_to_txt(); app._save_courses_to_txt(); app._save_marks_to_txt()
+    return [(name, open(name, "rb").read()) for name in (pw5.STUDENTS_FILE, pw5.COURSES_FILE, pw5.MARKS_FILE)]
+
+def test_archive_members_match_the_txt_export():
+    app = make_app("pw5")
+    fill(app)
+    app._write_archive()
+    assert members() == txt_files(app)
+    assert contents(make_app("pw5")) == contents(app)
+
+def test_screen_saves_append_only_the_changed_member():
+    app = make_app("pw5")
+    fill(app)
+    app._write_archive()
+    with quiet(): app.add_student("S9", "Łukasz; Nowak", "09/09/2001")
+    app._save_archive(pw5.STUDENTS_FILE)
+    saved = members()
+    assert [name for name, _ in saved] == [pw5.STUDENTS_FILE, pw5.COURSES_FILE, pw5.MARKS_FILE, pw5.STUDENTS_FILE]
+    assert saved[-1] == txt_files(app)[0] # Newest copy of the member
+    assert contents(make_app("pw5")) == contents(app)
+    with quiet(): app._compress_data() # Exit: one full rewrite drops the superseded copy
+    assert members() == txt_files(app)
+
+def test_screen_saves_compact_the_archive():
+    app = make_app("pw5")
+    fill(app)
+    counts = []
+    for mark in range(10):
+        with quiet(): app.add_mark("C2", "S0", mark)
+        app._save_archive(pw5.MARKS_FILE)
+        with zipfile.ZipFile(pw5.ARCHIVE_FILE) as zipf: infos = zipf.infolist()
+        live = {info.filename: info for info in infos}
+        assert sum(i.compress_size for i in infos) <= 3 * sum(i.compress_size for i in live.values())
+        counts.append(len(infos))
+    assert max(counts) > 3 and 3 in counts[1:] # Appended, then compacted by a full rewrite
+    assert (pw5.MARKS_FILE, dict(members())[pw5.MARKS_FILE]) == txt_files(app)[2]
+    assert contents(make_app("pw5")) == contents(app)
@@ -0,0 +1,66 @@
+import types
+
+import pytest
+
+from pw8.autosave import SaveScheduler
+from .helpers import make_app, fill, force_checkpoints, quiet
+
+@pytest.mark.parametrize("checkpoint", [False, True], ids=["journal", "checkpoint"])
+@pytest.mark.parametrize("backend", ["pickle", "sqlite", "partitioned"])
+def test_pw8_autosave_reports_on_the_status_line(backend, checkpoint, monkeypatch, capsys):
+    if checkpoint: force_checkpoints(monkeypatch, "pw8")
+    app = make_app("pw8", storage_backend=backend)
+    fill(app, "pw8")
+    app.autosave = SaveScheduler(delay=0, max_delay=0) # Due right away
+    app.autosave.touch()
+    app.ui_active = True # As while curses owns the terminal
+    app.autosave_if_due()
+    app.wait_for_save()
+    assert capsys.readouterr() == ("", "") # Nothing printed over the screen
+    message, color_pair = app.status_message
+    assert color_pair == 1 and ("saved" in message or "committed" in message or "completed" in message), message
+    assert not app.autosave.is_dirty()
+
+def test_pw8_save_errors_are_shown_in_red(monkeypatch, capsys):
+    app = make_app("pw8")
+    fill(app, "pw8")
+    app.ui_active = True
+    def fail(): raise OSError("disk full")
+    monkeypatch.setattr(app.journal, "sync", fail)
+    assert app.save_in_background() is False
+    assert capsys.readouterr() == ("", "")
+    assert app.status_message == (f"Error syncing journal {app.journal.path}: disk full", 2)
+    assert app.autosave.is_dirty() # Retried by a later autosave
+
+@pytest.mark.parametrize("checkpoint", [False, True], ids=["journal", "checkpoint"])
+@pytest.mark.parametrize("package", ["pw8", "pw9"])
+def test_save_in_background_reports_nothing_to_save(package, checkpoint, monkeypatch):
+    if checkpoint: force_checkpoints(monkeypatch, package)
+    app = make_app(package)
+    with quiet():
+        assert app.save_in_background() is None # Clean: nothing to save, not a started save
+        fill(app, package)
+        assert app.save_in_background() is True
+        app.wait_for_save()
+        assert app.save_in_background() is None
+
+def test_save_in_background_reports_a_save_that_could_not_start(monkeypatch):
+    app = make_app("pw9")
+    fill(app, "pw9")
+    def fail(): raise OSError("disk full")
+    monkeypatch.setattr(app.journal, "sync", fail)
+    with quiet(): assert app.save_in_background() is False
+
+def test_pw9_closing_says_when_there_is_nothing_to_save(monkeypatch):
+    from pw9 import main as gui
+    shown = []
+    monkeypatch.setattr(gui.messagebox, "askokcancel", lambda *args, **kwargs: True)
+    for kind in ("showinfo", "showwarning"):
+        monkeypatch.setattr(gui.messagebox, kind, lambda title, text, kind=kind, **kwargs: shown.append((kind, text)))
+    window = types.SimpleNamespace(logic=make_app("pw9"), wait_for_data=lambda: None, destroy=lambda: shown.append("destroyed"))
+    with quiet(): gui.StudentAppGUI.on_closing(window)
+    assert shown == [("showinfo", "Nothing to save.\nProgram will now exit."), "destroyed"]
+    with quiet(): fill(window.logic, "pw9")
+    shown.clear()
+    with quiet(): gui.StudentAppGUI.on_closing(window)
+    assert shown == [("showinfo", "Data save initiated in background.\nProgram will now exit."), "destroyed"]
@@ -0,0 +1,21 @@
+import contextlib
+import io
+
+import pytest
+
+from .helpers import BACKENDS, make_app, fill, save, state, force_checkpoints
+
+@pytest.mark.parametrize("checkpoint", [False, True], ids=["journal", "checkpoint"])
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("package", ["pw8", "pw9"]) # The apps that load on a LoadThread
+def test_background_load_round_trip(package, backend, checkpoint, monkeypatch):
+    if checkpoint: force_checkpoints(monkeypatch, package)
+    app = make_app(package, storage_backend=backend)
+    fill(app, package)
+    save(app)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        reloaded = app.__class__(storage_backend=backend, load_in_background=True)
+        assert reloaded.loaded.wait(30)
+    assert "error" not in output.getvalue().lower(), output.getvalue()
+    assert state(reloaded) == state(app)
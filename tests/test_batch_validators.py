@@ -0,0 +1,51 @@
+import importlib
+import random
+
+import numpy as np
+import pytest
+
+PACKAGES = ("pw4", "pw5", "pw6", "pw8", "pw9")
+
+@pytest.fixture(params=PACKAGES)
+def data_input(request):
+    return importlib.import_module(f"{request.param}.input")
+
+def _random_strings(seed, count, alphabet="0123456789-+. e", max_len=8):
+    rnd = random.Random(seed)
+    values = [''.join(rnd.choice(alphabet) for _ in range(rnd.randrange(max_len + 1))) for _ in range(count)]
+    return values + ["", " 12 ", "+7", "-0", "007", "9" * 25, "٣", "1_000", "0.5", "-.5", "5.", "."]
+
+def test_positive_integer_batch_matches_scalar(data_input):
+    values = _random_strings(1, 2000, "0123456789-+ ")
+    ints, valid, codes = data_input.validate_positive_integer_batch(values)
+    for index, value in enumerate(values):
+        expected = data_input.validate_positive_integer(value)
+        assert valid[index] == (expected is not None), value
+        assert ints[index] == (expected if expected is not None else 0), value
+        assert (codes[index] == data_input.VALID) == valid[index]
+
+def test_mark_batch_matches_scalar(data_input):
+    values = _random_strings(2, 3000)
+    tenths, valid, codes = data_input.parse_mark_tenths_batch(values)
+    marks, mark_valid, _ = data_input.validate_mark_batch(values)
+    for index, value in enumerate(values):
+        expected, error = data_input.parse_mark_tenths(value)
+        assert valid[index] == (not error), value
+        assert tenths[index] == (expected if not error else 0), value
+        if error: assert data_input.MARK_ERROR_MESSAGES[codes[index]] == error, value
+        else: assert marks[index] == expected / 10
+    assert np.array_equal(mark_valid, valid)
+
+def test_mark_batch_accepts_numbers(data_input):
+    tenths, valid, _ = data_input.parse_mark_tenths_batch([7.5, 12, "2.3"])
+    assert valid.all() and tenths.tolist() == [75, 120, 23]
+
+def test_id_batch_matches_scalar(data_input):
+    existing = {"S1", "S2"}
+    ids = ["S1", "", "S3", "S2", "S4"]
+    valid, codes = data_input.validate_student_id_batch(ids, existing)
+    for index, student_id in enumerate(ids):
+        ok, _ = data_input.validate_student_id(student_id, existing)
+        assert valid[index] == ok
+    assert codes.tolist() == [data_input.ERR_DUPLICATE, data_input.ERR_EMPTY, data_input.VALID, data_input.ERR_DUPLICATE, data_input.VALID]
+    assert data_input.validate_course_id_batch(ids, existing)[0].tolist() == valid.tolist()
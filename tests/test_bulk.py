@@ -0,0 +1,41 @@
+import pytest
+
+from .helpers import APP_MODULES, make_app, mark_value, state, quiet
+
+@pytest.mark.parametrize("package", APP_MODULES)
+def test_bulk_adds_match_single_adds(package, tmp_path, monkeypatch):
+    students = [(f"S{i}", f"Name {i}", "01/01/2000") for i in range(30)]
+    courses = [(f"C{j}", f"Course {j}", str(j + 1)) for j in range(4)]
+    marks = [(f"C{(i * 3) % 5}", f"S{i}", str((i * 37 % 200) / 10)) for i in range(30)] # C4 gets its course later
+
+    # Each app in its own directory: the persistent ones journal every add
+    (tmp_path / "single").mkdir(); (tmp_path / "bulk").mkdir()
+    monkeypatch.chdir(tmp_path / "single")
+    single = make_app(package)
+    with quiet():
+        for row in students: single.add_student(*row)
+        for course_id, name, credits in courses: single.add_course(course_id, name, mark_value(package, int(credits)))
+        for course_id, student_id, mark in marks: single.add_mark(course_id, student_id, mark_value(package, float(mark)))
+    monkeypatch.chdir(tmp_path / "bulk")
+    bulk = make_app(package)
+    with quiet():
+        assert bulk.add_students_bulk(students + [("S1", "dup", "x"), ("", "no id", "x")])[0] == len(students)
+        added, errors = bulk.add_courses_bulk(courses + [("C9", "bad", "0"), ("C0", "dup", "3")])
+        assert added == len(courses) and [index for index, _ in errors] == [4, 5]
+        added, errors = bulk.add_marks_bulk(marks + [("C1", "S1", "abc"), ("", "S1", "5")])
+        assert added == len(marks) and [index for index, _ in errors] == [30, 31]
+    assert state(bulk) == state(single)
+
+    # A course added after its marks makes them count, in bulk as in single adds
+    with quiet():
+        bulk.add_courses_bulk([("C4", "Late", "2")])
+        monkeypatch.chdir(tmp_path / "single")
+        single.add_course("C4", "Late", mark_value(package, 2))
+    assert state(bulk) == state(single)
+
+@pytest.mark.parametrize("package", APP_MODULES)
+def test_bulk_rows_within_a_batch_must_be_unique(package):
+    app = make_app(package)
+    with quiet():
+        added, errors = app.add_students_bulk([("S1", "a", "d"), ("S1", "b", "d")])
+    assert added == 1 and errors[0][0] == 1 and "repeated" in errors[0][1]
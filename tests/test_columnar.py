@@ -0,0 +1,27 @@
+import importlib
+
+import numpy as np
+import pytest
+
+from .helpers import PERSISTENT, APP_MODULES, make_app, fill, save, state, force_checkpoints, mark_store_class
+
+@pytest.mark.parametrize("package", PERSISTENT)
+def test_columnar_backend_keeps_marks_memory_mapped(package, monkeypatch):
+    force_checkpoints(monkeypatch, package)
+    app = make_app(package, storage_backend="columnar")
+    assert app.mark_store_class is mark_store_class(package, "SparseMarkStore")
+    fill(app, package)
+    save(app)
+    reloaded = make_app(package, storage_backend="columnar")
+    if hasattr(reloaded, "loaded"): reloaded.loaded.wait()
+    assert isinstance(reloaded.marks._tenths, np.memmap) # Adopted as mapped, not copied mark by mark
+    assert state(reloaded) == state(app)
+
+@pytest.mark.parametrize("package", PERSISTENT)
+def test_mark_store_setting(package):
+    choose = importlib.import_module(APP_MODULES[package]).default_mark_store_class
+    dense, sparse = mark_store_class(package, "MarkStore"), mark_store_class(package, "SparseMarkStore")
+    assert choose("pickle") is dense and choose("columnar") is sparse
+    assert choose("columnar", "dense") is dense and choose("sqlite", "sparse") is sparse
+    with pytest.raises(ValueError):
+        choose("pickle", "csr")
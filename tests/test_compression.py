@@ -0,0 +1,40 @@
+import importlib
+import pickle
+
+import pytest
+
+from .helpers import PERSISTENT, make_app, fill, save, state, force_checkpoints
+
+@pytest.fixture(params=PERSISTENT)
+def package(request):
+    return request.param
+
+def compression(package):
+    return importlib.import_module(f"{package}.compression")
+
+@pytest.mark.parametrize("spec", ["none", "zlib:1", "zlib:9", "bz2:1", "bz2:9", "lzma:0", "lzma:6"])
+def test_codecs_round_trip_and_are_detected(package, spec):
+    codec = compression(package).parse_codec(spec)
+    payload = pickle.dumps({'marks': {f"C{i}": {f"S{j}": j / 10 for j in range(50)} for i in range(20)}})
+    with compression(package).open_save("save.dat", 'wb', codec) as f:
+        f.write(payload)
+    with compression(package).open_save("save.dat") as f:
+        assert f.read() == payload
+    name, level = compression(package).detect_codec("save.dat")
+    assert name == codec[0] and level in (codec[1], None) # zlib (plain gzip) does not record its level
+
+@pytest.mark.parametrize("spec", ["zlib:0", "zlib:10", "bz2:0", "lzma:10", "none:1", "zstd", "zlib:fast"])
+def test_invalid_codecs_are_rejected(package, spec):
+    with pytest.raises(ValueError):
+        compression(package).parse_codec(spec)
+
+@pytest.mark.parametrize("spec", ["none", "bz2:1", "lzma:0"])
+def test_app_loads_a_save_written_with_any_codec(package, spec, monkeypatch):
+    force_checkpoints(monkeypatch, package)
+    app = make_app(package, save_codec=spec)
+    fill(app, package)
+    save(app)
+    assert compression(package).detect_codec("student_data.pkl.gz")[0] == spec.split(':')[0]
+    reloaded = make_app(package) # Default codec: the header says how to read it
+    if hasattr(reloaded, "loaded"): reloaded.loaded.wait()
+    assert state(reloaded) == state(app)
@@ -0,0 +1,73 @@
+import importlib
+import os
+import shutil
+
+import pytest
+
+from .helpers import PERSISTENT, make_app, fill, save, state, force_checkpoints, mark_value, quiet
+
+def derived_cache(package):
+    return importlib.import_module(f"{package}.derived_cache")
+
+def open_app(package, backend, monkeypatch):
+    """Opens the saved data; also returns how many full GPA reductions the load and a first query ran."""
+    gpa_engine = importlib.import_module(f"{package}.gpa_engine")
+    reductions = []
+    compute_gpa_totals = gpa_engine.compute_gpa_totals
+    monkeypatch.setattr(gpa_engine, "compute_gpa_totals", lambda *args: (reductions.append(1), compute_gpa_totals(*args))[1])
+    app = make_app(package, storage_backend=backend)
+    if hasattr(app, "loaded"): app.loaded.wait()
+    app.calculate_all_gpas()
+    monkeypatch.setattr(gpa_engine, "compute_gpa_totals", compute_gpa_totals)
+    return app, len(reductions)
+
+def ranking(app):
+    """GPA order and every student's rank, as the ranking queries report them."""
+    return [s.id for s in app.get_top_students(len(app.students))], [app.get_student_rank(s.id) for s in app.students]
+
+def edit(app, package, add_student=True):
+    with quiet():
+        app.add_mark("C0", "S3", mark_value(package, 19.5)) # Moves S3 up the ranking
+        app.add_mark("C0", "S4", mark_value(package, 0))
+        if add_student:
+            app.add_student("S99", "Late", "01/01/2000")
+            app.add_mark("C1", "S99", mark_value(package, 12))
+    app.journal.sync()
+
+@pytest.mark.parametrize("package", PERSISTENT)
+@pytest.mark.parametrize("backend", ["pickle", "columnar"])
+def test_warm_start_matches_a_cold_recompute(package, backend, monkeypatch):
+    force_checkpoints(monkeypatch, package)
+    app = make_app(package, storage_backend=backend)
+    fill(app, package)
+    save(app)
+    cache = derived_cache(package).cache_path(app.checkpoint_path)
+    assert os.path.exists(cache)
+    edit(app, package) # Journaled only: the checkpoint and its cache stay as saved
+
+    warm, reductions = open_app(package, backend, monkeypatch)
+    assert reductions == 0 # Cache adopted: only the replayed students were recomputed
+    os.remove(cache)
+    cold, reductions = open_app(package, backend, monkeypatch)
+    assert reductions == 1 # No cache: one full recompute
+    assert state(warm) == state(cold) == state(app)
+    assert ranking(warm) == ranking(cold) == ranking(app)
+
+@pytest.mark.parametrize("package", PERSISTENT)
+@pytest.mark.parametrize("backend", ["pickle", "columnar"])
+def test_stale_cache_falls_back_to_recomputing(package, backend, monkeypatch):
+    force_checkpoints(monkeypatch, package)
+    app = make_app(package, storage_backend=backend)
+    fill(app, package)
+    save(app)
+    cache = derived_cache(package).cache_path(app.checkpoint_path)
+    shutil.copy(cache, "old.derived")
+    edit(app, package, add_student=False) # Same students, so only the fingerprint tells the caches apart
+    save(app) # New checkpoint and fingerprint
+    shutil.copy("old.derived", cache) # Cache of the previous checkpoint: its fingerprint no longer matches
+    assert derived_cache(package).read_cache(app.checkpoint_path, len(app.students)) is None
+
+    reopened, reductions = open_app(package, backend, monkeypatch)
+    assert reductions == 1 # Stale cache ignored, everything recomputed
+    assert state(reopened) == state(app)
+    assert ranking(reopened) == ranking(app)
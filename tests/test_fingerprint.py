@@ -0,0 +1,58 @@
+import importlib
+
+import pytest
+
+from .helpers import PERSISTENT, make_app, fill, save, state, force_checkpoints, mark_value, quiet
+
+@pytest.fixture(params=PERSISTENT)
+def package(request):
+    return request.param
+
+def module(package, name):
+    return importlib.import_module(f"{package}.{name}")
+
+@pytest.mark.parametrize("backend", ["pickle", "columnar", "partitioned"])
+def test_reload_skips_unchanged_saved_data(package, backend, monkeypatch):
+    force_checkpoints(monkeypatch, package)
+    app = make_app(package, storage_backend=backend)
+    fill(app, package)
+    save(app)
+    with quiet(): assert app.reload_data() is False # Memory already holds the saved data
+    other = make_app(package, storage_backend=backend)
+    if hasattr(other, "loaded"): other.loaded.wait()
+    with quiet(): other.add_mark("C0", "S1", mark_value(package, 19.5))
+    save(other)
+    with quiet(): assert app.reload_data() is True
+    assert state(app) == state(other)
+
+def test_partitioned_save_only_fingerprints_dirty_segments(package, monkeypatch):
+    app = make_app(package, storage_backend="partitioned")
+    fill(app, package)
+    save(app) # Hashes every segment once: there is no sidecar yet
+    fingerprint, partitions, derived_cache = (module(package, name) for name in ("fingerprint", "partitions", "derived_cache"))
+    hashed = []
+    value_fingerprint = fingerprint.value_fingerprint
+    monkeypatch.setattr(fingerprint, "value_fingerprint", lambda value: (hashed.append(value), value_fingerprint(value))[1])
+    def whole_state_pass(*args): raise AssertionError("whole-state pass during a partitioned save")
+    monkeypatch.setattr(fingerprint, "state_fingerprint", whole_state_pass)
+    monkeypatch.setattr(derived_cache, "compute", whole_state_pass)
+    with quiet(): app.add_mark("C2", "S3", mark_value(package, 12.5))
+    save(app)
+    assert len(hashed) == 2 # The dirty marks segment, then the combined fingerprint
+    # Combined from the recorded segment fingerprints, it equals hashing every segment again
+    students, courses, marks = app.students, app.courses, app.marks
+    full = partitions.segment_fingerprints(partitions.snapshot(students, courses, marks, partitions.all_segments(marks)))
+    assert fingerprint.read_sidecar(partitions.PARTITION_DIR) == fingerprint.combine_fingerprints(full)
+
+@pytest.mark.parametrize("backend", ["pickle", "columnar", "partitioned"])
+def test_saving_unchanged_state_writes_nothing(package, backend, monkeypatch):
+    force_checkpoints(monkeypatch, package)
+    app = make_app(package, storage_backend=backend)
+    fill(app, package)
+    save(app)
+    signature = module(package, "fingerprint").file_signature(app.checkpoint_path)
+    with quiet(): # An edit, then undone: the state is what the checkpoint already holds
+        app.add_mark("C0", "S0", mark_value(package, 3.0))
+        app.add_mark("C0", "S0", mark_value(package, 0.0))
+    save(app)
+    assert module(package, "fingerprint").file_signature(app.checkpoint_path) == signature
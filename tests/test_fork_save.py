@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from .helpers import make_app, fill, save, state, force_checkpoints, mark_value, quiet
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+
+PACKAGES = ("pw8", "pw9")
+
+@pytest.mark.parametrize("package", PACKAGES)
+@pytest.mark.parametrize("backend", ["pickle", "columnar", "partitioned"])
+def test_forked_save_round_trip(package, backend, monkeypatch):
+    force_checkpoints(monkeypatch, package)
+    app = make_app(package, storage_backend=backend, save_strategy="fork")
+    fill(app, package)
+    save(app) # Joins the SaveReaper, i.e. waits for the child to exit
+    assert app.save_thread.name == "SaveReaper" and not app.autosave.is_dirty()
+    assert app.journal.size() == 0 # Everything is in the checkpoint the child wrote
+    assert state(make_app(package, storage_backend=backend)) == state(app)
+
+    with quiet():
+        app.add_student("S99", "Late", "01/01/2000")
+        app.add_mark("C0", "S99", mark_value(package, 17.5))
+        app.add_mark("C0", "S1", mark_value(package, 3))
+    save(app) # A second fork writes the edits made since
+    assert app.journal.size() == 0
+    assert state(make_app(package, storage_backend=backend)) == state(app)
+
+@pytest.mark.parametrize("package", PACKAGES)
+def test_failing_save_process_is_reported(package, monkeypatch, capsys):
+    force_checkpoints(monkeypatch, package)
+    app = make_app(package, save_strategy="fork")
+    fill(app, package)
+    def fail(*args): raise OSError("disk full") # Raised in the child, which inherits the patched method
+    monkeypatch.setattr(app, "_write_checkpoint", fail)
+    capsys.readouterr()
+    app.save_in_background()
+    app.save_thread.join()
+    assert "ERROR: save process" in capsys.readouterr().err
+    assert app.autosave.is_dirty() # Retried by the next save
+    assert state(make_app(package)) == state(app) # Nothing lost: the rotated journal is still replayed
+    monkeypatch.delattr(app, "_write_checkpoint")
+    save(app)
+    assert not app.autosave.is_dirty() and app.journal.size() == 0
+    assert state(make_app(package)) == state(app)
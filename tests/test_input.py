@@ -0,0 +1,45 @@
+import importlib
+import time
+
+import pytest
+
+PACKAGES = ("pw4", "pw5", "pw6", "pw8", "pw9")
+
+@pytest.fixture(params=PACKAGES)
+def data_input(request):
+    return importlib.import_module(f"{request.param}.input")
+
+@pytest.mark.parametrize("mark, tenths", [
+    ("2.3", 23),        # float(2.3) * 10 floors to 22
+    ("7.55", 75),
+    (" 10 ", 100),
+    ("-2.31", -24),     # Floor, not truncation
+    ("-0", 0),
+    ("1.99999999999999999999999999999", 19), # More digits than the default Decimal precision
+    ("-1e-9999999", -1),
+    ("1e-9999999", 0),
+    ("214748364.7", 2**31 - 1),
+    ("-214748364.8", -2**31),
+])
+def test_parse_mark_tenths_floors_exactly(data_input, mark, tenths):
+    assert data_input.parse_mark_tenths(mark) == (tenths, "")
+
+@pytest.mark.parametrize("mark", ["214748364.8", "-214748364.81", "1e9999999", "-1e9999999", "1e200000"])
+def test_parse_mark_tenths_rejects_out_of_range_without_converting(data_input, mark):
+    started = time.perf_counter()
+    tenths, error = data_input.parse_mark_tenths(mark)
+    assert tenths is None and error == "Mark is out of range."
+    assert time.perf_counter() - started < 0.1
+
+@pytest.mark.parametrize("mark", ["", "abc", "nan", "inf", "-Infinity", "1..2", None])
+def test_parse_mark_tenths_rejects_non_numbers(data_input, mark):
+    assert data_input.parse_mark_tenths(mark) == (None, "Invalid input. Please enter a numerical mark.")
+
+def test_batch_parse_matches_scalar(data_input):
+    marks = ["2.3", "-2.31", "1e9999999", "1e200000", "-1e-9999999", "abc", "214748364.8", " 7.55 ", "0.05", "-0.05", "12"]
+    tenths, valid, codes = data_input.parse_mark_tenths_batch(marks)
+    for index, mark in enumerate(marks):
+        expected, error = data_input.parse_mark_tenths(mark)
+        assert valid[index] == (not error), mark
+        assert tenths[index] == (expected if not error else 0), mark
+        if error: assert data_input.MARK_ERROR_MESSAGES[codes[index]] == error, mark
@@ -0,0 +1,48 @@
+import gzip
+import importlib
+import os
+
+import pytest
+
+from .helpers import PERSISTENT
+
+@pytest.fixture(params=PERSISTENT)
+def journal(request):
+    return importlib.import_module(f"{request.param}.journal")
+
+RECORDS = [('student', 'S1', 'Ann', '01/01/2000'), ('course', 'C1', 'Maths', 3), ('mark', 'C1', 'S1', 155)]
+
+def test_replay_returns_rotated_records_first(journal):
+    first = journal.MutationJournal("save.dat")
+    first.append_many(RECORDS[:2])
+    first.rotate() # A checkpoint started and never finished
+    first.append(*RECORDS[2])
+    first.sync()
+    assert journal.MutationJournal("save.dat").replay() == RECORDS
+    first.checkpoint_done()
+    assert journal.MutationJournal("save.dat").replay() == RECORDS[2:]
+
+@pytest.mark.parametrize("damage", ["truncate", "corrupt"])
+def test_torn_record_ends_the_journal(journal, damage):
+    writer = journal.MutationJournal("save.dat")
+    writer.append_many(RECORDS)
+    writer.close()
+    size = os.path.getsize(writer.path)
+    with open(writer.path, 'r+b') as f:
+        if damage == "truncate": f.truncate(size - 3) # Crash in the middle of the last append
+        else: f.seek(size - 1); f.write(b'\xff') # Fails its CRC
+    reader = journal.MutationJournal("save.dat")
+    assert reader.replay() == RECORDS[:2]
+    reader.append('mark', 'C1', 'S1', 90) # Lands right after the last valid record
+    reader.close()
+    assert journal.MutationJournal("save.dat").replay() == RECORDS[:2] + [('mark', 'C1', 'S1', 90)]
+
+def test_checkpoint_is_synced_before_and_after_the_rename(journal, monkeypatch):
+    events = []
+    fsync, replace = os.fsync, os.replace
+    monkeypatch.setattr(os, "fsync", lambda fd: (events.append("fsync"), fsync(fd))[1])
+    monkeypatch.setattr(os, "replace", lambda *paths: (events.append("replace"), replace(*paths))[1])
+    journal.write_checkpoint("save.dat", {'students': [], 'courses': [], 'marks': {}})
+    assert events == ["fsync", "replace", "fsync"] # Temp file, rename, directory
+    with gzip.open("save.dat", 'rb') as f:
+        assert journal.read_checkpoint(f) == {'students': [], 'courses': [], 'marks': {}}
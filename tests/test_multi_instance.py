@@ -0,0 +1,65 @@
+import importlib
+import multiprocessing
+import os
+
+import pytest
+
+from .helpers import PERSISTENT, make_app, fill, save, state, force_checkpoints, mark_value, quiet
+
+@pytest.fixture(params=PERSISTENT)
+def package(request):
+    return request.param
+
+def _append_marks(package, count):
+    journal = importlib.import_module(f"{package}.journal").MutationJournal("save.dat")
+    for i in range(count): journal.append('mark', 'C1', f"S{i}", i)
+    journal.close()
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_appends_survive_rotations_by_another_process(package):
+    journal = importlib.import_module(f"{package}.journal")
+    saver = journal.MutationJournal("save.dat")
+    saver.replay()
+    appender = multiprocessing.get_context("fork").Process(target=_append_marks, args=(package, 3000))
+    appender.start()
+    checkpointed = set()
+    while appender.is_alive(): # Checkpoint as fast as possible, the way the apps do
+        checkpointed.update(saver.follow()) # merge_external_changes()
+        with saver.locked():
+            saver.rotate()
+            saver.append_many(saver.follow()) # _carry_over_external()
+        saver.checkpoint_done()
+    appender.join()
+    assert appender.exitcode == 0
+    saver.close()
+    on_disk = checkpointed | set(journal.MutationJournal("save.dat").replay())
+    assert {('mark', 'C1', f"S{i}", i) for i in range(3000)} <= on_disk
+
+def test_instances_see_each_others_edits(package):
+    first, second = make_app(package), make_app(package)
+    with quiet():
+        fill(first, package)
+        assert second.merge_external_changes() > 0
+        second.add_mark("C1", "S2", mark_value(package, 17.5))
+        assert first.merge_external_changes() == 1
+        assert first.merge_external_changes() == 0 # Nothing new
+    assert state(first) == state(second)
+
+@pytest.mark.parametrize("backend", ["pickle", "columnar", "partitioned"])
+def test_edits_made_during_a_checkpoint_are_carried_over(package, backend, monkeypatch):
+    force_checkpoints(monkeypatch, package)
+    first, second = make_app(package, storage_backend=backend), make_app(package, storage_backend=backend)
+    fill(first, package)
+    with quiet(): second.merge_external_changes()
+    merge = first.merge_external_changes
+    def merge_then_edit_elsewhere(): # The other instance appends after the merge, before the rotation
+        merged = merge()
+        with quiet(): second.add_mark("C3", "S4", mark_value(package, 8.5))
+        return merged
+    monkeypatch.setattr(first, "merge_external_changes", merge_then_edit_elsewhere)
+    save(first)
+    assert not os.path.exists(first.journal.rotated_path) # The checkpoint finished
+    fresh = make_app(package, storage_backend=backend)
+    if hasattr(fresh, "loaded"): fresh.loaded.wait()
+    assert fresh.marks.get_tenths("C3", "S4") == 85
+    assert state(fresh) == state(second)
@@ -0,0 +1,52 @@
+import gzip
+import importlib
+import random
+import zlib
+
+import pytest
+
+PACKAGES = ("pw8", "pw9")
+BLOCK = 1000
+
+def parallel_gzip(package):
+    return importlib.import_module(f"{package}.parallel_gzip")
+
+def payload(size):
+    rnd = random.Random(size)
+    words = [b"alpha", b"beta", b"gamma", b"\xc3\xa9t\xc3\xa9", b"\x00\xff", b"\n"]
+    data = b"".join(rnd.choice(words) for _ in range(size))
+    return data[:size]
+
+def count_members(raw):
+    members = 0
+    while raw:
+        decompressor = zlib.decompressobj(31)
+        decompressor.decompress(raw)
+        assert decompressor.eof
+        raw = decompressor.unused_data
+        members += 1
+    return members
+
+@pytest.mark.parametrize("package", PACKAGES)
+@pytest.mark.parametrize("size", [0, 1, BLOCK - 1, BLOCK, BLOCK + 1, 3 * BLOCK, 20 * BLOCK + 17])
+def test_multi_member_output_reads_back(package, size):
+    data = payload(size)
+    writes = [1, BLOCK - 1, 2, BLOCK, 3 * BLOCK + 5, 0] # Writes straddling the block boundaries in every way
+    with parallel_gzip(package).ParallelGzipFile("out.gz", block_size=BLOCK, workers=3) as f:
+        start = 0
+        for length in writes * (size // BLOCK + 1):
+            assert f.write(data[start:start + length]) == len(data[start:start + length])
+            start += length
+        f.write(memoryview(bytearray(data[start:])))
+    raw = open("out.gz", "rb").read()
+    assert count_members(raw) == max(1, -(-size // BLOCK)) # One member per block, at least one
+    assert gzip.decompress(raw) == data
+    with gzip.open("out.gz", "rb") as f:
+        assert f.read() == data
+    with gzip.open("out.gz", "rb") as f: # Small reads across the member boundaries
+        assert b"".join(iter(lambda: f.read(333), b"")) == data
+
+@pytest.mark.parametrize("package", PACKAGES)
+def test_only_writing_is_supported(package):
+    with pytest.raises(ValueError):
+        parallel_gzip(package).ParallelGzipFile("out.gz", "rb")
@@ -0,0 +1,77 @@
+import importlib
+
+import pytest
+
+from .helpers import APP_MODULES, PERSISTENT, make_app, mark_value, quiet
+
+def ids(students):
+    return [s.id for s in students]
+
+def SqliteStore(package):
+    return importlib.import_module(f"{package}.sqlite_store").SqliteStore
+
+def spy(method, calls):
+    def wrapper(self, *args):
+        calls.append(args)
+        return method(self, *args)
+    return wrapper
+
+@pytest.fixture(params=APP_MODULES)
+def app(request):
+    package = request.param
+    app = make_app(package)
+    with quiet():
+        for student_id in "ABCDE": app.add_student(student_id, f"Student {student_id}", "01/01/2000")
+        app.add_course("C1", "Course", mark_value(package, 3))
+        for student_id, mark in (("A", 15), ("B", 12), ("C", 15), ("D", 12)): # E has no marks
+            app.add_mark("C1", student_id, mark_value(package, mark))
+    app.package = package
+    return app
+
+def test_ties_keep_insertion_order(app):
+    assert ids(app.get_top_students(5)) == ["A", "C", "B", "D", "E"]
+    assert ids(app.get_bottom_students(2)) == ["E", "D"] # Worst first
+    assert [app.get_student_rank(s) for s in "ABCDE"] == [1, 3, 2, 4, 5]
+    assert app.get_top_students(0) == [] and app.get_bottom_students(0) == []
+    ordered = getattr(app, "get_students_sorted_by_gpa", None) or app.get_sorted_students_by_gpa # pw9 names it differently
+    assert ids(app.get_top_students(50)) == ids(ordered())
+
+def test_updated_mark_moves_a_student_across_neighbours(app):
+    app.get_top_students(5) # Index built before the change
+    with quiet(): app.add_mark("C1", "D", mark_value(app.package, 16))
+    assert ids(app.get_top_students(5)) == ["D", "A", "C", "B", "E"]
+    assert app.get_student_rank("D") == 1 and app.get_student_rank("B") == 4
+    with quiet(): app.add_mark("C1", "D", mark_value(app.package, 12)) # Back: ties again behind B, its elder
+    assert ids(app.get_top_students(5)) == ["A", "C", "B", "D", "E"]
+
+def test_unknown_student_has_no_rank(app):
+    assert app.get_student_rank("nobody") is None
+    with quiet(): app.add_student("F", "Late", "01/01/2000") # Added later: ranked, last among equals
+    assert app.get_student_rank("F") == 6 and ids(app.get_bottom_students(1)) == ["F"]
+
+def build(app, package):
+    with quiet():
+        for student_id in "ABCDEFG": app.add_student(student_id, f"Student {student_id}", "01/01/2000")
+        app.add_course("C1", "Course", mark_value(package, 3)); app.add_course("C2", "Other", mark_value(package, 1))
+        for course_id, student_id, mark in (("C1", "A", 15), ("C1", "B", 12), ("C1", "C", 15), ("C2", "C", 15),
+                                            ("C1", "D", 12), ("C2", "D", 12), ("C1", "F", 0), ("C1", "G", 9)):
+            app.add_mark(course_id, student_id, mark_value(package, mark)) # E: no marks, F: 0, both GPA 0
+
+def rankings(app, ids_to_rank):
+    return ([(s.id, s.gpa) for s in app.get_top_students(10)], [(s.id, s.gpa) for s in app.get_bottom_students(10)],
+            [ids(app.get_top_students(k)) for k in range(8)], [ids(app.get_bottom_students(k)) for k in range(8)],
+            [app.get_student_rank(s) for s in ids_to_rank])
+
+@pytest.mark.parametrize("package", PERSISTENT)
+def test_sqlite_aggregates_match_the_ranking_index(package, monkeypatch):
+    calls, store = [], SqliteStore(package)
+    monkeypatch.setattr(store, "top_students", spy(store.top_students, calls))
+    in_memory, database = make_app(package), make_app(package, storage_backend="sqlite")
+    assert database.database is not None and in_memory.database is None
+    build(in_memory, package); build(database, package)
+    assert rankings(database, "ABCDEFGX") == rankings(in_memory, "ABCDEFGX")
+    assert calls # Answered by SQL, not by the in-memory index
+    for app in (in_memory, database):
+        with quiet(): app.add_mark("C1", "G", mark_value(package, 20)) # G jumps from next-to-last to the top
+    assert rankings(database, "ABCDEFGX") == rankings(in_memory, "ABCDEFGX")
+    assert database.get_student_rank("G") == 1 and database.get_student_rank("X") is None
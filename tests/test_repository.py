@@ -0,0 +1,32 @@
+import importlib
+from collections import namedtuple
+
+import pytest
+
+Entity = namedtuple("Entity", "id name")
+
+@pytest.fixture(params=["pw4", "pw5", "pw6", "pw8", "pw9"])
+def repository(request):
+    return importlib.import_module(f"{request.param}.repository")
+
+def test_snapshot_reads_like_a_list_of_its_entities(repository):
+    store = repository.EntityStore(Entity(f"E{i}", f"n{i}") for i in range(10))
+    snapshot = store.snapshot()
+    expected = store.to_list()
+    for i in range(10): store.add(Entity(f"L{i}", "later")) # Not in the snapshot
+    assert len(snapshot) == 10 and list(snapshot) == expected
+    assert [snapshot[i] for i in range(-10, 10)] == expected[-10:] + expected
+    for key in (slice(None), slice(2, 5), slice(-3, None), slice(None, None, -2), slice(5, 50)):
+        assert snapshot[key] == expected[key]
+    for position in (10, 15, -11):
+        with pytest.raises(IndexError):
+            snapshot[position]
+    assert snapshot.get("L0") is None and snapshot.get("E3") == expected[3] and not snapshot.has_id("L1")
+
+def test_snapshot_iteration_survives_appends(repository):
+    store = repository.EntityStore(Entity(f"E{i}", "") for i in range(5))
+    seen = []
+    for entity in store.snapshot():
+        seen.append(entity.id)
+        store.add(Entity(f"new{len(seen)}", "")) # E.g. the UI adding while a save iterates
+    assert seen == [f"E{i}" for i in range(5)]
@@ -0,0 +1,34 @@
+import importlib
+import random
+
+import pytest
+
+from .helpers import mark_store_class
+
+PACKAGES = ("pw4", "pw5", "pw6", "pw8", "pw9")
+
+def same_marks(sparse, dense, student_ids, course_ids):
+    assert len(sparse) == len(dense)
+    assert sorted(sparse.iter_tenths()) == sorted(dense.iter_tenths())
+    for course_id in course_ids:
+        assert sparse.marks_for_course(course_id) == dense.marks_for_course(course_id)
+    for student_id in student_ids:
+        assert sparse.marks_for_student(student_id) == dense.marks_for_student(student_id)
+
+@pytest.mark.parametrize("min_merge", [4, 1024]) # Merging often, and marks staying pending
+@pytest.mark.parametrize("package", PACKAGES)
+def test_sparse_store_matches_mark_store(package, min_merge, monkeypatch):
+    monkeypatch.setattr(importlib.import_module(f"{package}.sparse_mark_store"), "_MIN_MERGE", min_merge)
+    sparse, dense = mark_store_class(package, "SparseMarkStore")(), mark_store_class(package, "MarkStore")()
+    student_ids, course_ids = [f"S{i}" for i in range(40)], [f"C{j}" for j in range(12)]
+    rng = random.Random(10)
+    snapshots = []
+    for step in range(600):
+        course_id, student_id, tenths = rng.choice(course_ids), rng.choice(student_ids), rng.randrange(201)
+        assert sparse.set_tenths(course_id, student_id, tenths) == dense.set_tenths(course_id, student_id, tenths)
+        assert sparse.get_tenths(course_id, student_id) == tenths
+        if step % 150 == 0:
+            snapshots.append((sparse.snapshot(), sorted(dense.iter_tenths())))
+    same_marks(sparse, dense, student_ids, course_ids)
+    for snapshot, expected in snapshots: # Later writes do not show through
+        assert sorted(snapshot.iter_tenths()) == expected
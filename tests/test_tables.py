@@ -0,0 +1,61 @@
+import importlib
+
+import pytest
+
+from .helpers import APP_MODULES, quiet
+
+PACKAGES = tuple(APP_MODULES)
+
+def domains(package):
+    return importlib.import_module(f"{package}.domains")
+
+@pytest.mark.parametrize("package", PACKAGES)
+def test_student_rows_behave_like_students(package):
+    d = domains(package)
+    students = [d.Student("S1", "Ada", "01/01/2000"), d.Student("S2", "Bình; Nguyễn", "02/02/2001")]
+    students[0].gpa = 3.25
+    table = d.StudentTable.from_students(students)
+    assert len(table) == 2 and table.append("S1", "Dup", "x") is None
+    for student, row in zip(students, table):
+        assert (row.id, row.name, row.dob, row.gpa) == (student.id, student.name, student.dob, student.gpa)
+        assert str(row) == str(student)
+        assert row.get_display_info() == student.get_display_info()
+        assert row.get_display_info(show_gpa=True) == student.get_display_info(show_gpa=True)
+    row = table.get("S2")
+    row.gpa = 2.5
+    assert table[-1].gpa == 2.5 and table.get("nope") is None
+    with pytest.raises(IndexError):
+        table[2]
+    students[1].gpa = 2.5
+    assert [(s.id, s.name, s.dob, s.gpa) for s in table.to_students()] == [(s.id, s.name, s.dob, s.gpa) for s in students]
+
+@pytest.mark.parametrize("package", PACKAGES)
+def test_course_rows_behave_like_courses(package):
+    d = domains(package)
+    courses = [d.Course("C1", "Maths", 3), d.Course("C2", "Văn học", "4")]
+    table = d.CourseTable.from_courses(courses)
+    for course, row in zip(courses, table):
+        assert (row.id, row.name, row.credits) == (course.id, course.name, course.credits)
+        assert str(row) == str(course) and row.get_display_info() == course.get_display_info()
+    assert [(c.id, c.name, c.credits) for c in table.to_courses()] == [(c.id, c.name, c.credits) for c in courses]
+    with pytest.raises(IndexError):
+        table[-3]
+
+@pytest.mark.parametrize("package", PACKAGES)
+@pytest.mark.parametrize("credits", [0, -2, "abc", None])
+def test_course_table_clamps_credits_like_course(package, credits):
+    d = domains(package)
+    table = d.CourseTable()
+    with quiet():
+        expected = d.Course("C1", "Maths", 1 if credits is None else credits).credits
+    row = table.append("C1", "Maths", credits)
+    assert row.credits == expected == 1
+    assert len(table.ids) == len(table.names) == len(table.credits) == 1
+
+@pytest.mark.parametrize("package", PACKAGES)
+def test_course_table_rejects_out_of_range_credits_without_a_partial_row(package):
+    table = domains(package).CourseTable()
+    with pytest.raises(OverflowError):
+        table.append("C1", "Maths", 2 ** 40)
+    assert len(table) == 0 and table.get("C1") is None and len(table.credits) == 0
+    assert table.append("C1", "Maths", 3).credits == 3